@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark: OpenSubtitles hashing with subliminal versus the hashing module
+
+Usage: python benchmarks/bench_hash.py [--files 2000] [--size-mb 50] [--workers 8]
+
+Files are sparse, so the numbers measure per-file overhead with the page
+cache warm rather than disk seeks.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Add the package to Python path
+package_dir = os.path.join(os.path.dirname(__file__), '..', 'src')
+sys.path.insert(0, os.path.abspath(package_dir))
+
+from subtitle_downloader import hashing
+from subtitle_downloader.hashing import hash_files, opensubtitles_hash
+
+def make_videos(folder, count, size):
+    """Creates sparse videos with distinct head and tail blocks"""
+    paths = []
+    for index in range(count):
+        path = os.path.join(folder, f"video{index:05d}.mkv")
+        with open(path, 'wb') as f:
+            f.write(os.urandom(hashing.HASH_BLOCK_SIZE))
+            f.seek(size - hashing.HASH_BLOCK_SIZE)
+            f.write(os.urandom(hashing.HASH_BLOCK_SIZE))
+        paths.append(path)
+    return paths
+
+def measure(label, hash_all, paths):
+    """Hashes every path once and prints the cost per file"""
+    hashing._hash_cache.clear()
+    start = time.perf_counter()
+    hash_all(paths)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {elapsed:8.2f}s  {elapsed / len(paths) * 1e6:10.1f} us/file")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=2000, help='Number of files (default: 2000)')
+    parser.add_argument('--size-mb', type=int, default=50, help='Apparent size of each file (default: 50)')
+    parser.add_argument('--workers', type=int, default=8, help='Threads for parallel hashing (default: 8)')
+    args = parser.parse_args()
+
+    from subliminal.refiners.hash import hash_opensubtitles
+    subliminal_hash = hash_opensubtitles.__wrapped__
+
+    with tempfile.TemporaryDirectory() as folder:
+        paths = make_videos(folder, args.files, args.size_mb * 1024 * 1024)
+
+        # Before: buffered 8-byte reads and struct.unpack per integer
+        measure("subliminal, serial", lambda paths: [subliminal_hash(path) for path in paths], paths)
+
+        # After: two positioned reads into a reused buffer, one fold
+        fold = "NumPy" if hashing.numpy is not None else "memoryview"
+        measure(f"pread + {fold} fold, serial", lambda paths: [opensubtitles_hash(path) for path in paths], paths)
+        if hashing.numpy is not None:
+            numpy = hashing.numpy
+            hashing.numpy = None
+            measure("pread + memoryview fold, serial", lambda paths: [opensubtitles_hash(path) for path in paths], paths)
+            hashing.numpy = numpy
+        measure(f"pread, {args.workers} threads", lambda paths: hash_files(paths, args.workers), paths)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark: filename parse cost per file with and without the parse cache
+
+Usage: python benchmarks/bench_parse_cache.py [--files 10000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Add the package to Python path
+package_dir = os.path.join(os.path.dirname(__file__), '..', 'src')
+sys.path.insert(0, os.path.abspath(package_dir))
+
+from subtitle_downloader import season
+
+SHOWS = ["The.Office.US", "Breaking.Bad", "Dark", "The.Expanse", "Succession",
+         "Better.Call.Saul", "Mr.Robot", "Fargo", "Severance", "Andor"]
+RELEASES = ["720p.HDTV.x264-CTU", "1080p.WEB-DL.DDP5.1.H.264-NTb", "2160p.WEB.h265-GGEZ"]
+
+def make_names(count):
+    """Generates distinct episode filenames"""
+    names = []
+    index = 0
+    while len(names) < count:
+        show = SHOWS[index % len(SHOWS)]
+        release = RELEASES[(index // len(SHOWS)) % len(RELEASES)]
+        season_number = 1 + index // 1000
+        episode_number = 1 + (index // 30) % 30
+        names.append(f"{show}.S{season_number:02d}E{episode_number:02d}.{index}.{release}.mkv")
+        index += 1
+    return names
+
+def measure(label, names):
+    """Parses every name once and prints the cost per file"""
+    start = time.perf_counter()
+    for name in names:
+        season.parse_video_name(name)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {elapsed:8.2f}s  {elapsed / len(names) * 1e6:10.1f} us/file")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=10000, help='Number of files (default: 10000)')
+    args = parser.parse_args()
+
+    names = make_names(args.files)
+
+    with tempfile.TemporaryDirectory() as cache_home:
+        os.environ['XDG_CACHE_HOME'] = cache_home
+        season._parse_cache.maxsize = max(season._parse_cache.maxsize, len(names))
+
+        # Before: every file goes through guessit
+        season.warm_parse_cache(persist=False)
+        measure("uncached (guessit per file)", names)
+
+        # After: a second pass in the same process hits the memo cache
+        measure("memoized, same process", names)
+
+        # After: a new process loads the persisted cache once
+        season.save_parse_cache()
+        season._parse_cache.clear()
+        start = time.perf_counter()
+        season._parse_cache.load(season.get_parse_cache_file())
+        print(f"{'persisted cache load':<34} {time.perf_counter() - start:8.2f}s")
+        measure("memoized, loaded from disk", names)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark: library scan time with and without the persisted scan tree
+
+Usage: python benchmarks/bench_scan_tree.py [--folders 50000] [--files-per-folder 2]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Add the package to Python path
+package_dir = os.path.join(os.path.dirname(__file__), '..', 'src')
+sys.path.insert(0, os.path.abspath(package_dir))
+
+from subtitle_downloader.scanner import ScanTree, scan_folder
+from subtitle_downloader.utils import is_video_file
+
+def make_library(root, folders, files_per_folder):
+    """Creates show/season folders with empty episode files, dated in the past"""
+    past = time.time() - 3600
+    shows = max(1, folders // 10)
+    created = 0
+    for show in range(shows):
+        show_dir = os.path.join(root, f"Show {show:05d}")
+        os.mkdir(show_dir)
+        for season in range(10):
+            if created == folders:
+                break
+            season_dir = os.path.join(show_dir, f"Season {season + 1:02d}")
+            os.mkdir(season_dir)
+            for episode in range(files_per_folder):
+                open(os.path.join(season_dir, f"Show.S{season + 1:02d}E{episode + 1:02d}.mkv"), 'w').close()
+            os.utime(season_dir, (past, past))
+            created += 1
+        os.utime(show_dir, (past, past))
+    os.utime(root, (past, past))
+
+def measure(label, root, tree=None):
+    """Scans the library once and prints the time and folders listed"""
+    start = time.perf_counter()
+    count = sum(1 for _ in scan_folder(root, is_video_file, True, tree))
+    elapsed = time.perf_counter() - start
+    listed = f"{tree.listed} folders listed" if tree is not None else "every folder listed"
+    print(f"{label:<34} {elapsed:8.2f}s  {count} videos, {listed}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--folders', type=int, default=50000, help='Number of season folders (default: 50000)')
+    parser.add_argument('--files-per-folder', type=int, default=2, help='Videos per folder (default: 2)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root, tempfile.TemporaryDirectory() as cache_home:
+        make_library(root, args.folders, args.files_per_folder)
+        cache_file = os.path.join(cache_home, 'scan-tree.json')
+
+        # Before: every run lists every folder
+        measure("full scan, no tree", root)
+
+        # First run with a tree lists everything and records it
+        tree = ScanTree(cache_file)
+        measure("first scan, building tree", root, tree)
+        tree.save()
+
+        # After: a new run loads the tree and only stats folders
+        start = time.perf_counter()
+        tree = ScanTree(cache_file)
+        tree.load()
+        print(f"{'tree load':<34} {time.perf_counter() - start:8.2f}s")
+        measure("no-change scan", root, tree)
+
+        # One new episode relists only its folder
+        open(os.path.join(root, "Show 00000", "Season 01", "Show.S01E99.mkv"), 'w').close()
+        tree = ScanTree(cache_file)
+        tree.load()
+        measure("one folder changed", root, tree)
+
+if __name__ == '__main__':
+    main()
@@ -7,7 +7,6 @@ Command-line interface for subtitle downloading
 import sys
 import os
 import argparse
-import subprocess
 from pathlib import Path
 
 def main():
@@ -17,6 +16,7 @@ def main():
     
     try:
         from subtitle_downloader.__main__ import main as package_main
+        from subtitle_downloader.utils import VIDEO_EXTENSIONS, is_video_file
     except ImportError as e:
         print(f"❌ Error: Could not import subtitle downloader package")
         print(f"   Make sure the package is properly installed: {e}")
@@ -34,16 +34,21 @@ def main():
         help='Video file to download subtitles for'
     )
     
+    # Further files from a multi-file selection (file manager %F)
+    parser.add_argument(
+        'more_files',
+        nargs='*',
+        help=argparse.SUPPRESS
+    )
+    
     parser.add_argument(
         '-l', '--language',
-        default='pt-br',
-        help='Preferred language (default: pt-br)'
+        help='Preferred language (default: from config, pt-br)'
     )
     
     parser.add_argument(
         '-f', '--fallback',
-        default='en', 
-        help='Fallback language (default: en)'
+        help='Fallback language (default: from config, en)'
     )
     
     parser.add_argument(
@@ -52,6 +57,90 @@ def main():
         help='Process all video files in a directory'
     )
     
+    parser.add_argument(
+        '-r', '--recursive',
+        action='store_true',
+        help='Batch: include videos in subfolders'
+    )
+    
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        help='Batch: number of files downloaded in parallel (default: from config, 3)'
+    )
+    
+    parser.add_argument(
+        '--stdin',
+        action='store_true',
+        help='Read video paths from stdin and print one JSON object per finished file'
+    )
+    
+    parser.add_argument(
+        '-0', '--null',
+        action='store_true',
+        help='With --stdin: paths are NUL-separated (find -print0)'
+    )
+    
+    parser.add_argument(
+        '--resume',
+        metavar='LOG',
+        help='With --stdin or --batch: skip files a previous run logged as downloaded or skipped'
+    )
+    
+    parser.add_argument(
+        '--log',
+        metavar='LOG',
+        help='Batch: append one JSON object per finished file to LOG'
+    )
+    
+    parser.add_argument(
+        '--serve',
+        metavar='DIR',
+        help='Coordinate a batch: serve the videos in DIR (with -r, its subfolders too) as jobs to --worker processes'
+    )
+    
+    parser.add_argument(
+        '--listen',
+        default='127.0.0.1:8765',
+        metavar='HOST:PORT',
+        help='With --serve: address to listen on; use 0.0.0.0 for other machines (default: 127.0.0.1:8765)'
+    )
+    
+    parser.add_argument(
+        '--worker',
+        metavar='URL',
+        help='Download jobs leased from the coordinator at URL'
+    )
+    
+    parser.add_argument(
+        '--retime',
+        action='store_true',
+        help='Retime a subtitle file, or all subtitles in a directory'
+    )
+    
+    parser.add_argument(
+        '--offset',
+        type=float,
+        default=0.0,
+        help='Retime: shift all cues by this many seconds'
+    )
+    
+    parser.add_argument(
+        '--fps',
+        nargs=2,
+        type=float,
+        metavar=('FROM', 'TO'),
+        help='Retime: convert cues timed for one frame rate to another'
+    )
+    
+    parser.add_argument(
+        '--sync',
+        nargs=2,
+        action='append',
+        metavar=('SUBTITLE_TIME', 'VIDEO_TIME'),
+        help='Retime: sync point as HH:MM:SS,mmm or seconds (give exactly twice)'
+    )
+    
     parser.add_argument(
         '--list-languages',
         action='store_true',
@@ -104,6 +193,57 @@ def main():
         print("  ko     - Korean")
         sys.exit(0)
     
+    # Handle retime mode
+    if args.retime:
+        if not args.file:
+            print("❌ Error: Please specify a subtitle file or directory to retime")
+            sys.exit(1)
+        
+        from subtitle_downloader.retime import fps_scale, two_point_transform, retime_file, retime_directory
+        
+        scale, offset_ms = 1.0, args.offset * 1000
+        try:
+            if args.sync:
+                if len(args.sync) != 2:
+                    print("❌ Error: --sync must be given exactly twice")
+                    sys.exit(1)
+                points = [(parse_time(sub), parse_time(video)) for sub, video in args.sync]
+                scale, sync_offset = two_point_transform(*points)
+                offset_ms += sync_offset
+            elif args.fps:
+                scale = fps_scale(*args.fps)
+        except ValueError as e:
+            print(f"❌ Error: {e}")
+            sys.exit(1)
+        
+        target = Path(args.file)
+        print(f"⏱️ Retiming {target} (scale {scale:.6f}, offset {offset_ms / 1000:+.3f}s)")
+        
+        if target.is_dir():
+            from subtitle_downloader.config import Config
+            results = retime_directory(target, scale, offset_ms, workers=Config().get("cpu_workers", 0))
+        else:
+            try:
+                results = {str(target): {"success": True, "message": f"{retime_file(target, scale, offset_ms)} cues retimed"}}
+            except (OSError, ValueError) as e:
+                results = {str(target): {"success": False, "message": str(e)}}
+        
+        for path, result in results.items():
+            print(f"{'✅' if result['success'] else '❌'} {Path(path).name}: {result['message']}")
+        
+        sys.exit(0 if results and all(result['success'] for result in results.values()) else 1)
+    
+    # Handle pipeline mode
+    if args.stdin:
+        run_pipeline(args)
+    
+    # Handle coordinator and worker modes
+    if args.serve:
+        run_coordinator(args)
+    
+    if args.worker:
+        run_worker_mode(args)
+    
     # Handle batch mode
     if args.batch:
         if not args.file:
@@ -115,48 +255,62 @@ def main():
             print(f"❌ Error: {args.file} is not a directory")
             sys.exit(1)
         
+        from subtitle_downloader.cancel import CancelToken, cancel_on_interrupt
+        from subtitle_downloader.pipeline import load_finished, result_record
+        from subtitle_downloader.progress import ResultCounter
+        
+        finished = set()
+        if args.resume and os.path.exists(args.resume):
+            with open(args.resume, encoding='utf-8', errors='replace') as log:
+                finished = load_finished(log)
+        
+        downloader = create_downloader(args)
+        jobs = args.jobs or downloader.config.get("download_workers", 3)
+        languages = downloader.get_languages()
         print(f"🔍 Processing directory: {directory}")
-        video_files = []
+        print(f"🌍 Language: {languages[0]} (fallback: {', '.join(languages[1:]) or 'none'}), {jobs} parallel jobs")
+        if finished:
+            print(f"⏭️ Resuming: {len(finished)} files already done")
         
-        # Supported video extensions
-        video_extensions = {
-            '.avi', '.mkv', '.mp4', '.mov', '.wmv', '.webm', '.flv', '.3gp', 
-            '.m4v', '.mpg', '.mpeg', '.vob', '.ogv', '.ts', '.m2ts', '.divx',
-            '.m4v', '.mpg', '.mpe', '.mpv', '.qt', '.asf', '.ogm', '.dv'
-        }
+        interactive = sys.stdout.isatty()
+        counter = ResultCounter()
+        log = open(args.log, 'a', encoding='utf-8') if args.log else None
         
-        for file_path in directory.iterdir():
-            if file_path.is_file() and file_path.suffix.lower() in video_extensions:
-                video_files.append(file_path)
+        # Ctrl-C lets the downloads in flight stop cleanly and skips the rest
+        cancel = CancelToken()
+        try:
+            with cancel_on_interrupt(cancel):
+                results = downloader.batch_stream(str(directory.absolute()), cancel, jobs, args.recursive, finished.__contains__)
+                for file_path, result in results:
+                    name = Path(file_path).name
+                    counter.add(name, result["success"], result["message"], result.get("skipped", False))
+                    if log:
+                        # Each result is on disk as soon as it finishes
+                        log.write(result_record(file_path, result) + "\n")
+                        log.flush()
+                    
+                    status = f"⏳ {counter.total} done | ✅ {counter.downloaded} ❌ {counter.failed} ⏭️ {counter.skipped} | {name}"
+                    if interactive:
+                        # One line, redrawn in place as files finish
+                        print(f"\r\033[K{status}", end="", flush=True)
+                    else:
+                        print(status, flush=True)
+        finally:
+            if log:
+                log.close()
+        if interactive and counter.total:
+            print()
         
-        if not video_files:
+        if not counter.total and not finished:
             print("❌ No video files found in the directory")
             sys.exit(1)
         
-        print(f"📹 Found {len(video_files)} video files")
-        
-        success_count = 0
-        for video_file in video_files:
-            print(f"\n🎬 Processing: {video_file.name}")
-            try:
-                # Call the package main function for each file
-                old_argv = sys.argv
-                sys.argv = ['download-subtitle', str(video_file)]
-                
-                try:
-                    package_main()
-                    success_count += 1
-                except SystemExit as e:
-                    if e.code == 0:
-                        success_count += 1
-                
-                sys.argv = old_argv
-                
-            except Exception as e:
-                print(f"❌ Error processing {video_file.name}: {e}")
-        
-        print(f"\n✅ Batch processing completed: {success_count}/{len(video_files)} successful")
-        sys.exit(0)
+        _, _, details = counter.summary()
+        for line in details:
+            print(f"   {line}")
+        print(f"\n{'🛑 Batch cancelled' if cancel.cancelled else '✅ Batch processing completed'}: "
+              f"{counter.downloaded} downloaded, {counter.failed} failed, {counter.skipped} skipped")
+        sys.exit(130 if cancel.cancelled else 1 if counter.failed else 0)
     
     # Handle single file mode with CLI flag
     if args.cli and args.file:
@@ -171,55 +325,44 @@ def main():
             sys.exit(1)
         
         # Check if it's a video file
-        video_extensions = {
-            '.avi', '.mkv', '.mp4', '.mov', '.wmv', '.webm', '.flv', '.3gp', 
-            '.m4v', '.mpg', '.mpeg', '.vob', '.ogv', '.ts', '.m2ts', '.divx',
-            '.m4v', '.mpg', '.mpe', '.mpv', '.qt', '.asf', '.ogm', '.dv'
-        }
-        
-        if file_path.suffix.lower() not in video_extensions:
+        if not is_video_file(file_path):
             print(f"❌ Error: Not a supported video file: {args.file}")
-            print(f"   Supported formats: {', '.join(sorted(video_extensions))}")
+            print(f"   Supported formats: {', '.join(sorted(VIDEO_EXTENSIONS))}")
             sys.exit(1)
         
         print(f"🎬 Downloading subtitles for: {file_path.name}")
-        print(f"🌍 Language: {args.language} (fallback: {args.fallback})")
-        print("⏳ Searching...")
         
-        try:
-            # Use subliminal directly for CLI mode
-            cmd = [
-                'python3', '-m', 'subliminal',
-                'download',
-                '-l', args.language,
-                '-l', args.fallback,
-                '--provider', 'opensubtitles',
-                '--verbose',
-                str(file_path)
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                if "Downloaded" in result.stdout or "1 subtitle downloaded" in result.stdout:
-                    print("✅ Subtitle downloaded successfully!")
-                    
-                    # Try to rename the subtitle file
-                    subtitle_renamed = rename_subtitle_file(file_path, args.language)
-                    if subtitle_renamed:
-                        print(f"📝 Subtitle renamed to: {subtitle_renamed}")
-                    
-                else:
-                    print("❌ No subtitles found for this file")
-            else:
-                print("❌ Error downloading subtitle")
-                if result.stderr:
-                    print(f"   Error: {result.stderr}")
-            
-        except Exception as e:
-            print(f"❌ Unexpected error: {e}")
+        from subtitle_downloader.cancel import CancelToken, cancel_on_interrupt
+        from subtitle_downloader.priority import INTERACTIVE
+        from subtitle_downloader.progress import DOWNLOADING
         
-        sys.exit(0)
+        downloader = create_downloader(args)
+        languages = downloader.get_languages()
+        print(f"🌍 Language: {languages[0]} (fallback: {', '.join(languages[1:]) or 'none'})")
+        
+        def show_progress(event):
+            if event.phase != DOWNLOADING or not event.current:
+                print(f"⏳ {event.message}")
+        
+        # Ctrl-C aborts the search or download in flight and cleans up
+        cancel = CancelToken()
+        with cancel_on_interrupt(cancel):
+            future = downloader.executor().submit_as(
+                INTERACTIVE, downloader.download_for_file, str(file_path), show_progress, cancel
+            )
+            success, message = future.result()
+        
+        if success:
+            print(f"✅ {message}")
+            from subtitle_downloader.prefetch import start_prefetch
+            if start_prefetch(downloader, file_path):
+                print("⏳ Prefetching subtitles for the next episodes in the background")
+            sys.exit(0)
+        if cancel.cancelled:
+            print("🛑 Cancelled")
+            sys.exit(130)
+        print(f"❌ {message}")
+        sys.exit(1)
     
     # Default behavior: pass to package main
     if not args.file and len(sys.argv) == 1:
@@ -236,46 +379,117 @@ def main():
         print(f"❌ Error: {e}")
         sys.exit(1)
 
-def rename_subtitle_file(video_path, language):
-    """Renames the most recent subtitle file to match video name"""
-    video_dir = Path(video_path).parent
-    video_stem = Path(video_path).stem
-    
-    import time
-    current_time = time.time()
-    
-    # Find the most recently created .srt file
-    srt_files = []
-    for file in video_dir.iterdir():
-        if file.suffix.lower() == '.srt':
-            file_time = file.stat().st_mtime
-            # Check if file was created in the last 2 minutes
-            if current_time - file_time < 120:
-                srt_files.append((file, file_time))
-    
-    if not srt_files:
-        return None
-    
-    # Get the most recent file
-    latest_file, _ = max(srt_files, key=lambda x: x[1])
-    
-    # Generate new name
-    base_name = f"{video_stem}.{language}.srt"
-    base_path = video_dir / base_name
-    
-    if not base_path.exists():
-        latest_file.rename(base_path)
-        return base_path.name
-    
-    # If base name exists, add counter
-    counter = 1
-    while True:
-        new_name = f"{video_stem}.{language}_{counter}.srt"
-        new_path = video_dir / new_name
-        if not new_path.exists():
-            latest_file.rename(new_path)
-            return new_path.name
-        counter += 1
+def run_pipeline(args):
+    """Downloads for paths read from stdin, writing NDJSON results to stdout"""
+    from subtitle_downloader.cancel import CancelToken, cancel_on_interrupt
+    from subtitle_downloader.pipeline import iter_paths, load_finished, result_record, result_status
+    
+    finished = set()
+    if args.resume and os.path.exists(args.resume):
+        with open(args.resume, encoding='utf-8', errors='replace') as log:
+            finished = load_finished(log)
+    
+    downloader = create_downloader(args)
+    jobs = args.jobs or downloader.config.get("download_workers", 3)
+    paths = (path for path in iter_paths(sys.stdin.buffer, args.null) if path not in finished)
+    
+    failed = False
+    cancel = CancelToken()
+    with cancel_on_interrupt(cancel):
+        for file_path, result in downloader.download_stream(paths, jobs, cancel):
+            failed = failed or result_status(result) in ("failed", "cancelled")
+            try:
+                print(result_record(file_path, result), flush=True)
+            except BrokenPipeError:
+                # The reader went away; stop taking new files
+                cancel.cancel()
+                os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+                failed = True
+    
+    sys.exit(130 if cancel.cancelled else 1 if failed else 0)
+
+def run_coordinator(args):
+    """Serves the videos of a directory to workers and prints their results"""
+    from subtitle_downloader.cancel import CancelToken, cancel_on_interrupt
+    from subtitle_downloader.coordinator import Coordinator, JobQueue
+    
+    directory = Path(args.serve)
+    if not directory.is_dir():
+        print(f"❌ Error: {args.serve} is not a directory")
+        sys.exit(1)
+    
+    host, _, port = args.listen.rpartition(':')
+    downloader = create_downloader(args)
+    failed = []
+    
+    def show_result(file_path, result):
+        if not result["success"]:
+            failed.append(file_path)
+        print(f"{'✅' if result['success'] else '❌'} {Path(file_path).name}: {result['message']}", flush=True)
+    
+    jobs = JobQueue(
+        downloader.find_videos(directory, args.recursive),
+        downloader.config.get("coordinator_lease_seconds", 60),
+        show_result
+    )
+    try:
+        coordinator = Coordinator(jobs, host or '127.0.0.1', int(port)).start()
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: Cannot listen on {args.listen}: {e}")
+        sys.exit(1)
+    
+    print(f"📡 Serving {len(jobs.paths)} videos at {coordinator.url}")
+    print(f"   Start workers with: download-subtitle.py --worker {coordinator.url}")
+    
+    cancel = CancelToken()
+    with cancel_on_interrupt(cancel):
+        while not jobs.finished.wait(0.5) and not cancel.cancelled:
+            pass
+    coordinator.stop()
+    
+    status = jobs.status()
+    print(f"\n{'🛑 Stopped' if cancel.cancelled else '✅ All jobs done'}: "
+          f"{status['finished'] - len(failed)} succeeded, {len(failed)} failed, "
+          f"{status['total'] - status['finished']} not finished")
+    sys.exit(130 if cancel.cancelled else 1 if failed else 0)
+
+def run_worker_mode(args):
+    """Downloads jobs from a coordinator until it has none left"""
+    from subtitle_downloader.cancel import CancelToken, cancel_on_interrupt
+    from subtitle_downloader.coordinator import run_worker
+    
+    downloader = create_downloader(args)
+    print(f"🔗 Working for {args.worker}")
+    
+    def show_result(file_path, result):
+        print(f"{'✅' if result['success'] else '❌'} {Path(file_path).name}: {result['message']}", flush=True)
+    
+    # Ctrl-C stops this worker; its current job is reassigned when the lease expires
+    cancel = CancelToken()
+    with cancel_on_interrupt(cancel):
+        done = run_worker(args.worker, downloader, cancel=cancel, on_result=show_result)
+    
+    print(f"\n{'🛑 Worker stopped' if cancel.cancelled else '✅ No jobs left'}: {done} files processed")
+    sys.exit(130 if cancel.cancelled else 0)
+
+def parse_time(value):
+    """Parses HH:MM:SS,mmm (or plain seconds) into milliseconds"""
+    if ':' not in value:
+        return float(value) * 1000
+    
+    hours, minutes, seconds = value.replace(',', '.').split(':')
+    return ((int(hours) * 60 + int(minutes)) * 60 + float(seconds)) * 1000
+
+def create_downloader(args):
+    """Creates an engine honoring the -l/--language and -f/--fallback options"""
+    from subtitle_downloader.core import SubtitleDownloader
+    
+    downloader = SubtitleDownloader()
+    if args.language:
+        downloader.config.override("default_language", args.language)
+    if args.fallback:
+        downloader.config.override("fallback_language", args.fallback)
+    return downloader
 
 if __name__ == "__main__":
     main()
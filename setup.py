@@ -104,6 +104,9 @@ setup(
         "gtk": [
             "PyGObject>=3.42,<4.0",
         ],
+        "fast": [
+            "numpy>=1.17",
+        ],
         "full": [
             "PyQt5>=5.15,<6.0",
             "PyQt5-Qt5>=5.15,<6.0",
@@ -9,8 +9,17 @@ __email__ = "yuir.cgdt@gmail.com"
 from .core import SubtitleDownloader
 from .config import Config
 from .utils import is_video_file, get_unique_subtitle_path, detect_gui_preference
-from .gui_qt import main_qt
-from .gui_gtk import main_gtk
+
+# GUI backends are optional; a missing toolkit leaves its entry point as None
+try:
+    from .gui_qt import main_qt
+except ImportError:
+    main_qt = None
+
+try:
+    from .gui_gtk import main_gtk
+except (ImportError, ValueError):
+    main_gtk = None
 
 __all__ = [
     'SubtitleDownloader',
@@ -9,31 +9,48 @@ from pathlib import Path
 
 from .utils import detect_gui_preference, is_video_file
 
+def load_gui(gui_type):
+    """Returns the preferred GUI entry point, falling back to the other toolkit"""
+    backends = ['qt', 'gtk'] if gui_type == 'qt' else ['gtk', 'qt']
+    errors = []
+    
+    for backend in backends:
+        try:
+            if backend == 'qt':
+                from .gui_qt import main_qt
+                return main_qt
+            from .gui_gtk import main_gtk
+            return main_gtk
+        except (ImportError, ValueError) as e:
+            errors.append(e)
+    
+    raise ImportError(errors[0])
+
 def main():
     if len(sys.argv) < 2:
         print("Error: No file selected")
-        print("Usage: download-subtitle <video-file>")
+        print("Usage: download-subtitle <video-file> [<video-file> ...]")
         sys.exit(1)
     
-    file_path = sys.argv[1]
-    
-    if not os.path.exists(file_path):
-        print(f"Error: File not found: {file_path}")
-        sys.exit(1)
+    # File managers pass every selected file (%F) in one invocation
+    file_paths = []
+    for file_path in sys.argv[1:]:
+        if not os.path.exists(file_path):
+            print(f"Error: File not found: {file_path}")
+        elif not is_video_file(file_path):
+            print(f"Error: Not a valid video file: {file_path}")
+        else:
+            file_paths.append(file_path)
     
-    if not is_video_file(file_path):
+    if not file_paths:
         print("Error: Please select a valid video file")
         sys.exit(1)
     
     gui_type = detect_gui_preference()
     
     try:
-        if gui_type == 'qt':
-            from .gui_qt import main_qt
-            sys.exit(main_qt(file_path))
-        else:
-            from .gui_gtk import main_gtk
-            sys.exit(main_gtk(file_path))
+        gui_main = load_gui(gui_type)
+        sys.exit(gui_main(file_paths))
     except ImportError as e:
         print(f"Error: No GUI backend available - {e}")
         print("Please install PyQt5 or PyGObject")
@@ -0,0 +1,86 @@
+"""
+Bounded in-memory caches with optional persistence
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+def get_cache_dir():
+    """Returns the cache directory shared by all persisted caches"""
+    base = os.environ.get('XDG_CACHE_HOME') or str(Path.home() / ".cache")
+    return Path(base) / "subtitle-downloader"
+
+def file_key(file_path):
+    """Returns an (inode, size, mtime_ns) key identifying a file's contents"""
+    stat = os.stat(file_path)
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+class MemoCache:
+    """Thread-safe least-recently-used cache with a fixed number of entries"""
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        """Gets a value and marks it as recently used"""
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return default
+            return self._data[key]
+
+    def put(self, key, value):
+        """Stores a value, evicting the least recently used entries"""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """Removes all entries"""
+        with self._lock:
+            self._data.clear()
+
+    def load(self, cache_file):
+        """Loads entries persisted by save(); returns False if unreadable"""
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if not isinstance(entries, dict):
+            return False
+
+        for key, value in entries.items():
+            self.put(key, value)
+        return True
+
+    def save(self, cache_file):
+        """Persists all entries as JSON, replacing the file atomically"""
+        cache_file = Path(cache_file)
+        with self._lock:
+            entries = dict(self._data)
+
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = cache_file.with_name(cache_file.name + ".tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(tmp_file, cache_file)
+            return True
+        except OSError:
+            return False
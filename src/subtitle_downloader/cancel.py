@@ -0,0 +1,88 @@
+"""
+Cooperative cancellation shared by front ends and the engine
+"""
+
+import signal
+import threading
+from contextlib import contextmanager
+
+class Cancelled(Exception):
+    """Raised inside the engine when its operation was cancelled"""
+
+class CancelToken:
+    """Thread-safe cancellation flag passed from a front end to the engine
+
+    The engine checks the token between steps and chunks. Callbacks
+    registered with on_cancel run once in the cancelling thread, so blocking
+    resources such as HTTP sessions are released right away.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = {}
+        self._next_id = 0
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        """Cancels the operation and runs the registered callbacks"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = list(self._callbacks.values())
+            self._callbacks.clear()
+
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def check(self):
+        """Raises Cancelled if the token was cancelled"""
+        if self._event.is_set():
+            raise Cancelled("Cancelled")
+
+    def wait(self, timeout=None):
+        """Sleeps until cancelled or timeout; returns True if cancelled"""
+        return self._event.wait(timeout)
+
+    @contextmanager
+    def on_cancel(self, callback):
+        """Runs callback on cancellation while the block is active"""
+        with self._lock:
+            callback_id = self._next_id
+            self._next_id += 1
+            if not self._event.is_set():
+                self._callbacks[callback_id] = callback
+                callback = None
+
+        if callback is not None:
+            callback()
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._callbacks.pop(callback_id, None)
+
+@contextmanager
+def cancel_on_interrupt(token):
+    """Turns the first Ctrl-C into token.cancel(); a second one interrupts as usual"""
+    if threading.current_thread() is not threading.main_thread():
+        yield token
+        return
+
+    def handle_interrupt(signum, frame):
+        if token.cancelled:
+            raise KeyboardInterrupt
+        token.cancel()
+
+    previous = signal.signal(signal.SIGINT, handle_interrupt)
+    try:
+        yield token
+    finally:
+        signal.signal(signal.SIGINT, previous)
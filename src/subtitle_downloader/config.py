@@ -20,6 +20,27 @@ class Config:
             "providers": ["opensubtitles"],
             "download_folder": str(Path.home() / "Subtitles"),
             "auto_rename": True,
+            "season_batch_min_episodes": 2,
+            "persist_parse_cache": True,
+            "normalize_encoding": True,
+            "validate_subtitles": True,
+            "check_duration": True,
+            "skip_embedded": True,
+            "download_workers": 3,
+            "coordinator_lease_seconds": 60,
+            "incremental_scan": True,
+            "full_rescan_days": 7,
+            "io_limit_rotational": 1,
+            "io_limit_ssd": 8,
+            "io_limit_other": 4,
+            "hash_workers": 8,
+            "provider_rate_limit": 0,
+            "provider_burst": 5,
+            "priority_aging_seconds": 30,
+            "coalesce_downloads": True,
+            "prefetch_siblings": False,
+            "prefetch_limit": 4,
+            "cpu_workers": 0,
             "opensubtitles_username": "",
             "opensubtitles_password": ""
         }
@@ -55,6 +76,10 @@ class Config:
         self._config[key] = value
         self.save_config()
     
+    def override(self, key, value):
+        """Sets a configuration value for this session only, without saving"""
+        self._config[key] = value
+    
     def set_opensubtitles_credentials(self, username, password):
         """Sets OpenSubtitles credentials"""
         self.set("opensubtitles_username", username)
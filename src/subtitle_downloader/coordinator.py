@@ -0,0 +1,245 @@
+"""
+Coordinator and workers for spreading one batch over several machines
+
+The coordinator hands out one video per job over a small JSON-over-HTTP
+protocol. Workers lease a job, send heartbeats while they download, and
+post the result. A lease that is not renewed in time expires and the job
+goes to the next worker that asks. Workers must see the videos under the
+same paths as the coordinator, e.g. the same NAS mount point.
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+import urllib.request
+from collections import deque
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .cancel import CancelToken
+
+DEFAULT_LEASE_SECONDS = 60
+# Seconds an idle worker waits before asking for work again
+POLL_INTERVAL = 2
+REQUEST_TIMEOUT = 30
+
+class JobQueue:
+    """Videos handed out to workers under expiring leases
+
+    The first result reported for a job wins; a late result from a worker
+    whose lease had already expired is accepted if the job is still open.
+    """
+
+    def __init__(self, file_paths, lease_seconds=DEFAULT_LEASE_SECONDS, on_result=None, clock=time.monotonic):
+        self.paths = list(file_paths)
+        self.lease_seconds = lease_seconds
+        self.on_result = on_result
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.queue = deque(range(len(self.paths)))
+        self.leases = {}
+        self.results = {}
+        self.finished = threading.Event()
+        if not self.paths:
+            self.finished.set()
+
+    def reclaim_expired(self):
+        """Returns expired jobs to the front of the queue; call with the lock held"""
+        now = self.clock()
+        for job_id, (_, expires) in list(self.leases.items()):
+            if expires <= now:
+                del self.leases[job_id]
+                self.queue.appendleft(job_id)
+
+    def lease(self, worker):
+        """Leases the next open job to worker; returns (job_id, path) or None"""
+        with self.lock:
+            self.reclaim_expired()
+            if not self.queue:
+                return None
+            job_id = self.queue.popleft()
+            self.leases[job_id] = (worker, self.clock() + self.lease_seconds)
+            return job_id, self.paths[job_id]
+
+    def heartbeat(self, job_id, worker):
+        """Extends worker's lease on a job; returns False if the lease was lost"""
+        with self.lock:
+            self.reclaim_expired()
+            lease = self.leases.get(job_id)
+            if lease is None or lease[0] != worker:
+                return False
+            self.leases[job_id] = (worker, self.clock() + self.lease_seconds)
+            return True
+
+    def complete(self, job_id, worker, result):
+        """Records a job's result; returns False if the job was already done"""
+        with self.lock:
+            if job_id in self.results or not 0 <= job_id < len(self.paths):
+                return False
+            self.results[job_id] = result
+            self.leases.pop(job_id, None)
+            if job_id in self.queue:
+                self.queue.remove(job_id)
+            if len(self.results) == len(self.paths):
+                self.finished.set()
+
+        if self.on_result:
+            self.on_result(self.paths[job_id], result)
+        return True
+
+    def status(self):
+        """Returns job counts by state"""
+        with self.lock:
+            return {
+                "total": len(self.paths),
+                "queued": len(self.queue),
+                "leased": len(self.leases),
+                "finished": len(self.results)
+            }
+
+class CoordinatorHandler(BaseHTTPRequestHandler):
+    """JSON endpoints: POST /lease, /heartbeat and /result; GET /status"""
+
+    def send_json(self, payload, status=200):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/status':
+            self.send_json(self.server.jobs.status())
+        else:
+            self.send_json({"error": "Not found"}, 404)
+
+    def do_POST(self):
+        jobs = self.server.jobs
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length) or b'{}')
+            worker = str(request["worker"])
+
+            if self.path == '/lease':
+                job = jobs.lease(worker)
+                self.send_json({
+                    "job": {"id": job[0], "path": job[1]} if job else None,
+                    "done": jobs.finished.is_set(),
+                    "lease_seconds": jobs.lease_seconds
+                })
+            elif self.path == '/heartbeat':
+                self.send_json({"ok": jobs.heartbeat(int(request["job"]), worker)})
+            elif self.path == '/result':
+                result = request["result"]
+                result = {"success": bool(result["success"]), "message": str(result["message"]),
+                          **({"skipped": True} if result.get("skipped") else {})}
+                self.send_json({"ok": jobs.complete(int(request["job"]), worker, result)})
+            else:
+                self.send_json({"error": "Not found"}, 404)
+        except (KeyError, TypeError, ValueError) as e:
+            self.send_json({"error": f"Bad request: {e}"}, 400)
+
+    def log_message(self, format, *args):
+        # Requests are too frequent to log
+        pass
+
+class Coordinator:
+    """Serves a JobQueue over HTTP from a background thread"""
+
+    def __init__(self, jobs, host='127.0.0.1', port=0):
+        self.jobs = jobs
+        self.server = ThreadingHTTPServer((host, port), CoordinatorHandler)
+        self.server.daemon_threads = True
+        self.server.jobs = jobs
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        if host in ('0.0.0.0', '::'):
+            host = socket.gethostname()
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def post_json(url, path, payload):
+    """POSTs a JSON payload to the coordinator and returns the decoded reply"""
+    request = urllib.request.Request(
+        url.rstrip('/') + path,
+        data=json.dumps(payload).encode('utf-8'),
+        headers={'Content-Type': 'application/json'}
+    )
+    with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+        return json.loads(response.read())
+
+def run_worker(url, downloader, worker=None, cancel=None, on_result=None):
+    """Leases and downloads jobs from a coordinator until none are left
+
+    Heartbeats are sent three times per lease period while a download
+    runs. If the coordinator reports the lease lost, the download is
+    cancelled and its result dropped. Cancelling the optional CancelToken
+    stops the worker; its job is left to expire and be reassigned.
+    Returns the number of results reported.
+    """
+    worker = worker or f"{socket.gethostname()}-{os.getpid()}"
+    reported = 0
+
+    while cancel is None or not cancel.cancelled:
+        try:
+            reply = post_json(url, '/lease', {"worker": worker})
+        except OSError:
+            # The coordinator shuts down once every job is done
+            break
+
+        job = reply.get("job")
+        if job is None:
+            if reply.get("done"):
+                break
+            if cancel is not None:
+                cancel.wait(POLL_INTERVAL)
+            else:
+                time.sleep(POLL_INTERVAL)
+            continue
+
+        job_cancel = CancelToken()
+        outcome = {}
+        thread = threading.Thread(
+            target=lambda: outcome.update(result=downloader.download_result(job["path"], job_cancel))
+        )
+
+        with cancel.on_cancel(job_cancel.cancel) if cancel else nullcontext():
+            thread.start()
+            interval = max(0.1, reply.get("lease_seconds", DEFAULT_LEASE_SECONDS) / 3)
+            while True:
+                thread.join(interval)
+                if not thread.is_alive():
+                    break
+                try:
+                    if not post_json(url, '/heartbeat', {"worker": worker, "job": job["id"]})["ok"]:
+                        job_cancel.cancel()
+                except OSError:
+                    # A missed heartbeat only shortens the lease
+                    pass
+
+        if job_cancel.cancelled:
+            continue
+
+        try:
+            post_json(url, '/result', {"worker": worker, "job": job["id"], "result": outcome["result"]})
+        except OSError:
+            continue
+        reported += 1
+        if on_result:
+            on_result(job["path"], outcome["result"])
+
+    return reported
@@ -1,82 +1,638 @@
+import asyncio
+import hashlib
+import logging
 import os
-import subprocess
-import time
+import threading
+from concurrent.futures import FIRST_COMPLETED, wait
+from contextlib import nullcontext
+from itertools import groupby
 from pathlib import Path
 from .config import Config
-from .utils import is_video_file, get_unique_subtitle_path
+from .utils import is_video_file
+from .encoding import normalize_to_utf8
+from .cpu import CPUPool, check_subtitle
+from .download import atomic_write, iter_chunks
+from .subtitles import parse_subtitle, validate_cues
+from .probe import duration_mismatch, has_embedded_subtitle, probe_video
+from .scanner import ScanTree, list_directory, scan_folder
+from .cache import file_key, get_cache_dir
+from .hashing import hash_files, opensubtitles_hash
+from .iosched import ROTATIONAL, SOLID_STATE, UNKNOWN, IOScheduler
+from .cancel import CancelToken, Cancelled
+from .priority import BULK, INTERACTIVE, PriorityExecutor, RateLimiter, running_as
+from .singleflight import LockFile, SingleFlight, sweep_locks
+from .progress import DOWNLOADING, HASHING, SEARCHING, WRITING, ProgressReporter
+from .providers import (
+    close_sessions,
+    download_to_file,
+    open_pool,
+    provider_errors,
+    rank_subtitles,
+    scan_video,
+    to_language
+)
+from .season import (
+    episode_selector,
+    group_by_season,
+    match_episodes,
+    save_parse_cache,
+    search_season,
+    sibling_episodes,
+    warm_parse_cache
+)
+
+logger = logging.getLogger(__name__)
+
+# Marks a lock file result written by a background prefetch
+PREFETCHED = "prefetched"
+
+LANGUAGE_NAMES = {
+    "pt-br": "Portuguese",
+    "pt": "Portuguese",
+    "en": "English",
+    "es": "Spanish",
+    "fr": "French",
+    "it": "Italian",
+    "de": "German"
+}
+
+def language_name(language):
+    """Returns a human readable name for a language code"""
+    return LANGUAGE_NAMES.get(language.lower(), language)
 
 class SubtitleDownloader:
     def __init__(self, config_file=None):
         self.config = Config(config_file)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self.flights = SingleFlight()
+        # CPU-bound subtitle stages get their own pool, sized apart from downloads
+        self.cpu = CPUPool(self.config.get("cpu_workers", 0))
+        # Hashing and probing share per-device read limits across threads
+        self.io = IOScheduler({
+            ROTATIONAL: self.config.get("io_limit_rotational", 1),
+            SOLID_STATE: self.config.get("io_limit_ssd", 8),
+            UNKNOWN: self.config.get("io_limit_other", 4)
+        })
+        # Provider requests from every job draw on one budget, urgent jobs first
+        self.limiter = RateLimiter(
+            self.config.get("provider_rate_limit", 0),
+            self.config.get("provider_burst", 5),
+            self.config.get("priority_aging_seconds", 30)
+        )
     
-    def rename_subtitle_file(self, video_path, language):
-        """Renames the subtitle file to match video name"""
-        video_dir = Path(video_path).parent
-        current_time = time.time()
-        
-        for file in video_dir.iterdir():
-            if file.suffix.lower() == '.srt':
-                file_time = file.stat().st_mtime
-                if current_time - file_time < 60:
-                    new_path = get_unique_subtitle_path(video_path, language)
-                    file.rename(new_path)
-                    return new_path.name
-        return None
+    def get_languages(self):
+        """Returns the configured language chain, preferred language first"""
+        languages = [self.config.get("default_language", "pt-br")]
+        fallback = self.config.get("fallback_language")
+        if fallback and fallback not in languages:
+            languages.append(fallback)
+        return languages
+    
+    def postprocess_subtitle(self, subtitle_path, language, video_path=None):
+        """Runs post-download stages on a written subtitle
+        
+        Returns False if the subtitle should be discarded.
+        """
+        normalize = self.config.get("normalize_encoding", True)
+        validate = self.config.get("validate_subtitles", True)
+        check_duration = video_path is not None and self.config.get("check_duration", True)
+        
+        if self.cpu.workers:
+            # Decoding and parsing run in a worker process; only bytes cross over
+            try:
+                with open(subtitle_path, 'rb') as f:
+                    data = f.read()
+                converted, valid, _, last_end = self.cpu.run(
+                    check_subtitle, data, os.path.basename(subtitle_path), language, normalize, validate or check_duration
+                )
+            except (OSError, ValueError):
+                return False
+            if converted is not None:
+                atomic_write(subtitle_path, iter_chunks(converted))
+        else:
+            if normalize:
+                normalize_to_utf8(subtitle_path, language)
+            if not (validate or check_duration):
+                return True
+            
+            try:
+                cues = parse_subtitle(subtitle_path)
+            except (OSError, ValueError):
+                return False
+            valid = not validate or validate_cues(cues)[0]
+            last_end = cues.last_end
+        
+        if validate and not valid:
+            return False
+        
+        if check_duration:
+            with self.io.slot(video_path):
+                info = probe_video(video_path)
+            if info and duration_mismatch(last_end, info["duration_ms"]):
+                return False
+        return True
 
-    def download_subtitles(self, file_path, language):
-        """Executes subtitle download for specific language"""
-        cmd = [
-            "python3", "-m", "subliminal", 
-            "download", 
-            "-l", language,
-            "--provider", "opensubtitles",
-            "--verbose",
-            file_path
-        ]
+    def download_candidate(self, pool, subtitle, file_path, language, select=None, reporter=None):
+        """Downloads one candidate subtitle and post-processes it
+        
+        Returns the subtitle path, or None if the download failed or the
+        subtitle was rejected and removed.
+        """
+        reporter = reporter or ProgressReporter(file_path)
+        provider_name = getattr(subtitle, 'provider_name', 'provider')
+        message = f"Downloading from {provider_name}..."
+        reporter.emit(DOWNLOADING, message)
+        self.limiter.acquire(cancel=reporter.cancel)
         
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-            return result
-        except subprocess.TimeoutExpired:
+            subtitle_path = download_to_file(
+                pool, subtitle, file_path, language, select,
+                on_progress=reporter.bytes_callback(message)
+            )
+        except Cancelled:
+            raise
+        except Exception:
+            # An HTTP error or broken archive only rules out this candidate,
+            # unless it came from closing the sessions on cancel
+            if reporter.cancel is not None:
+                reporter.cancel.check()
             return None
-        except Exception as e:
+        if subtitle_path is None:
             return None
+        
+        try:
+            reporter.emit(WRITING, f"Checking {subtitle_path.name}...")
+            if self.postprocess_subtitle(subtitle_path, language, file_path):
+                return subtitle_path
+        except Cancelled:
+            subtitle_path.unlink()
+            raise
+        subtitle_path.unlink()
+        return None
+
+    def download_subtitles(self, pool, video, file_path, language, reporter=None):
+        """Downloads the best subtitle for one language
+        
+        Returns the path of the written subtitle or None if no candidate
+        could be downloaded.
+        """
+        reporter = reporter or ProgressReporter(file_path)
+        reporter.emit(SEARCHING, f"Searching for {language_name(language)} subtitles...")
+        self.limiter.acquire(cancel=reporter.cancel)
+        subtitles = pool.list_subtitles(video, {to_language(language)})
+        reporter.emit(SEARCHING, f"Found {len(subtitles)} {language_name(language)} candidates", len(subtitles), len(subtitles))
+        
+        for subtitle in rank_subtitles(subtitles, video):
+            subtitle_path = self.download_candidate(pool, subtitle, file_path, language, reporter=reporter)
+            if subtitle_path:
+                return subtitle_path
+        return None
 
-    def download_for_file(self, file_path):
-        """Main method to download subtitles for a file"""
+    def download_for_file(self, file_path, progress=None, cancel=None, prefetch=False):
+        """Main method to download subtitles for a file
+        
+        progress, if given, is called with a ProgressEvent for each phase.
+        cancel is an optional CancelToken; cancelling it aborts the search or
+        download in flight and closes the provider sessions. With
+        coalesce_downloads, concurrent requests for the same video and
+        languages, in this process or others, share one search and download.
+        prefetch marks a background download ahead of the user; the first
+        request for that video afterwards reuses its result.
+        """
         if not is_video_file(file_path):
             return False, "Invalid video file"
         
         if not os.path.exists(file_path):
             return False, "File not found"
         
-        # Try Portuguese first
-        result_ptbr = self.download_subtitles(file_path, "pt-br")
+        if cancel is not None and cancel.cancelled:
+            return False, "Cancelled"
         
-        if result_ptbr and result_ptbr.returncode == 0 and ("Downloaded" in result_ptbr.stdout or "1 subtitle downloaded" in result_ptbr.stdout):
-            renamed_file = self.rename_subtitle_file(file_path, "pt-br")
-            return True, f"Portuguese subtitle downloaded: {renamed_file if renamed_file else 'file.srt'}"
-        else:
-            # Try English
-            result_en = self.download_subtitles(file_path, "en")
-            
-            if result_en and result_en.returncode == 0 and ("Downloaded" in result_en.stdout or "1 subtitle downloaded" in result_en.stdout):
-                renamed_file = self.rename_subtitle_file(file_path, "en")
-                return True, f"English subtitle downloaded: {renamed_file if renamed_file else 'file.srt'}"
-            else:
-                return False, "No subtitles found in any language"
+        if prefetch and self.has_subtitle(file_path):
+            return True, "Subtitle already present"
+        
+        key = self.flight_key(file_path) if self.config.get("coalesce_downloads", True) else None
+        if key is None:
+            return self.fetch_for_file(file_path, progress, cancel)
+        
+        while True:
+            try:
+                result, shared = self.flights.run(key, lambda: self.fetch_locked(key, file_path, progress, cancel, prefetch), cancel)
+            except Cancelled:
+                return False, "Cancelled"
+            # Callers that joined a cancelled request try again on their own
+            if not (shared and result == (False, "Cancelled")) or (cancel is not None and cancel.cancelled):
+                return result
+    
+    def flight_key(self, file_path):
+        """Identifies requests for the same video and language chain; None if unreadable
+        
+        The path is part of the key: a copy of the video elsewhere needs its
+        own subtitle file.
+        """
+        try:
+            with self.io.slot(file_path):
+                video_hash = opensubtitles_hash(file_path)
+            return (os.path.realpath(file_path), video_hash or file_key(file_path), tuple(self.get_languages()))
+        except OSError:
+            return None
+    
+    def fetch_locked(self, key, file_path, progress=None, cancel=None, prefetch=False):
+        """Runs fetch_for_file under the video's lock file, shared with other processes
+        
+        A process that had to wait for the lock returns the result the
+        holder recorded instead of searching again, and so does the first
+        request for a video a prefetch already got a subtitle for. Lock
+        files left unused for a day are swept away first.
+        """
+        lock_dir = get_cache_dir() / "locks"
+        sweep_locks(str(lock_dir))
+        lock_name = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        try:
+            with LockFile(str(lock_dir / f"{lock_name}.lock"), cancel) as lock:
+                previous = lock.read_result()
+                if previous and previous[1] != "Cancelled":
+                    # Keep the record for the processes still waiting behind this one
+                    lock.write_result(previous)
+                    return tuple(previous[:2])
+                
+                if prefetch and self.has_subtitle(file_path):
+                    return True, "Subtitle already present"
+                
+                recorded = lock.previous
+                if not prefetch and recorded and recorded[0] and recorded[2:] == [PREFETCHED] and self.has_subtitle(file_path):
+                    lock.write_result(recorded[:2])
+                    return tuple(recorded[:2])
+                
+                result = self.fetch_for_file(file_path, progress, cancel)
+                lock.write_result(list(result) + [PREFETCHED] if prefetch else result)
+                return result
+        except Cancelled:
+            return False, "Cancelled"
+    
+    def fetch_for_file(self, file_path, progress=None, cancel=None):
+        """Searches and downloads subtitles for a video, preferred language first"""
+        reporter = ProgressReporter(file_path, progress, cancel)
+        try:
+            with open_pool(self.config) as pool:
+                abort = cancel.on_cancel(lambda: close_sessions(pool)) if cancel else nullcontext()
+                with abort:
+                    reporter.emit(HASHING, "Hashing video...")
+                    with self.io.slot(file_path):
+                        video = scan_video(file_path)
+                    
+                    # Try the preferred language first, then the fallback
+                    for language in self.get_languages():
+                        subtitle_path = self.download_subtitles(pool, video, file_path, language, reporter)
+                        if subtitle_path:
+                            return True, f"{language_name(language)} subtitle downloaded: {subtitle_path.name}"
+        except Cancelled:
+            return False, "Cancelled"
+        except Exception as e:
+            if cancel is not None and cancel.cancelled:
+                return False, "Cancelled"
+            return False, f"Download failed: {e}"
+        
+        return False, "No subtitles found in any language"
+    
+    def has_subtitle(self, file_path):
+        """Returns True if a subtitle in one of the configured languages sits next to the video"""
+        stem = os.path.splitext(file_path)[0]
+        return any(os.path.exists(f"{stem}.{language}.srt") for language in self.get_languages())
+    
+    def prefetch_candidates(self, file_path):
+        """Returns the episodes likely to be asked for after file_path
+        
+        These are videos in the same folder from the same series and season
+        that have no subtitle yet, next episodes first, at most
+        prefetch_limit of them.
+        """
+        file_path = os.path.abspath(file_path)
+        folder = os.path.dirname(file_path)
+        try:
+            _, names = list_directory(folder, is_video_file)
+        except OSError:
+            return []
+        
+        siblings = sibling_episodes(file_path, [os.path.join(folder, name) for name in names])
+        pending = [path for path in siblings if not self.has_subtitle(path)]
+        return pending[:max(0, int(self.config.get("prefetch_limit", 4)))]
+    
+    def prefetch_siblings(self, file_path, cancel=None):
+        """Queues bulk downloads for prefetch_candidates(file_path); returns their futures
+        
+        Each future resolves to a (success, message) tuple.
+        """
+        executor = self.executor()
+        return [
+            executor.submit_as(BULK, self.download_for_file, path, None, cancel, True)
+            for path in self.prefetch_candidates(file_path)
+        ]
 
-    def batch_download(self, folder_path):
-        """Downloads subtitles for all video files in a folder"""
+    def embedded_result(self, file_path):
+        """Returns a skipped result if the video embeds the preferred language, else None
+        
+        A video that can't be probed counts as not embedding it.
+        """
+        language = self.get_languages()[0]
+        try:
+            with self.io.slot(file_path):
+                embedded = has_embedded_subtitle(file_path, language)
+        except Exception:
+            embedded = False
+        if not embedded:
+            return None
+        
+        return {
+            "success": True,
+            "skipped": True,
+            "message": f"{language_name(language)} subtitle already embedded"
+        }
+    
+    def download_result(self, file_path, cancel=None, check_embedded=True):
+        """Downloads subtitles for one file of a batch and returns its result dict
+        
+        Files that embed the preferred language are skipped when skip_embedded
+        and check_embedded are set; unexpected errors become failed results.
+        """
+        try:
+            if check_embedded and self.config.get("skip_embedded", True) and is_video_file(file_path):
+                skipped = self.embedded_result(file_path)
+                if skipped:
+                    return skipped
+            success, message = self.download_for_file(file_path, cancel=cancel)
+        except Exception as e:
+            success, message = False, f"Unexpected error: {e}"
+        return {"success": success, "message": message}
+    
+    def download_stream(self, file_paths, jobs=1, cancel=None):
+        """Downloads subtitles for an iterable of files, yielding results as they finish
+        
+        Yields (file_path, result) pairs in completion order. file_paths is
+        consumed lazily and at most twice jobs files are in flight, the extra
+        ones queued so workers don't idle while a result is consumed; memory
+        stays bounded however long the input is. Files run as bulk jobs on the
+        shared executor(), grown to at least jobs workers. Cancelling the
+        optional CancelToken stops reading input; files in flight end as
+        cancelled.
+        """
+        jobs = max(1, int(jobs))
+        executor = self.executor(jobs)
+        paths = iter(file_paths)
+        pending = {}
+        try:
+            while True:
+                while len(pending) < jobs * 2 and not (cancel is not None and cancel.cancelled):
+                    file_path = next(paths, None)
+                    if file_path is None:
+                        break
+                    pending[executor.submit_as(BULK, self.download_result, file_path, cancel)] = file_path
+                
+                if not pending:
+                    break
+                
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+    
+    def executor(self, workers=None):
+        """Returns the download pool every caller shares, sized by download_workers
+        
+        Queued jobs run by priority class. workers grows the pool to at least
+        that many threads, e.g. for a batch started with more jobs.
+        """
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = PriorityExecutor(
+                    self.config.get("download_workers", 3),
+                    self.config.get("priority_aging_seconds", 30),
+                    thread_name_prefix="subtitle-download"
+                )
+            if workers:
+                self._executor.ensure_workers(workers)
+            return self._executor
+    
+    async def download_for_file_async(self, file_path, progress=None, cancel=None, priority=INTERACTIVE):
+        """Async variant of download_for_file for asyncio applications
+        
+        Providers make blocking HTTP calls, so the download runs on the shared
+        executor(); any number of pending calls cost a coroutine each and at
+        most download_workers threads. progress events are delivered on the
+        event loop thread. Cancelling the awaiting task, or the optional
+        CancelToken, aborts the download. priority is the job's class, see
+        subtitle_downloader.priority.
+        """
+        loop = asyncio.get_running_loop()
+        token = CancelToken()
+        if progress is not None:
+            callback = progress
+            progress = lambda event: loop.call_soon_threadsafe(callback, event)
+        
+        with cancel.on_cancel(token.cancel) if cancel else nullcontext():
+            try:
+                return await asyncio.wrap_future(
+                    self.executor().submit_as(priority, self.download_for_file, file_path, progress, token)
+                )
+            except asyncio.CancelledError:
+                token.cancel()
+                raise
+    
+    async def download_many_async(self, file_paths, jobs=None, cancel=None, priority=BULK):
+        """Async iterator of (file_path, result) pairs for many files, in completion order
+        
+        file_paths is consumed lazily with at most jobs files in flight
+        (default: download_workers). Results are dicts like batch_download's.
+        Closing the iterator early or cancelling the task aborts the
+        downloads in flight. Files run as bulk jobs unless priority says
+        otherwise.
+        """
+        jobs = max(1, int(jobs or self.config.get("download_workers", 3)))
+        token = CancelToken()
+        paths = iter(file_paths)
+        pending = {}
+        
+        with cancel.on_cancel(token.cancel) if cancel else nullcontext():
+            try:
+                while True:
+                    while len(pending) < jobs and not token.cancelled:
+                        file_path = next(paths, None)
+                        if file_path is None:
+                            break
+                        future = asyncio.wrap_future(self.executor().submit_as(priority, self.download_result, file_path, token))
+                        pending[future] = file_path
+                    
+                    if not pending:
+                        break
+                    
+                    done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for future in done:
+                        yield pending.pop(future), future.result()
+            finally:
+                if pending:
+                    token.cancel()
+                    for future in pending:
+                        future.cancel()
+    
+    def download_season(self, title, season, episodes, cancel=None):
+        """Downloads subtitles for several episodes of one season
+        
+        Issues one season-scoped query per language and provider and matches
+        the results to episodes locally. Returns results for the episodes that
+        got a subtitle; the others are left for per-file searches.
+        """
         results = {}
-        folder = Path(folder_path)
+        pending = list(episodes)
         
-        if not folder.is_dir():
-            return {"error": "Invalid folder path"}
+        try:
+            with open_pool(self.config) as pool:
+                abort = cancel.on_cancel(lambda: close_sessions(pool)) if cancel else nullcontext()
+                with abort:
+                    for language in self.get_languages():
+                        for provider_name in pool.providers:
+                            if not pending:
+                                return results
+                            if cancel is not None:
+                                cancel.check()
+                            
+                            self.limiter.acquire(cancel=cancel)
+                            try:
+                                subtitles = search_season(pool[provider_name], title, season, [to_language(language)])
+                            except provider_errors() as e:
+                                logger.warning("Season search on %s for %s season %s failed: %s", provider_name, title, season, e)
+                                continue
+                            if subtitles is None:
+                                continue
+                            
+                            episode_numbers = {file_path: info["episode"] for file_path, info in pending}
+                            for file_path, candidates in match_episodes(subtitles, pending).items():
+                                # Season packs hold every episode; extract the matching one
+                                select = episode_selector(episode_numbers[file_path])
+                                for subtitle in candidates:
+                                    reporter = ProgressReporter(file_path, cancel=cancel)
+                                    subtitle_path = self.download_candidate(pool, subtitle, file_path, language, select, reporter)
+                                    if subtitle_path:
+                                        results[file_path] = {
+                                            "success": True,
+                                            "message": f"{language_name(language)} subtitle downloaded: {subtitle_path.name}"
+                                        }
+                                        break
+                            
+                            pending = [episode for episode in pending if episode[0] not in results]
+        except Cancelled:
+            # Cancelled episodes end in the per-file searches
+            pass
+        except provider_errors() as e:
+            # Unmatched episodes fall back to per-file searches
+            logger.warning("Season download for %s season %s failed: %s", title, season, e)
+        
+        return results
+
+    def iter_videos(self, folder_path, recursive=False):
+        """Yields the video files in a folder, one folder's files at a time
+        
+        With incremental_scan enabled, folders unchanged since the last scan
+        are not listed again, and every full_rescan_days the whole tree is.
+        The scan tree is saved once every file has been yielded.
+        """
+        if not self.config.get("incremental_scan", True):
+            yield from scan_folder(folder_path, is_video_file, recursive)
+            return
+        
+        tree = ScanTree(full_rescan_interval=self.config.get("full_rescan_days", 7) * 24 * 3600)
+        tree.load()
+        yield from scan_folder(folder_path, is_video_file, recursive, tree)
+        tree.save()
+
+    def find_videos(self, folder_path, recursive=False):
+        """Returns the video files in a folder as a list"""
+        return list(self.iter_videos(folder_path, recursive))
+        
+    def batch_stream(self, folder_path, cancel=None, jobs=1, recursive=False, skip=None):
+        """Downloads subtitles for all video files in a folder, yielding results as they finish
+        
+        Yields (file_path, result) pairs. Folders are processed one at a time:
+        embedded-subtitle skips and season matches are yielded first, then the
+        remaining files run as bulk jobs on the shared executor(), at most jobs
+        at a time. Only the current folder's paths and the files in flight are
+        held, so memory doesn't grow with the library size.
+        
+        skip, if given, is called with each path and excludes the files it
+        returns True for, e.g. ones a previous run already finished.
+        Cancelling the optional CancelToken stops after the files in flight.
+        """
+        jobs = max(1, int(jobs))
+        persist_cache = self.config.get("persist_parse_cache", True)
+        warm_parse_cache(persist_cache)
         
-        for file_path in folder.iterdir():
-            if is_video_file(file_path):
-                success, message = self.download_for_file(str(file_path))
-                results[str(file_path)] = {"success": success, "message": message}
+        videos = self.iter_videos(folder_path, recursive)
+        if skip is not None:
+            videos = (file_path for file_path in videos if not skip(file_path))
+        
+        executor = self.executor(jobs)
+        pending = {}
+        
+        def collect(limit):
+            # Yields finished downloads until at most limit are in flight
+            while len(pending) > limit:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
+        
+        try:
+            for _, files in groupby(videos, key=os.path.dirname):
+                if cancel is not None and cancel.cancelled:
+                    break
+        
+                others = []
+                for file_path in files:
+                    skipped = self.config.get("skip_embedded", True) and self.embedded_result(file_path)
+                    if skipped:
+                        yield file_path, skipped
+                    else:
+                        others.append(file_path)
+        
+                groups, others = group_by_season(others, self.config.get("season_batch_min_episodes", 2))
+                
+                # Episodes of the same season share one query per language
+                for (_, season), episodes in groups.items():
+                    if cancel is not None and cancel.cancelled:
+                        break
+                    with running_as(BULK):
+                        matched = self.download_season(episodes[0][1]["title"], season, episodes, cancel)
+                    yield from matched.items()
+                    others.extend(file_path for file_path, _ in episodes if file_path not in matched)
+                
+                # Hash the folder's remaining files in parallel; each download
+                # then finds its hash cached
+                if others:
+                    hash_files(others, self.config.get("hash_workers", 8), self.io)
+                
+                for file_path in others:
+                    if cancel is not None and cancel.cancelled:
+                        break
+                    yield from collect(jobs - 1)
+                    pending[executor.submit_as(BULK, self.download_result, file_path, cancel, False)] = file_path
+            
+            yield from collect(0)
+        finally:
+            for future in pending:
+                future.cancel()
+        
+        if persist_cache:
+            save_parse_cache()
+        
+    def batch_download(self, folder_path, cancel=None, jobs=1, recursive=False):
+        """Downloads subtitles for all video files in a folder
+        
+        Collects batch_stream() into a dict mapping each file to its result.
+        Cancelling the optional CancelToken stops after the files in flight;
+        files not reached yet are left out of the results.
+        """
+        if not Path(folder_path).is_dir():
+            return {"error": "Invalid folder path"}
         
-        return results # Core functionality will be implemented here
+        return dict(self.batch_stream(folder_path, cancel, jobs, recursive))
@@ -0,0 +1,93 @@
+"""
+Process pool for CPU-bound subtitle stages
+
+Encoding detection, parsing, validation and retiming are pure Python and
+hold the GIL, so on a busy many-core machine they slow down the threads
+doing network and file I/O. CPUPool runs them in worker processes
+instead, sized by cpu_workers independently of the download threads.
+Stages take and return bytes and small tuples, never paths or parsed
+cues, so what crosses the process boundary stays compact and all file
+I/O stays on the calling thread.
+"""
+
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .encoding import cached_detect_encoding
+from .subtitles import parse_subtitle_data, validate_cues
+
+def check_subtitle(data, name, language=None, normalize=True, parse=True):
+    """Normalizes, parses and validates downloaded subtitle bytes
+
+    Returns (utf8_data, valid, message, last_end). utf8_data is None when
+    the content already is plain UTF-8 or ASCII and needs no rewrite.
+    Without parse, valid is True and last_end 0.
+    """
+    converted = None
+    if normalize:
+        encoding = cached_detect_encoding(data, language)
+        if encoding not in ('ascii', 'utf-8'):
+            converted = data = data.decode(encoding, errors='replace').encode('utf-8')
+
+    if not parse:
+        return converted, True, "", 0
+
+    cues = parse_subtitle_data(data, name)
+    valid, message = validate_cues(cues)
+    return converted, valid, message, cues.last_end
+
+class CPUPool:
+    """Runs CPU-bound stages in worker processes
+
+    With 0 workers stages run in the calling thread, which is cheapest for
+    a single file. The pool starts on first use; workers are spawned
+    rather than forked, since engine threads may hold locks at fork time.
+    """
+
+    def __init__(self, workers=0):
+        self.workers = max(0, int(workers or 0))
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def executor(self):
+        """Returns the process pool, starting it if needed"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def submit(self, fn, *args):
+        """Returns a Future for fn(*args); fn and args must be picklable"""
+        if not self.workers:
+            future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        return self.executor().submit(fn, *args)
+
+    def run(self, fn, *args):
+        """Runs fn(*args) in a worker process and returns its result
+
+        If the pool broke, e.g. a worker was killed, the stage runs in the
+        calling thread and a fresh pool starts on the next call.
+        """
+        try:
+            return self.submit(fn, *args).result()
+        except BrokenProcessPool:
+            with self._lock:
+                self._executor = None
+            return fn(*args)
+
+    def shutdown(self):
+        """Stops the worker processes"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
@@ -0,0 +1,273 @@
+"""
+Streaming download and decompression of subtitle files
+"""
+
+import os
+import struct
+import tempfile
+import zlib
+from pathlib import Path
+
+CHUNK_SIZE = 64 * 1024
+
+SUBTITLE_EXTENSIONS = ('.srt', '.ass', '.ssa', '.sub', '.vtt')
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZIP_MAGIC = b'PK\x03\x04'
+ZIP_CENTRAL_DIRECTORY = b'PK\x01\x02'
+ZIP_END_OF_ARCHIVE = b'PK\x05\x06'
+ZIP_DATA_DESCRIPTOR = b'PK\x07\x08'
+
+ZIP_HEADER = struct.Struct('<4sHHHHHIIIHH')
+
+# Returned by a member filter to take a member only if it is the archive's only subtitle
+SOLE_SUBTITLE = 'sole'
+
+# A member held back until the archive ends stays in memory up to this size
+SPOOL_MEMORY = 1024 * 1024
+
+def is_subtitle_name(name):
+    """Checks if an archive member looks like a subtitle file"""
+    return name.lower().endswith(SUBTITLE_EXTENSIONS)
+
+def iter_chunks(data, chunk_size=CHUNK_SIZE):
+    """Splits an in-memory payload into chunks without copying it"""
+    view = memoryview(data)
+    for offset in range(0, len(view), chunk_size):
+        yield view[offset:offset + chunk_size]
+
+class StreamDecoder:
+    """Incrementally decodes plain, gzip, zlib or zip subtitle streams
+
+    Output is produced in pieces of at most chunk_size bytes and only a
+    single zip header is ever buffered, so memory stays bounded no matter
+    how large the subtitle or archive is. For zip archives the first member
+    accepted by select (by default any subtitle file) is extracted. A
+    member for which select returns SOLE_SUBTITLE is spooled aside and only
+    extracted if the archive turns out to hold no other subtitle.
+    """
+
+    def __init__(self, chunk_size=CHUNK_SIZE, select=None):
+        self.chunk_size = chunk_size
+        self.select = select or is_subtitle_name
+        self.mode = None
+        self.done = False
+        self._buffer = b''
+        self._inflater = None
+        # zip member state
+        self._zip_state = 'header'
+        self._member_selected = False
+        self._member_remaining = None
+        self._member_has_descriptor = False
+        self._found_member = False
+        self._member_spooled = False
+        self._spool = None
+        self._subtitle_count = 0
+
+    def feed(self, chunk):
+        """Decodes one network chunk; yields decoded pieces"""
+        if self.done or not chunk:
+            return
+
+        if self.mode is None:
+            self._buffer += bytes(chunk)
+            if len(self._buffer) < len(ZIP_MAGIC):
+                return
+            chunk, self._buffer = self._buffer, b''
+            self._detect(chunk)
+
+        if self.mode == 'plain':
+            yield from iter_chunks(chunk, self.chunk_size)
+        elif self.mode == 'zip':
+            yield from self._feed_zip(bytes(chunk))
+        else:
+            yield from self._inflate(chunk)
+
+    def finish(self):
+        """Flushes pending output and validates the stream ended cleanly"""
+        if self.mode is None and self._buffer:
+            # Payloads shorter than a magic number are plain text
+            data, self._buffer = self._buffer, b''
+            self.mode = 'plain'
+            yield data
+        elif self.mode is None:
+            raise ValueError("Empty subtitle stream")
+        elif self.mode == 'zip' and not self._found_member and self._spool is not None \
+                and self._subtitle_count == 1 and self.done:
+            self._found_member = True
+            yield from self._drain_spool()
+        elif self.mode == 'zip' and not self._found_member:
+            self._close_spool()
+            raise ValueError("No subtitle file found in archive")
+        elif self.mode != 'plain' and not self.done:
+            raise ValueError("Truncated compressed subtitle stream")
+
+    def _detect(self, head):
+        if head.startswith(GZIP_MAGIC):
+            self.mode = 'gzip'
+            self._inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif head.startswith(ZIP_MAGIC):
+            self.mode = 'zip'
+        elif head[0] == 0x78 and (head[0] << 8 | head[1]) % 31 == 0:
+            self.mode = 'zlib'
+            self._inflater = zlib.decompressobj()
+        else:
+            self.mode = 'plain'
+
+    def _inflate(self, data):
+        inflater = self._inflater
+        while data and not inflater.eof:
+            output = inflater.decompress(data, self.chunk_size)
+            if output:
+                yield output
+            data = inflater.unconsumed_tail
+        # Drain output held back by the max_length limit
+        while not inflater.eof:
+            output = inflater.decompress(b'', self.chunk_size)
+            if not output:
+                break
+            yield output
+        if inflater.eof and self.mode != 'zip':
+            self.done = True
+
+    def _feed_zip(self, data):
+        self._buffer += data
+        while self._buffer and not self.done:
+            if self._zip_state == 'header':
+                if not self._read_zip_header():
+                    return
+            elif self._zip_state == 'deflate':
+                data, self._buffer = self._buffer, b''
+                for output in self._inflate(data):
+                    if self._member_selected:
+                        yield output
+                    elif self._member_spooled:
+                        self._spool.write(output)
+                if not self._inflater.eof:
+                    return
+                self._buffer = self._inflater.unused_data
+                self._inflater = None
+                if self._member_has_descriptor and not self._member_selected:
+                    self._zip_state = 'descriptor'
+                else:
+                    self._end_member()
+            elif self._zip_state == 'stored':
+                size = min(self._member_remaining, len(self._buffer))
+                if self._member_selected:
+                    yield from iter_chunks(self._buffer[:size], self.chunk_size)
+                elif self._member_spooled:
+                    self._spool.write(self._buffer[:size])
+                self._buffer = self._buffer[size:]
+                self._member_remaining -= size
+                if self._member_remaining:
+                    return
+                self._end_member()
+            else:
+                # A central directory header always follows, so 16 bytes
+                # are enough to tell the optional descriptor signature apart
+                if len(self._buffer) < 16:
+                    return
+                size = 16 if self._buffer.startswith(ZIP_DATA_DESCRIPTOR) else 12
+                self._buffer = self._buffer[size:]
+                self._end_member()
+
+    def _read_zip_header(self):
+        signature = self._buffer[:4]
+        if len(signature) < 4:
+            return False
+        if signature in (ZIP_CENTRAL_DIRECTORY, ZIP_END_OF_ARCHIVE):
+            self.done = True
+            return False
+        if signature != ZIP_MAGIC:
+            raise ValueError("Corrupted zip archive")
+        if len(self._buffer) < ZIP_HEADER.size:
+            return False
+
+        fields = ZIP_HEADER.unpack_from(self._buffer)
+        flags, method, compressed_size = fields[2], fields[3], fields[7]
+        name_length, extra_length = fields[9], fields[10]
+        header_size = ZIP_HEADER.size + name_length + extra_length
+        if len(self._buffer) < header_size:
+            return False
+
+        name = self._buffer[ZIP_HEADER.size:ZIP_HEADER.size + name_length].decode('utf-8', 'replace')
+        self._buffer = self._buffer[header_size:]
+        self._member_has_descriptor = bool(flags & 0x08)
+        selected = self.select(name)
+        if is_subtitle_name(name):
+            self._subtitle_count += 1
+        self._member_spooled = selected == SOLE_SUBTITLE and self._spool is None
+        self._member_selected = not self._found_member and selected != SOLE_SUBTITLE and bool(selected)
+        self._found_member = self._found_member or self._member_selected
+        if self._member_spooled:
+            self._spool = tempfile.SpooledTemporaryFile(SPOOL_MEMORY)
+        elif self._member_selected:
+            self._close_spool()
+
+        if method == zlib.DEFLATED:
+            self._inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+            self._zip_state = 'deflate'
+        elif method == 0 and not self._member_has_descriptor:
+            self._member_remaining = compressed_size
+            self._zip_state = 'stored'
+        else:
+            raise ValueError(f"Unsupported zip compression method: {method}")
+        return True
+
+    def _end_member(self):
+        self._zip_state = 'header'
+        self._member_remaining = None
+        if self._member_selected:
+            # The wanted member is complete; the rest of the archive is irrelevant
+            self.done = True
+        self._member_spooled = False
+
+    def _drain_spool(self):
+        try:
+            self._spool.seek(0)
+            while True:
+                piece = self._spool.read(self.chunk_size)
+                if not piece:
+                    break
+                yield piece
+        finally:
+            self._close_spool()
+
+    def _close_spool(self):
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+
+def decode_stream(chunks, chunk_size=CHUNK_SIZE, select=None):
+    """Yields the decoded content of a (possibly compressed) chunk stream"""
+    decoder = StreamDecoder(chunk_size, select)
+    for chunk in chunks:
+        yield from decoder.feed(chunk)
+        if decoder.done:
+            break
+    yield from decoder.finish()
+
+def atomic_write(target, chunks):
+    """Writes chunks to target through a temp file beside it
+
+    The temp file is renamed over target once all chunks are written, so a
+    failed or interrupted write never leaves a partial file behind.
+    """
+    target = Path(target)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{target.name}.", suffix=".part", dir=target.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(tmp_path, target)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return target
+
+def stream_to_file(chunks, target, chunk_size=CHUNK_SIZE, select=None):
+    """Decodes a chunk stream into target through a temp file beside it"""
+    return atomic_write(target, decode_stream(chunks, chunk_size, select))
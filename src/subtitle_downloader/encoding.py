@@ -0,0 +1,143 @@
+"""
+Fast encoding detection and UTF-8 normalization of subtitle files
+"""
+
+import codecs
+import hashlib
+import re
+
+from .cache import MemoCache
+from .download import atomic_write, iter_chunks
+
+# Only this many bytes are inspected to pick an encoding
+SAMPLE_SIZE = 64 * 1024
+
+BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# Legacy encodings subtitles in each language usually come in, most likely first
+LANGUAGE_ENCODINGS = {
+    'pt': ['cp1252', 'iso-8859-1'],
+    'es': ['cp1252', 'iso-8859-1'],
+    'fr': ['cp1252', 'iso-8859-15'],
+    'it': ['cp1252', 'iso-8859-1'],
+    'de': ['cp1252', 'iso-8859-15'],
+    'en': ['cp1252'],
+    'pl': ['cp1250', 'iso-8859-2'],
+    'cs': ['cp1250', 'iso-8859-2'],
+    'hu': ['cp1250', 'iso-8859-2'],
+    'ro': ['cp1250', 'iso-8859-16'],
+    'ru': ['cp1251', 'koi8-r'],
+    'uk': ['cp1251', 'koi8-u'],
+    'bg': ['cp1251'],
+    'el': ['cp1253', 'iso-8859-7'],
+    'tr': ['cp1254', 'iso-8859-9'],
+    'he': ['cp1255', 'iso-8859-8'],
+    'ar': ['cp1256', 'iso-8859-6'],
+    'zh': ['gb18030', 'big5'],
+    'ja': ['shift_jis', 'euc_jp'],
+    'ko': ['cp949'],
+}
+
+NON_ASCII = re.compile(rb'[\x80-\xff]')
+# Control characters never appear in real subtitle text
+CONTROL_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]')
+
+_encoding_cache = MemoCache(4096)
+
+def content_hash(data):
+    """Returns a short digest identifying subtitle content"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def _sample(data):
+    """Returns a bounded sample starting at the first non-ASCII byte"""
+    match = NON_ASCII.search(data)
+    if match is None:
+        return None
+    start = max(match.start() - 64, 0)
+    return data[start:start + SAMPLE_SIZE]
+
+def _decodes_cleanly(sample, encoding):
+    """Checks if a sample is plausible text in the given encoding"""
+    try:
+        # Not final: the sample may end in the middle of a character
+        text = codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+    except (UnicodeDecodeError, LookupError):
+        return False
+    return CONTROL_CHARS.search(text) is None
+
+def _statistical_guess(sample):
+    """Falls back to a statistical detector when one is installed"""
+    try:
+        from charset_normalizer import from_bytes
+        best = from_bytes(sample).best()
+        if best is not None:
+            return best.encoding
+    except ImportError:
+        pass
+
+    try:
+        import chardet
+        encoding = chardet.detect(sample).get('encoding')
+        if encoding:
+            return encoding
+    except ImportError:
+        pass
+
+    return None
+
+def detect_encoding(data, language=None):
+    """Detects the encoding of subtitle content
+
+    Tries, in order: a byte order mark, UTF-8 validation, the legacy
+    encodings usual for the subtitle language and finally statistical
+    detection. Only a bounded sample of the content is decoded.
+    """
+    for bom, encoding in BOMS:
+        if data.startswith(bom):
+            return encoding
+
+    sample = _sample(data)
+    if sample is None:
+        return 'ascii'
+
+    if _decodes_cleanly(sample, 'utf-8'):
+        return 'utf-8'
+
+    base_language = (language or '').lower().split('-')[0]
+    for encoding in LANGUAGE_ENCODINGS.get(base_language, []):
+        if _decodes_cleanly(sample, encoding):
+            return encoding
+
+    return _statistical_guess(sample) or 'cp1252'
+
+def cached_detect_encoding(data, language=None):
+    """Detects the encoding, memoized by content hash and language"""
+    key = f"{content_hash(data)}:{language or ''}"
+    encoding = _encoding_cache.get(key)
+    if encoding is None:
+        encoding = detect_encoding(data, language)
+        _encoding_cache.put(key, encoding)
+    return encoding
+
+def normalize_to_utf8(subtitle_path, language=None):
+    """Rewrites a subtitle file as UTF-8 without BOM
+
+    Returns the detected source encoding. Files that already are plain
+    UTF-8 (or ASCII) are left untouched.
+    """
+    with open(subtitle_path, 'rb') as f:
+        data = f.read()
+
+    encoding = cached_detect_encoding(data, language)
+    if encoding in ('ascii', 'utf-8'):
+        return encoding
+
+    text = data.decode(encoding, errors='replace')
+    atomic_write(subtitle_path, iter_chunks(text.encode('utf-8')))
+    return encoding
@@ -101,7 +101,7 @@ def setup_thunar(project_dir):
     <icon>text-x-subtitle</icon>
     <name>Download Subtitle</name>
     <unique-id>1670954249879849-1</unique-id>
-    <command>download-subtitle.py %f</command>
+    <command>download-subtitle.py %F</command>
     <description>Download subtitle for video file</description>
     <patterns>*</patterns>
     <video-files/>
@@ -117,7 +117,7 @@ def setup_thunar(project_dir):
     <icon>text-x-subtitle</icon>
     <name>Download Subtitle</name>
     <unique-id>1670954249879849-1</unique-id>
-    <command>download-subtitle.py %f</command>
+    <command>download-subtitle.py %F</command>
     <description>Download subtitle for video file</description>
     <patterns>*</patterns>
     <video-files/>
@@ -143,7 +143,7 @@ Name=Download Subtitle
 Name[pt]=Baixar Legenda
 Name[en]=Download Subtitle
 Icon=text-x-subtitle
-Exec=download-subtitle.py %f
+Exec=download-subtitle.py %F
 """)
 
 def setup_pcmanfm(project_dir):
@@ -163,4 +163,5 @@ Profiles=profile-zero;
 [X-Action-Profile profile-zero]
 MimeTypes=video/x-msvideo;video/quicktime;video/mp4;video/x-matroska;video/x-ms-wmv;video/webm;video/x-flv;video/3gpp;video/x-m4v;video/mpeg;video/x-ms-asf;video/x-ogm;video/ogg;video/dv;video/x-matroska-3d;video/x-msvideo;video/x-theora;video/x-theora+ogg;video/x-wmv;video/x-ms-wvx;video/x-avi;
 Exec=download-subtitle.py %F
-SelectionCount=1
+SelectionCount=>0
+""")
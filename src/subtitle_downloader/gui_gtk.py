@@ -1,3 +1,4 @@
+import os
 import sys
 import time
 from pathlib import Path
@@ -5,43 +6,57 @@ import gi
 gi.require_version('Gtk', '3.0')
 from gi.repository import Gtk, Gdk, GLib, Pango
 
+from .cancel import CancelToken
 from .core import SubtitleDownloader
+from .prefetch import start_prefetch
+from .priority import INTERACTIVE
+from .progress import DOWNLOADING, CoalescingQueue, summarize_results
 from .utils import show_notification
 
+# Queued progress is applied to the widgets at most this often
+REDRAW_INTERVAL_MS = 100
+
+# Lines kept in the details view; older ones are removed
+LOG_MAX_LINES = 1000
+
 class DownloadThreadGtk:
-    def __init__(self, file_path, update_callback, progress_callback, finished_callback):
+    """Downloads one file on a worker thread, queueing its progress for the UI"""
+
+    def __init__(self, index, file_path, updates, downloader=None, cancel=None):
+        self.index = index
         self.file_path = file_path
-        self.update_callback = update_callback
-        self.progress_callback = progress_callback
-        self.finished_callback = finished_callback
-        self.downloader = SubtitleDownloader()
+        self.updates = updates
+        self.downloader = downloader or SubtitleDownloader()
+        self.cancel = cancel
+
+    def on_progress(self, event):
+        self.updates.put(self.index, ("progress", event.percent, event.message))
+        # Byte counts only update the row; phase changes are also logged
+        if event.phase != DOWNLOADING or not event.current:
+            self.updates.log((self.index, event.message))
 
     def run(self):
         try:
-            GLib.idle_add(self.progress_callback, 30, "Searching for Portuguese subtitles...")
-            GLib.idle_add(self.update_callback, "log", "🌎 Searching for Portuguese subtitles...")
-            
-            success, message = self.downloader.download_for_file(self.file_path)
-            
-            if success:
-                GLib.idle_add(self.progress_callback, 100, "Download completed!")
-                GLib.idle_add(self.update_callback, "log", f"✅ {message}")
-                GLib.idle_add(self.finished_callback, True, message)
-            else:
-                GLib.idle_add(self.progress_callback, 0, "No subtitles found")
-                GLib.idle_add(self.update_callback, "log", f"❌ {message}")
-                GLib.idle_add(self.finished_callback, False, message)
-                
+            success, message = self.downloader.download_for_file(self.file_path, self.on_progress, self.cancel)
         except Exception as e:
-            error_msg = f"❌ Unexpected error: {str(e)}"
-            GLib.idle_add(self.update_callback, "log", error_msg)
-            GLib.idle_add(self.finished_callback, False, error_msg)
+            success, message = False, f"Unexpected error: {str(e)}"
+
+        self.updates.log((self.index, f"{'✅' if success else '❌'} {message}"))
+        self.updates.put(self.index, ("finished", success, message))
 
 class SubtitleDownloaderWindowGtk:
-    def __init__(self, file_path):
-        self.file_path = file_path
-        self.file_name = Path(file_path).name
-        self.download_thread = None
+    COLUMN_FILE, COLUMN_STATUS, COLUMN_PROGRESS = range(3)
+    
+    def __init__(self, file_paths):
+        if isinstance(file_paths, (str, os.PathLike)):
+            file_paths = [file_paths]
+        self.file_paths = [str(file_path) for file_path in file_paths]
+        self.downloader = SubtitleDownloader()
+        self.futures = []
+        self.results = {}
+        self.updates = CoalescingQueue()
+        self.redraw_source = None
+        self.cancel_token = None
         self.create_ui()
 
     def create_ui(self):
@@ -49,9 +64,9 @@ class SubtitleDownloaderWindowGtk:
         self.window.set_default_size(600, 500)
         self.window.set_position(Gtk.WindowPosition.CENTER)
         self.window.set_border_width(10)
-        self.window.set_resizable(False)
+        self.window.set_resizable(len(self.file_paths) > 1)
         
-        self.window.connect("destroy", Gtk.main_quit)
+        self.window.connect("destroy", self.on_destroy)
         
         vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
         self.window.add(vbox)
@@ -63,18 +78,42 @@ class SubtitleDownloaderWindowGtk:
         header_frame.add(header_vbox)
         
         file_label = Gtk.Label()
-        file_label.set_markup(f"<b>File:</b> {self.file_name}")
+        if len(self.file_paths) == 1:
+            file_label.set_markup(f"<b>File:</b> {GLib.markup_escape_text(Path(self.file_paths[0]).name)}")
+        else:
+            file_label.set_markup(f"<b>Files:</b> {len(self.file_paths)} videos")
         file_label.set_halign(Gtk.Align.START)
         file_label.set_ellipsize(Pango.EllipsizeMode.MIDDLE)
         
         path_label = Gtk.Label()
-        path_label.set_text(f"Folder: {Path(self.file_path).parent}")
+        path_label.set_text(f"Folder: {os.path.commonpath([str(Path(p).parent) for p in self.file_paths])}")
         path_label.set_halign(Gtk.Align.START)
         path_label.set_ellipsize(Pango.EllipsizeMode.START)
         
         header_vbox.pack_start(file_label, False, False, 5)
         header_vbox.pack_start(path_label, False, False, 5)
         
+        # One row per file with its own status
+        files_frame = Gtk.Frame(label="Files")
+        self.file_store = Gtk.ListStore(str, str, int)
+        for file_path in self.file_paths:
+            self.file_store.append([Path(file_path).name, "Waiting", 0])
+        
+        file_view = Gtk.TreeView(model=self.file_store)
+        name_renderer = Gtk.CellRendererText()
+        name_renderer.set_property("ellipsize", Pango.EllipsizeMode.MIDDLE)
+        name_column = Gtk.TreeViewColumn("File", name_renderer, text=self.COLUMN_FILE)
+        name_column.set_expand(True)
+        file_view.append_column(name_column)
+        file_view.append_column(Gtk.TreeViewColumn("Status", Gtk.CellRendererText(), text=self.COLUMN_STATUS))
+        file_view.append_column(Gtk.TreeViewColumn("Progress", Gtk.CellRendererProgress(), value=self.COLUMN_PROGRESS))
+        
+        files_scrolled = Gtk.ScrolledWindow()
+        files_scrolled.set_policy(Gtk.PolicyType.AUTOMATIC, Gtk.PolicyType.AUTOMATIC)
+        files_scrolled.set_min_content_height(min(len(self.file_paths), 6) * 24 + 30)
+        files_scrolled.add(file_view)
+        files_frame.add(files_scrolled)
+        
         # Progress bar
         progress_frame = Gtk.Frame(label="Progress")
         progress_vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
@@ -104,6 +143,8 @@ class SubtitleDownloaderWindowGtk:
         self.log_text.set_editable(False)
         self.log_text.set_wrap_mode(Gtk.WrapMode.WORD)
         self.log_text.set_monospace(True)
+        log_buffer = self.log_text.get_buffer()
+        self.log_end = log_buffer.create_mark("log-end", log_buffer.get_end_iter(), False)
         
         scrolled.add(self.log_text)
         log_vbox.pack_start(scrolled, True, True, 0)
@@ -115,38 +156,45 @@ class SubtitleDownloaderWindowGtk:
         self.start_button = Gtk.Button.new_with_label("Start Download")
         self.start_button.connect("clicked", self.on_start_clicked)
         
+        self.cancel_button = Gtk.Button.new_with_label("Cancel")
+        self.cancel_button.connect("clicked", self.on_cancel_clicked)
+        self.cancel_button.set_sensitive(False)
+        
         self.close_button = Gtk.Button.new_with_label("Close")
         self.close_button.connect("clicked", self.on_close_clicked)
         
         button_box.pack_start(self.start_button, False, False, 0)
+        button_box.pack_start(self.cancel_button, False, False, 0)
         button_box.pack_start(self.close_button, False, False, 0)
         
         vbox.pack_start(header_frame, False, False, 0)
+        if len(self.file_paths) > 1:
+            vbox.pack_start(files_frame, True, True, 0)
         vbox.pack_start(progress_frame, False, False, 0)
         vbox.pack_start(log_frame, True, True, 0)
         vbox.pack_start(button_box, False, False, 0)
         
     def log_message(self, message):
+        self.log_messages([message])
+    
+    def log_messages(self, messages):
+        """Appends lines to the details view, keeping at most LOG_MAX_LINES"""
         text_buffer = self.log_text.get_buffer()
-        end_iter = text_buffer.get_end_iter()
         timestamp = time.strftime("%H:%M:%S")
-        formatted_message = f"[{timestamp}] {message}\n"
-        text_buffer.insert(end_iter, formatted_message)
+        formatted = "".join(f"[{timestamp}] {message}\n" for message in messages)
+        text_buffer.insert(text_buffer.get_end_iter(), formatted)
         
-        mark = text_buffer.create_mark(None, end_iter, True)
-        self.log_text.scroll_to_mark(mark, 0.0, True, 0.0, 0.0)
+        excess = text_buffer.get_line_count() - LOG_MAX_LINES
+        if excess > 0:
+            text_buffer.delete(text_buffer.get_start_iter(), text_buffer.get_iter_at_line(excess))
         
-        while Gtk.events_pending():
-            Gtk.main_iteration()
+        self.log_text.scroll_mark_onscreen(self.log_end)
     
     def update_progress(self, text, fraction=None):
         if fraction is not None:
             self.progress_bar.set_fraction(fraction / 100.0)
         self.progress_bar.set_text(text)
         self.status_label.set_text(text)
-        
-        while Gtk.events_pending():
-            Gtk.main_iteration()
     
     def show_message_dialog(self, message_type, title, message):
         dialog = Gtk.MessageDialog(
@@ -164,46 +212,123 @@ class SubtitleDownloaderWindowGtk:
         self.start_button.set_sensitive(False)
         self.start_download()
     
+    def on_cancel_clicked(self, button):
+        # Running downloads abort at their next step; queued ones end at once
+        self.cancel_button.set_sensitive(False)
+        self.update_progress("Cancelling...")
+        if self.cancel_token:
+            self.cancel_token.cancel()
+    
     def on_close_clicked(self, button):
         self.window.destroy()
     
-    def handle_update(self, update_type, message):
-        if update_type == "log":
-            self.log_message(message)
-        elif update_type == "progress":
-            percent, text = message
-            self.update_progress(text, percent)
+    def on_destroy(self, window):
+        # Abort running downloads and drop the queued ones
+        if self.cancel_token:
+            self.cancel_token.cancel()
+        for future in self.futures:
+            future.cancel()
+        if self.redraw_source:
+            GLib.source_remove(self.redraw_source)
+        Gtk.main_quit()
     
-    def handle_finished(self, success, message):
+    def flush_updates(self):
+        """Applies queued progress to the widgets; runs on a capped-rate timer"""
+        updates, lines = self.updates.drain()
+        
+        if lines:
+            if len(self.file_paths) > 1:
+                lines = [f"{self.file_store[index][self.COLUMN_FILE]}: {line}" for index, line in lines]
+            else:
+                lines = [line for _, line in lines]
+            self.log_messages(lines)
+        
+        for index, update in updates.items():
+            if update[0] == "progress":
+                self.handle_progress(index, update[1], update[2])
+            else:
+                self.handle_finished(index, update[1], update[2])
+        
+        if len(self.results) < len(self.file_paths):
+            return True
+        
+        # Everything is done: stop the timer and summarize outside of it
+        self.redraw_source = None
         self.start_button.set_sensitive(True)
-        if success:
-            self.show_message_dialog(Gtk.MessageType.INFO, "Success", message)
+        self.cancel_button.set_sensitive(False)
+        GLib.idle_add(self.show_summary)
+        return False
+    
+    def handle_progress(self, index, percent, text):
+        row = self.file_store[index]
+        row[self.COLUMN_STATUS] = text
+        row[self.COLUMN_PROGRESS] = int(percent)
+        if len(self.file_paths) == 1:
+            self.update_progress(text, percent)
+    
+    def handle_finished(self, index, success, message):
+        self.results[index] = (success, message)
+        
+        row = self.file_store[index]
+        row[self.COLUMN_STATUS] = "Downloaded" if success else message if message == "Cancelled" else "Failed"
+        row[self.COLUMN_PROGRESS] = 100 if success else 0
+        
+        total = len(self.file_paths)
+        done = len(self.results)
+        if total > 1:
+            self.update_progress(f"{done} of {total} files done", done * 100 / total)
         else:
-            self.show_message_dialog(Gtk.MessageType.ERROR, "Error", message)
+            self.update_progress("Download completed!" if success else "No subtitles found", 100 if success else 0)
+            if success:
+                # The next episodes are likely to be asked for soon
+                start_prefetch(self.downloader, self.file_paths[index])
+    
+    def show_summary(self):
+        """Shows one dialog for the whole selection once every file is done"""
+        if len(self.file_paths) == 1:
+            success, message = self.results[0]
+            if success:
+                self.show_message_dialog(Gtk.MessageType.INFO, "Success", message)
+            else:
+                self.show_message_dialog(Gtk.MessageType.ERROR, "Error", message)
+            return
+        
+        downloaded, title, details = summarize_results(
+            (self.file_store[index][self.COLUMN_FILE], success, message)
+            for index, (success, message) in sorted(self.results.items())
+        )
+        
+        if not details:
+            self.show_message_dialog(Gtk.MessageType.INFO, "Success", title)
+            return
+        
+        message_type = Gtk.MessageType.WARNING if downloaded else Gtk.MessageType.ERROR
+        self.show_message_dialog(message_type, title, "\n".join(details))
     
     def start_download(self):
         self.log_text.get_buffer().set_text("")
+        self.results = {}
+        self.cancel_token = CancelToken()
+        self.cancel_button.set_sensitive(True)
+        for row in self.file_store:
+            row[self.COLUMN_STATUS] = "Queued"
+            row[self.COLUMN_PROGRESS] = 0
+        
+        # Every file shares one engine; its shared pool bounds concurrent downloads
+        executor = self.downloader.executor()
+        self.futures = []
+        for index, file_path in enumerate(self.file_paths):
+            thread = DownloadThreadGtk(index, file_path, self.updates, self.downloader, self.cancel_token)
+            self.futures.append(executor.submit_as(INTERACTIVE, thread.run))
         
-        def run_download():
-            downloader = DownloadThreadGtk(
-                self.file_path,
-                self.handle_update,
-                lambda percent, text: GLib.idle_add(self.handle_update, "progress", (percent, text)),
-                lambda success, msg: GLib.idle_add(self.handle_finished, success, msg)
-            )
-            downloader.run()
-        
-        import threading
-        thread = threading.Thread(target=run_download)
-        thread.daemon = True
-        thread.start()
+        self.redraw_source = GLib.timeout_add(REDRAW_INTERVAL_MS, self.flush_updates)
     
     def run(self):
         self.window.show_all()
         Gtk.main()
 
-def main_gtk(file_path):
-    """Main function for GTK GUI"""
-    app = SubtitleDownloaderWindowGtk(file_path)
+def main_gtk(file_paths):
+    """Main function for GTK GUI; accepts one file or a list of files"""
+    app = SubtitleDownloaderWindowGtk(file_paths)
     app.run()
-    return 0 # GTK GUI implementation will be implemented here
+    return 0
@@ -1,80 +1,277 @@
+import html
 import os
-import subprocess
+import sys
+import time
 from pathlib import Path
+from PyQt5.QtCore import QObject, Qt, pyqtSignal
+from PyQt5.QtWidgets import (
+    QApplication,
+    QFrame,
+    QGroupBox,
+    QHBoxLayout,
+    QHeaderView,
+    QLabel,
+    QMessageBox,
+    QPlainTextEdit,
+    QProgressBar,
+    QPushButton,
+    QTreeWidget,
+    QTreeWidgetItem,
+    QVBoxLayout,
+    QWidget
+)
 
-# Supported video extensions
-VIDEO_EXTENSIONS = {
-    '.avi', '.mkv', '.mp4', '.mov', '.wmv', '.webm', '.flv', '.3gp', 
-    '.m4v', '.mpg', '.mpeg', '.vob', '.ogv', '.ts', '.m2ts', '.divx',
-    '.m4v', '.mpg', '.mpe', '.mpv', '.qt', '.asf', '.ogm', '.dv'
-}
-
-def is_video_file(file_path):
-    """Checks if file is a common video file"""
-    path = Path(file_path)
-    return path.is_file() and path.suffix.lower() in VIDEO_EXTENSIONS
-
-def get_unique_subtitle_path(video_path, language):
-    """Generates a unique filename for the subtitle"""
-    video_stem = Path(video_path).stem
-    base_name = f"{video_stem}.{language}.srt"
-    base_path = Path(video_path).parent / base_name
-    
-    if not base_path.exists():
-        return base_path
-    
-    counter = 1
-    while True:
-        new_name = f"{video_stem}.{language}_{counter}.srt"
-        new_path = Path(video_path).parent / new_name
-        if not new_path.exists():
-            return new_path
-        counter += 1
-
-def detect_gui_preference():
-    """Detects which GUI to use based on environment"""
-    desktop_session = os.environ.get('XDG_CURRENT_DESKTOP', '').lower()
-    session_type = os.environ.get('XDG_SESSION_TYPE', '').lower()
-    
-    # Check if pcmanfm-qt is in use
-    try:
-        result = subprocess.run(['pgrep', '-f', 'pcmanfm-qt'], 
-                              capture_output=True, timeout=5)
-        if result.returncode == 0:
-            return 'qt'
-    except:
-        pass
-    
-    # Heuristic based on desktop environment
-    if 'qt' in desktop_session or 'kde' in desktop_session:
-        return 'qt'
-    elif 'gtk' in desktop_session or 'xfce' in desktop_session or 'gnome' in desktop_session:
-        return 'gtk'
-    elif session_type == 'wayland':
-        return 'gtk'
-    else:
-        # Try to import to see which is available
+from .cancel import CancelToken
+from .core import SubtitleDownloader
+from .prefetch import start_prefetch
+from .priority import INTERACTIVE
+from .progress import DOWNLOADING, summarize_results
+
+# Lines kept in the details view; older ones are removed
+LOG_MAX_LINES = 1000
+
+class DownloadSignals(QObject):
+    """Signals a download task emits from its pool thread"""
+    progress = pyqtSignal(int, int, str)
+    log = pyqtSignal(int, str)
+    finished = pyqtSignal(int, bool, str)
+
+class DownloadTaskQt:
+    """Downloads one file on the engine's pool, forwarding engine progress as signals"""
+
+    def __init__(self, index, file_path, downloader, cancel=None):
+        self.index = index
+        self.file_path = file_path
+        self.downloader = downloader
+        self.cancel = cancel
+        self.signals = DownloadSignals()
+        self.last_percent = -1
+        self.future = None
+
+    def on_progress(self, event):
+        percent = int(event.percent)
+        # Byte counts are only forwarded when the visible percentage changes
+        if event.phase == DOWNLOADING and event.current and percent == self.last_percent:
+            return
+        self.last_percent = percent
+        self.signals.progress.emit(self.index, percent, event.message)
+        if event.phase != DOWNLOADING or not event.current:
+            self.signals.log.emit(self.index, event.message)
+
+    def run(self):
         try:
-            from PyQt5.QtWidgets import QApplication
-            return 'qt'
-        except ImportError:
-            try:
-                import gi
-                gi.require_version('Gtk', '3.0')
-                from gi.repository import Gtk
-                return 'gtk'
-            except ImportError:
-                return 'qt'  # Default to Qt
-
-def show_notification(title, message, timeout=5000):
-    """Shows a desktop notification"""
-    try:
-        subprocess.run([
-            "notify-send", 
-            "-t", str(timeout),
-            title,
-            message
-        ], check=True, timeout=10)
-    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, FileNotFoundError):
-        # Fallback to terminal output if notify-send fails
-        print(f"{title}: {message}")
+            success, message = self.downloader.download_for_file(self.file_path, self.on_progress, self.cancel)
+        except Exception as e:
+            success, message = False, f"Unexpected error: {str(e)}"
+
+        self.signals.log.emit(self.index, f"{'✅' if success else '❌'} {message}")
+        self.signals.finished.emit(self.index, success, message)
+
+class SubtitleDownloaderWindowQt(QWidget):
+    COLUMN_FILE, COLUMN_STATUS, COLUMN_PROGRESS = range(3)
+
+    def __init__(self, file_paths):
+        super().__init__()
+        if isinstance(file_paths, (str, os.PathLike)):
+            file_paths = [file_paths]
+        self.file_paths = [str(file_path) for file_path in file_paths]
+        self.file_names = [Path(file_path).name for file_path in self.file_paths]
+        self.results = {}
+        self.cancel_token = None
+        self.tasks = []
+
+        # One engine serves every selected file; its shared pool bounds the downloads
+        self.downloader = SubtitleDownloader()
+
+        self.create_ui()
+
+    def create_ui(self):
+        self.setWindowTitle("Download Subtitle")
+        self.resize(600, 500)
+
+        layout = QVBoxLayout(self)
+
+        # Header
+        header_frame = QFrame()
+        header_frame.setFrameShape(QFrame.StyledPanel)
+        header_layout = QVBoxLayout(header_frame)
+
+        if len(self.file_paths) == 1:
+            file_label = QLabel(f"<b>File:</b> {html.escape(self.file_names[0])}")
+            file_label.setTextFormat(Qt.RichText)
+        else:
+            file_label = QLabel(f"<b>Files:</b> {len(self.file_paths)} videos")
+        path_label = QLabel(f"Folder: {os.path.commonpath([str(Path(p).parent) for p in self.file_paths])}")
+        path_label.setTextFormat(Qt.PlainText)
+
+        header_layout.addWidget(file_label)
+        header_layout.addWidget(path_label)
+        layout.addWidget(header_frame)
+
+        # One row per file with its own status
+        self.file_list = QTreeWidget()
+        self.file_list.setHeaderLabels(["File", "Status", "Progress"])
+        self.file_list.setRootIsDecorated(False)
+        self.file_list.header().setSectionResizeMode(self.COLUMN_FILE, QHeaderView.Stretch)
+        for name in self.file_names:
+            QTreeWidgetItem(self.file_list, [name, "Waiting", ""])
+
+        if len(self.file_paths) > 1:
+            files_group = QGroupBox("Files")
+            files_layout = QVBoxLayout(files_group)
+            files_layout.addWidget(self.file_list)
+            layout.addWidget(files_group, 1)
+
+        # Progress bar
+        progress_group = QGroupBox("Progress")
+        progress_layout = QVBoxLayout(progress_group)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setFormat("Ready to start...")
+
+        self.status_label = QLabel("Click Start to begin")
+
+        progress_layout.addWidget(self.progress_bar)
+        progress_layout.addWidget(self.status_label)
+        layout.addWidget(progress_group)
+
+        # Log area
+        log_group = QGroupBox("Details")
+        log_layout = QVBoxLayout(log_group)
+
+        self.log_text = QPlainTextEdit()
+        self.log_text.setReadOnly(True)
+        self.log_text.setMaximumBlockCount(LOG_MAX_LINES)
+        self.log_text.setMinimumHeight(150)
+
+        log_layout.addWidget(self.log_text)
+        layout.addWidget(log_group, 1)
+
+        # Buttons
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+
+        self.start_button = QPushButton("Start Download")
+        self.start_button.clicked.connect(self.start_download)
+
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancel_download)
+        self.cancel_button.setEnabled(False)
+
+        self.close_button = QPushButton("Close")
+        self.close_button.clicked.connect(self.close)
+
+        button_layout.addWidget(self.start_button)
+        button_layout.addWidget(self.cancel_button)
+        button_layout.addWidget(self.close_button)
+        layout.addLayout(button_layout)
+
+    def log_message(self, message):
+        timestamp = time.strftime("%H:%M:%S")
+        self.log_text.appendPlainText(f"[{timestamp}] {message}")
+
+    def update_progress(self, text, percent=None):
+        if percent is not None:
+            self.progress_bar.setValue(int(percent))
+        self.progress_bar.setFormat(text)
+        self.status_label.setText(text)
+
+    def handle_log(self, index, message):
+        if len(self.file_paths) > 1:
+            message = f"{self.file_names[index]}: {message}"
+        self.log_message(message)
+
+    def handle_progress(self, index, percent, text):
+        item = self.file_list.topLevelItem(index)
+        item.setText(self.COLUMN_STATUS, text)
+        item.setText(self.COLUMN_PROGRESS, f"{percent}%")
+        if len(self.file_paths) == 1:
+            self.update_progress(text, percent)
+
+    def handle_finished(self, index, success, message):
+        self.results[index] = (success, message)
+
+        item = self.file_list.topLevelItem(index)
+        item.setText(self.COLUMN_STATUS, "Downloaded" if success else message if message == "Cancelled" else "Failed")
+        item.setText(self.COLUMN_PROGRESS, "100%" if success else "")
+
+        total = len(self.file_paths)
+        done = len(self.results)
+        if total > 1:
+            self.update_progress(f"{done} of {total} files done", done * 100 / total)
+        else:
+            self.update_progress("Download completed!" if success else "No subtitles found", 100 if success else 0)
+            if success:
+                # The next episodes are likely to be asked for soon
+                start_prefetch(self.downloader, self.file_paths[index])
+
+        if done == total:
+            self.start_button.setEnabled(True)
+            self.cancel_button.setEnabled(False)
+            self.show_summary()
+
+    def show_summary(self):
+        """Shows one dialog for the whole selection once every file is done"""
+        if len(self.file_paths) == 1:
+            success, message = self.results[0]
+            if success:
+                QMessageBox.information(self, "Success", message)
+            else:
+                QMessageBox.critical(self, "Error", message)
+            return
+
+        downloaded, title, details = summarize_results(
+            (self.file_names[index], success, message)
+            for index, (success, message) in sorted(self.results.items())
+        )
+
+        if not details:
+            QMessageBox.information(self, "Success", title)
+        elif downloaded:
+            QMessageBox.warning(self, title, "\n".join(details))
+        else:
+            QMessageBox.critical(self, title, "\n".join(details))
+
+    def start_download(self):
+        self.start_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.log_text.clear()
+        self.results = {}
+        self.cancel_token = CancelToken()
+        self.update_progress("Starting...", 0)
+        self.tasks = []
+
+        for index, file_path in enumerate(self.file_paths):
+            item = self.file_list.topLevelItem(index)
+            item.setText(self.COLUMN_STATUS, "Queued")
+            item.setText(self.COLUMN_PROGRESS, "")
+
+            task = DownloadTaskQt(index, file_path, self.downloader, self.cancel_token)
+            # Emitted on pool threads, delivered on the GUI thread
+            task.signals.progress.connect(self.handle_progress, Qt.QueuedConnection)
+            task.signals.log.connect(self.handle_log, Qt.QueuedConnection)
+            task.signals.finished.connect(self.handle_finished, Qt.QueuedConnection)
+            task.future = self.downloader.executor().submit_as(INTERACTIVE, task.run)
+            self.tasks.append(task)
+
+    def cancel_download(self):
+        # Running downloads abort at their next step; queued ones end at once
+        self.cancel_button.setEnabled(False)
+        self.update_progress("Cancelling...")
+        if self.cancel_token:
+            self.cancel_token.cancel()
+
+    def closeEvent(self, event):
+        # Abort running downloads and drop the queued ones
+        if self.cancel_token:
+            self.cancel_token.cancel()
+        for task in self.tasks:
+            task.future.cancel()
+        super().closeEvent(event)
+
+def main_qt(file_paths):
+    """Main function for Qt GUI; accepts one file or a list of files"""
+    app = QApplication.instance() or QApplication(sys.argv)
+    window = SubtitleDownloaderWindowQt(file_paths)
+    window.show()
+    return app.exec_()
@@ -0,0 +1,110 @@
+"""
+OpenSubtitles video hashing with positioned reads into reused buffers
+
+The hash is the file size plus the sum of the first and last 64 KiB read
+as little-endian 64-bit integers, modulo 2**64. Both blocks are read with
+os.preadv (os.pread where unavailable) straight into a per-thread buffer
+and summed in one pass, by NumPy when installed or over a memoryview
+cast otherwise. The reads release the GIL, so hash_files can hash many
+videos in parallel on a thread pool.
+"""
+
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .cache import MemoCache, file_key
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+HASH_BLOCK_SIZE = 64 * 1024
+# Files smaller than the two blocks have no OpenSubtitles hash
+MIN_HASH_SIZE = 2 * HASH_BLOCK_SIZE
+HASH_MASK = 0xFFFFFFFFFFFFFFFF
+
+_buffers = threading.local()
+_hash_cache = MemoCache(4096)
+
+def _hash_buffer():
+    """Returns this thread's preallocated buffer for the head and tail blocks"""
+    buffer = getattr(_buffers, 'buffer', None)
+    if buffer is None:
+        buffer = _buffers.buffer = bytearray(MIN_HASH_SIZE)
+    return buffer
+
+def _read_block(fd, view, offset):
+    """Fills view with bytes read from offset, raising OSError if the file is short"""
+    filled = 0
+    while filled < len(view):
+        if hasattr(os, 'preadv'):
+            count = os.preadv(fd, [view[filled:]], offset + filled)
+        else:
+            data = os.pread(fd, len(view) - filled, offset + filled)
+            count = len(data)
+            view[filled:filled + count] = data
+        if count == 0:
+            raise OSError(f"File shrank while hashing at offset {offset + filled}")
+        filled += count
+
+def _fold(buffer):
+    """Sums a buffer as little-endian unsigned 64-bit integers modulo 2**64"""
+    if numpy is not None:
+        # uint64 addition wraps, which is exactly the modulo we need
+        return int(numpy.frombuffer(buffer, dtype='<u8').sum(dtype=numpy.uint64))
+    if sys.byteorder == 'little':
+        return sum(memoryview(buffer).cast('Q')) & HASH_MASK
+    return sum(int.from_bytes(buffer[i:i + 8], 'little') for i in range(0, len(buffer), 8)) & HASH_MASK
+
+def opensubtitles_hash(file_path):
+    """Returns the OpenSubtitles hash of a video as 16 hex digits
+
+    Returns None for files under 128 KiB. Results are cached by
+    (inode, size, mtime), so a file hashed once in a batch is not read
+    again.
+    """
+    key = file_key(file_path)
+    cached = _hash_cache.get(key)
+    if cached is not None:
+        return cached or None
+
+    size = key[1]
+    if size < MIN_HASH_SIZE:
+        _hash_cache.put(key, "")
+        return None
+
+    buffer = _hash_buffer()
+    view = memoryview(buffer)
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        _read_block(fd, view[:HASH_BLOCK_SIZE], 0)
+        _read_block(fd, view[HASH_BLOCK_SIZE:], size - HASH_BLOCK_SIZE)
+    finally:
+        view.release()
+        os.close(fd)
+
+    video_hash = f"{(size + _fold(buffer)) & HASH_MASK:016x}"
+    _hash_cache.put(key, video_hash)
+    return video_hash
+
+def hash_files(file_paths, workers=8, io=None):
+    """Hashes many videos on a thread pool; returns {path: hash or None}
+
+    io is an optional IOScheduler; reads then respect its per-device
+    limits. Files that can't be read map to None.
+    """
+    def hash_one(file_path):
+        try:
+            if io is None:
+                return opensubtitles_hash(file_path)
+            with io.slot(file_path):
+                return opensubtitles_hash(file_path)
+        except OSError:
+            return None
+
+    file_paths = list(file_paths)
+    with ThreadPoolExecutor(max_workers=max(1, int(workers))) as executor:
+        return dict(zip(file_paths, executor.map(hash_one, file_paths)))
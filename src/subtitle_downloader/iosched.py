@@ -0,0 +1,90 @@
+"""
+Per-device concurrency limits for local disk reads
+
+Hashing and header probing read small blocks from the head and tail of
+each video. Several workers doing that at once on one spinning disk turn
+sequential reads into seeks, so reads are grouped by the device holding
+the file (st_dev), each with its own limit. Searches and downloads don't
+go through here and stay fully parallel.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+ROTATIONAL = "rotational"
+SOLID_STATE = "solid-state"
+# No block device to inspect: network shares, tmpfs, btrfs subvolumes, non-Linux
+UNKNOWN = "unknown"
+
+DEFAULT_LIMITS = {
+    ROTATIONAL: 1,
+    SOLID_STATE: 8,
+    UNKNOWN: 4
+}
+
+_device_kinds = {}
+_device_kinds_lock = threading.Lock()
+
+def detect_device_kind(device):
+    """Returns ROTATIONAL, SOLID_STATE or UNKNOWN for an st_dev number
+
+    Reads /sys/dev/block/MAJOR:MINOR/queue/rotational; partitions take the
+    flag of their parent disk. Results are cached per device.
+    """
+    with _device_kinds_lock:
+        if device in _device_kinds:
+            return _device_kinds[device]
+
+    kind = UNKNOWN
+    block = f"/sys/dev/block/{os.major(device)}:{os.minor(device)}"
+    for flag_file in (os.path.join(block, 'queue', 'rotational'), os.path.join(block, '..', 'queue', 'rotational')):
+        try:
+            with open(flag_file, 'r') as f:
+                kind = ROTATIONAL if f.read().strip() == '1' else SOLID_STATE
+            break
+        except (OSError, ValueError):
+            continue
+
+    with _device_kinds_lock:
+        _device_kinds[device] = kind
+    return kind
+
+class IOScheduler:
+    """Bounds concurrent local reads per device
+
+    limits maps a device kind to the number of reads allowed at once on
+    one device of that kind. Each device gets its own semaphore, so work on
+    different disks still runs in parallel.
+    """
+
+    def __init__(self, limits=None):
+        self.limits = dict(DEFAULT_LIMITS)
+        self.limits.update(limits or {})
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def device_slots(self, device):
+        """Returns the semaphore guarding one device, creating it on first use"""
+        with self._lock:
+            slots = self._slots.get(device)
+            if slots is None:
+                limit = max(1, int(self.limits[detect_device_kind(device)]))
+                slots = self._slots[device] = threading.BoundedSemaphore(limit)
+            return slots
+
+    @contextmanager
+    def slot(self, file_path):
+        """Holds one read slot on the device of file_path for the block
+
+        Files that can't be stat'ed are not limited; the read itself will
+        report the error.
+        """
+        try:
+            device = os.stat(file_path).st_dev
+        except OSError:
+            yield
+            return
+
+        with self.device_slots(device):
+            yield
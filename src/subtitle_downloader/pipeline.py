@@ -0,0 +1,69 @@
+"""
+Line-oriented input and NDJSON output for running from scripts and pipes
+"""
+
+import json
+import os
+
+# Bytes read from the input stream at a time
+READ_CHUNK_SIZE = 64 * 1024
+
+def iter_paths(stream, null=False):
+    """Yields paths from a binary stream, one per line or NUL-separated
+
+    The stream is read in fixed-size chunks, so only the current partial
+    path is buffered. Bytes are decoded like file names (os.fsdecode), so
+    names that are not valid UTF-8 survive the round trip. Empty entries
+    are skipped.
+    """
+    separator = b'\0' if null else b'\n'
+    buffer = b''
+
+    while True:
+        chunk = stream.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        buffer += chunk
+        *entries, buffer = buffer.split(separator)
+        for entry in entries:
+            if entry:
+                yield os.fsdecode(entry)
+
+    if buffer:
+        yield os.fsdecode(buffer)
+
+def result_status(result):
+    """Returns downloaded, skipped, cancelled or failed for an engine result"""
+    if result.get("skipped"):
+        return "skipped"
+    if result["success"]:
+        return "downloaded"
+    if result["message"] == "Cancelled":
+        return "cancelled"
+    return "failed"
+
+def result_record(file_path, result):
+    """Formats one finished file as a single NDJSON line"""
+    return json.dumps({
+        "path": file_path,
+        "status": result_status(result),
+        "success": result["success"],
+        "message": result["message"]
+    })
+
+def load_finished(lines):
+    """Returns the paths a previous run's NDJSON output marks as done
+
+    Downloaded and skipped files count as done; failed and cancelled ones
+    are retried. Malformed lines, such as one cut short by a crash, are
+    ignored.
+    """
+    finished = set()
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict) and record.get("status") in ("downloaded", "skipped"):
+            finished.add(record.get("path"))
+    return finished
@@ -0,0 +1,73 @@
+"""
+Background prefetch of sibling episodes after an interactive request
+
+Someone who asks for S02E01 from the context menu usually asks for E02
+right after. With prefetch_siblings enabled, front ends hand the other
+episodes of that series and season in the folder to a detached process
+running at low CPU priority. It outlives the window that started it. By
+the time the next episode is asked for, its subtitle is already there,
+or the request joins the prefetch in flight through the video's lock
+file.
+
+Run as: python -m subtitle_downloader.prefetch VIDEO [LANGUAGE ...]
+"""
+
+import os
+import subprocess
+import sys
+
+PREFETCH_NICENESS = 10
+
+def start_prefetch(downloader, file_path):
+    """Starts a detached prefetch of file_path's sibling episodes
+
+    Does nothing unless prefetch_siblings is enabled. The prefetch uses
+    the downloader's current language chain. Returns the process, or None.
+    """
+    if not downloader.config.get("prefetch_siblings", False):
+        return None
+
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [package_root, env.get('PYTHONPATH')]))
+    command = [sys.executable, '-m', 'subtitle_downloader.prefetch', os.path.abspath(file_path)]
+    command.extend(downloader.get_languages())
+
+    try:
+        return subprocess.Popen(
+            command,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+    except OSError:
+        return None
+
+def main(argv=None):
+    """Prefetches subtitles for the sibling episodes of one video"""
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("Usage: python -m subtitle_downloader.prefetch VIDEO [LANGUAGE ...]")
+        return 1
+
+    try:
+        os.nice(PREFETCH_NICENESS)
+    except (AttributeError, OSError):
+        pass
+
+    from .core import SubtitleDownloader
+
+    file_path, languages = argv[0], argv[1:]
+    downloader = SubtitleDownloader()
+    if languages:
+        downloader.config.override("default_language", languages[0])
+        downloader.config.override("fallback_language", languages[1] if len(languages) > 1 else None)
+
+    for future in downloader.prefetch_siblings(file_path):
+        future.result()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
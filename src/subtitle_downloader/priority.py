@@ -0,0 +1,226 @@
+"""
+Priority classes for work sharing the engine's workers and provider budget
+
+A job is interactive (someone is waiting for this file), watch (a new
+file noticed in a watched folder) or bulk (a library backfill). The next
+free worker and the next rate-limit token go to the most urgent waiting
+job, oldest first within a class. Waiting jobs move up one class every
+aging_seconds, so bulk work still progresses under steady interactive
+load.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future
+from contextlib import contextmanager, nullcontext
+
+INTERACTIVE = 0
+WATCH = 1
+BULK = 2
+
+PRIORITIES = {
+    "interactive": INTERACTIVE,
+    "watch": WATCH,
+    "bulk": BULK
+}
+
+AGING_SECONDS = 30
+
+_current = threading.local()
+
+def current_priority():
+    """Returns the class of the job running on this thread; INTERACTIVE outside jobs"""
+    return getattr(_current, 'priority', INTERACTIVE)
+
+@contextmanager
+def running_as(priority):
+    """Runs the block on behalf of a job of the given class"""
+    previous = current_priority()
+    _current.priority = priority
+    try:
+        yield
+    finally:
+        _current.priority = previous
+
+class WaitQueue:
+    """Waiting entries in one FIFO per class, served by aged class then age
+
+    Not thread-safe; callers hold their own lock.
+    """
+
+    def __init__(self, aging_seconds=AGING_SECONDS, clock=time.monotonic):
+        self.aging_seconds = aging_seconds
+        self.clock = clock
+        self._queues = {priority: deque() for priority in PRIORITIES.values()}
+
+    def __len__(self):
+        return sum(len(queue) for queue in self._queues.values())
+
+    def push(self, priority, item):
+        """Queues item in a class; returns its entry"""
+        if priority not in self._queues:
+            raise ValueError(f"Unknown priority: {priority}")
+        entry = (self.clock(), priority, item)
+        self._queues[priority].append(entry)
+        return entry
+
+    def peek(self):
+        """Returns the entry to serve next, or None when empty"""
+        now = self.clock()
+        best, best_key = None, None
+        for queue in self._queues.values():
+            if not queue:
+                continue
+            # The head is the oldest of its class, so it has aged the most
+            queued_at, priority, _ = entry = queue[0]
+            aged = priority - int((now - queued_at) / self.aging_seconds) if self.aging_seconds else priority
+            key = (aged, queued_at)
+            if best_key is None or key < best_key:
+                best, best_key = entry, key
+        return best
+
+    def remove(self, entry):
+        """Drops an entry if it is still queued"""
+        queue = self._queues[entry[1]]
+        for index, queued in enumerate(queue):
+            if queued is entry:
+                del queue[index]
+                return
+
+    def pop(self):
+        """Removes and returns the entry to serve next"""
+        entry = self.peek()
+        if entry is not None:
+            self.remove(entry)
+        return entry
+
+class PriorityExecutor(Executor):
+    """Thread pool that runs the most urgent queued job next
+
+    submit() queues under the class of the calling job, submit_as() under
+    an explicit one. Jobs run with that class as their current_priority(),
+    so the rate limiter sees it too. Worker threads are daemons and are
+    only ever added, by ensure_workers().
+    """
+
+    def __init__(self, workers, aging_seconds=AGING_SECONDS, thread_name_prefix="priority-worker"):
+        self.thread_name_prefix = thread_name_prefix
+        self._queue = WaitQueue(aging_seconds)
+        self._condition = threading.Condition()
+        self._threads = []
+        self._shutdown = False
+        self.ensure_workers(workers)
+
+    @property
+    def workers(self):
+        return len(self._threads)
+
+    def ensure_workers(self, workers):
+        """Grows the pool to at least workers threads"""
+        with self._condition:
+            while len(self._threads) < max(1, int(workers)):
+                thread = threading.Thread(
+                    target=self._work,
+                    name=f"{self.thread_name_prefix}_{len(self._threads)}",
+                    daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, fn, *args, **kwargs):
+        return self.submit_as(current_priority(), fn, *args, **kwargs)
+
+    def submit_as(self, priority, fn, *args, **kwargs):
+        """Queues fn(*args, **kwargs) in a priority class; returns its Future"""
+        future = Future()
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("Cannot submit after shutdown")
+            self._queue.push(priority, (future, fn, args, kwargs))
+            self._condition.notify()
+        return future
+
+    def _work(self):
+        while True:
+            with self._condition:
+                while not self._queue and not self._shutdown:
+                    self._condition.wait()
+                entry = self._queue.pop()
+                if entry is None:
+                    return
+            _, priority, (future, fn, args, kwargs) = entry
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                with running_as(priority):
+                    result = fn(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        with self._condition:
+            self._shutdown = True
+            if cancel_futures:
+                while self._queue:
+                    self._queue.pop()[2][0].cancel()
+            self._condition.notify_all()
+        if wait:
+            for thread in self._threads:
+                if thread is not threading.current_thread():
+                    thread.join()
+
+class RateLimiter:
+    """Token bucket whose tokens go to waiters by priority class
+
+    rate is tokens per second and burst the most that can pile up while
+    idle. A rate of 0 disables limiting.
+    """
+
+    def __init__(self, rate, burst=1, aging_seconds=AGING_SECONDS, clock=time.monotonic):
+        self.rate = float(rate or 0)
+        self.burst = max(1, int(burst))
+        self.clock = clock
+        self._queue = WaitQueue(aging_seconds, clock)
+        self._condition = threading.Condition()
+        self._tokens = float(self.burst)
+        self._updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _wake(self):
+        with self._condition:
+            self._condition.notify_all()
+
+    def acquire(self, priority=None, cancel=None):
+        """Waits for a token, serving more urgent classes first
+
+        priority defaults to the calling job's class. Raises Cancelled if
+        the optional CancelToken is cancelled while waiting.
+        """
+        if not self.rate:
+            return
+        if priority is None:
+            priority = current_priority()
+
+        abort = cancel.on_cancel(self._wake) if cancel is not None else nullcontext()
+        with abort, self._condition:
+            entry = self._queue.push(priority, None)
+            try:
+                while True:
+                    if cancel is not None:
+                        cancel.check()
+                    self._refill()
+                    if self._tokens >= 1 and self._queue.peek() is entry:
+                        self._tokens -= 1
+                        # The next waiter may be served by a leftover token
+                        self._condition.notify_all()
+                        return
+                    self._condition.wait(max((1 - self._tokens) / self.rate, 0.01))
+            finally:
+                self._queue.remove(entry)
@@ -0,0 +1,429 @@
+"""
+Header-only container probing for MKV/WebM (EBML) and MP4/MOV (ISO-BMFF)
+"""
+
+import os
+import stat
+import struct
+
+from .cache import MemoCache, file_key
+
+# Never read more than this per element or box while probing
+MAX_READ = 64 * 1024
+
+# Bytes read from the start of a file to identify its container
+SNIFF_SIZE = 64
+
+# Non-blocking, so opening a FIFO in a scanned folder can't hang the scan
+OPEN_FLAGS = os.O_RDONLY | getattr(os, 'O_NONBLOCK', 0)
+
+# MPEG transport stream packet sizes (plain, M2TS with timecode, FEC)
+TS_PACKET_SIZES = (188, 192, 204)
+
+# EBML element IDs (with their length marker bits)
+EBML_HEADER = 0x1A45DFA3
+EBML_SEGMENT = 0x18538067
+EBML_SEEK_HEAD = 0x114D9B74
+EBML_SEEK = 0x4DBB
+EBML_SEEK_ID = 0x53AB
+EBML_SEEK_POSITION = 0x53AC
+EBML_INFO = 0x1549A966
+EBML_TIMECODE_SCALE = 0x2AD7B1
+EBML_DURATION = 0x4489
+EBML_TRACKS = 0x1654AE6B
+EBML_TRACK_ENTRY = 0xAE
+EBML_TRACK_TYPE = 0x83
+EBML_DEFAULT_DURATION = 0x23E383
+EBML_TRACK_LANGUAGE = 0x22B59C
+EBML_TRACK_LANGUAGE_BCP47 = 0x22B59D
+EBML_FLAG_FORCED = 0x55AA
+EBML_CLUSTER = 0x1F43B675
+
+MKV_VIDEO_TRACK = 1
+MKV_SUBTITLE_TRACK = 17
+
+# ISO-BMFF boxes that only contain other boxes
+MP4_CONTAINERS = {b'moov', b'trak', b'mdia', b'minf', b'stbl'}
+
+_probe_cache = MemoCache(4096)
+_tracks_cache = MemoCache(4096)
+
+class _FileReader:
+    """Bounded positional reads from an open file"""
+
+    def __init__(self, fd):
+        self.fd = fd
+        self.size = os.fstat(fd).st_size
+
+    def read(self, offset, length):
+        length = min(length, MAX_READ, max(self.size - offset, 0))
+        if length <= 0:
+            return b''
+        return os.pread(self.fd, length, offset)
+
+def _read_vint(data, pos, keep_marker=False):
+    """Decodes an EBML variable-length integer; returns (value, length)"""
+    if pos >= len(data):
+        raise ValueError("Truncated EBML data")
+    first = data[pos]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        length += 1
+        mask >>= 1
+    if length > 8 or pos + length > len(data):
+        raise ValueError("Invalid EBML integer")
+
+    value = first if keep_marker else first & (mask - 1)
+    for byte in data[pos + 1:pos + length]:
+        value = (value << 8) | byte
+    return value, length
+
+def _unknown_size(size, length):
+    return size == (1 << (7 * length)) - 1
+
+def _read_element_header(reader, offset):
+    """Reads an element ID and size at offset; returns (id, data_offset, size)"""
+    data = reader.read(offset, 12)
+    element_id, id_length = _read_vint(data, 0, keep_marker=True)
+    size, size_length = _read_vint(data, id_length)
+    if _unknown_size(size, size_length):
+        size = None
+    return element_id, offset + id_length + size_length, size
+
+def iter_ebml_children(reader, start, end):
+    """Yields (id, data_offset, size) for child elements in [start, end)"""
+    offset = start
+    while offset < end:
+        try:
+            element_id, data_offset, size = _read_element_header(reader, offset)
+        except ValueError:
+            return
+        yield element_id, data_offset, size
+        if size is None:
+            return
+        offset = data_offset + size
+
+def _read_uint(reader, offset, size):
+    return int.from_bytes(reader.read(offset, min(size, 8)), 'big')
+
+def _read_string(reader, offset, size):
+    return reader.read(offset, min(size, 64)).rstrip(b'\x00').decode('ascii', 'replace')
+
+def _read_float(reader, offset, size):
+    data = reader.read(offset, size)
+    if size == 4:
+        return struct.unpack('>f', data)[0]
+    if size == 8:
+        return struct.unpack('>d', data)[0]
+    return None
+
+def find_mkv_sections(reader, wanted):
+    """Locates top-level Segment children (e.g. Info, Tracks) by ID
+
+    Walks Segment children until the first Cluster, then falls back to the
+    SeekHead index, so media data is never read. Returns a dict mapping
+    each found ID to (data_offset, size).
+    """
+    element_id, data_offset, size = _read_element_header(reader, 0)
+    if element_id != EBML_HEADER:
+        raise ValueError("Not an EBML file")
+
+    segment_offset = data_offset + size
+    element_id, segment_start, segment_size = _read_element_header(reader, segment_offset)
+    if element_id != EBML_SEGMENT:
+        raise ValueError("Missing Matroska segment")
+    segment_end = reader.size if segment_size is None else segment_start + segment_size
+
+    found = {}
+    seek_positions = {}
+    for element_id, data_offset, size in iter_ebml_children(reader, segment_start, segment_end):
+        if element_id == EBML_CLUSTER or size is None:
+            break
+        if element_id in wanted:
+            found[element_id] = (data_offset, size)
+        elif element_id == EBML_SEEK_HEAD:
+            for seek_id, seek_offset, seek_size in iter_ebml_children(reader, data_offset, data_offset + size):
+                if seek_id != EBML_SEEK:
+                    continue
+                target_id = target_position = None
+                for child_id, child_offset, child_size in iter_ebml_children(reader, seek_offset, seek_offset + seek_size):
+                    if child_id == EBML_SEEK_ID:
+                        target_id = _read_uint(reader, child_offset, child_size)
+                    elif child_id == EBML_SEEK_POSITION:
+                        target_position = _read_uint(reader, child_offset, child_size)
+                if target_id in wanted and target_position is not None:
+                    seek_positions[target_id] = segment_start + target_position
+        if len(found) == len(wanted):
+            return found
+
+    # Sections stored after the clusters are reached through the SeekHead
+    for element_id, position in seek_positions.items():
+        if element_id in found:
+            continue
+        try:
+            seek_id, data_offset, size = _read_element_header(reader, position)
+        except ValueError:
+            continue
+        if seek_id == element_id and size is not None:
+            found[element_id] = (data_offset, size)
+    return found
+
+def probe_mkv(reader):
+    """Reads duration and frame rate from Matroska Info and Tracks"""
+    sections = find_mkv_sections(reader, {EBML_INFO, EBML_TRACKS})
+    info = {"container": "mkv", "duration_ms": None, "fps": None}
+
+    if EBML_INFO in sections:
+        timecode_scale = 1000000
+        duration = None
+        data_offset, size = sections[EBML_INFO]
+        for element_id, child_offset, child_size in iter_ebml_children(reader, data_offset, data_offset + size):
+            if element_id == EBML_TIMECODE_SCALE:
+                timecode_scale = _read_uint(reader, child_offset, child_size)
+            elif element_id == EBML_DURATION:
+                duration = _read_float(reader, child_offset, child_size)
+        if duration:
+            info["duration_ms"] = int(duration * timecode_scale / 1000000)
+
+    if EBML_TRACKS in sections:
+        data_offset, size = sections[EBML_TRACKS]
+        for element_id, entry_offset, entry_size in iter_ebml_children(reader, data_offset, data_offset + size):
+            if element_id != EBML_TRACK_ENTRY:
+                continue
+            track_type = default_duration = None
+            for child_id, child_offset, child_size in iter_ebml_children(reader, entry_offset, entry_offset + entry_size):
+                if child_id == EBML_TRACK_TYPE:
+                    track_type = _read_uint(reader, child_offset, child_size)
+                elif child_id == EBML_DEFAULT_DURATION:
+                    default_duration = _read_uint(reader, child_offset, child_size)
+            if track_type == MKV_VIDEO_TRACK and default_duration:
+                info["fps"] = round(1e9 / default_duration, 3)
+                break
+
+    return info
+
+def _track_language(alpha3, bcp47):
+    """Converts a Matroska track language to a lowercase code like 'pt-br'"""
+    if bcp47:
+        return bcp47.lower()
+    try:
+        from babelfish import Error as LanguageError, Language
+    except ImportError:
+        return alpha3.lower()
+    try:
+        return Language.fromalpha3b(alpha3).alpha2
+    except (LanguageError, ValueError, KeyError):
+        # 'und', 'mul', 'zxx' and codes without an alpha-2 form stay as tagged
+        return alpha3.lower()
+
+def mkv_subtitle_languages(reader):
+    """Lists the languages of embedded subtitle tracks from the Tracks element
+
+    Forced tracks only cover foreign dialogue and are left out.
+    """
+    sections = find_mkv_sections(reader, {EBML_TRACKS})
+    if EBML_TRACKS not in sections:
+        return []
+
+    languages = []
+    data_offset, size = sections[EBML_TRACKS]
+    for element_id, entry_offset, entry_size in iter_ebml_children(reader, data_offset, data_offset + size):
+        if element_id != EBML_TRACK_ENTRY:
+            continue
+        track_type = bcp47 = None
+        forced = 0
+        # Matroska's default track language is English
+        alpha3 = 'eng'
+        for child_id, child_offset, child_size in iter_ebml_children(reader, entry_offset, entry_offset + entry_size):
+            if child_id == EBML_TRACK_TYPE:
+                track_type = _read_uint(reader, child_offset, child_size)
+            elif child_id == EBML_TRACK_LANGUAGE:
+                alpha3 = _read_string(reader, child_offset, child_size)
+            elif child_id == EBML_TRACK_LANGUAGE_BCP47:
+                bcp47 = _read_string(reader, child_offset, child_size)
+            elif child_id == EBML_FLAG_FORCED:
+                forced = _read_uint(reader, child_offset, child_size)
+        if track_type == MKV_SUBTITLE_TRACK and not forced:
+            language = _track_language(alpha3, bcp47)
+            if language not in languages:
+                languages.append(language)
+    return languages
+
+def _iter_boxes(reader, start, end):
+    """Yields (type, data_offset, data_size) for ISO-BMFF boxes in [start, end)"""
+    offset = start
+    while offset + 8 <= end:
+        header = reader.read(offset, 16)
+        if len(header) < 8:
+            return
+        size, box_type = struct.unpack('>I4s', header[:8])
+        header_size = 8
+        if size == 1:
+            if len(header) < 16:
+                return
+            size = struct.unpack('>Q', header[8:16])[0]
+            header_size = 16
+        elif size == 0:
+            size = end - offset
+        if size < header_size:
+            return
+        yield box_type, offset + header_size, size - header_size
+        offset += size
+
+def probe_mp4(reader):
+    """Reads duration and frame rate from the moov box"""
+    info = {"container": "mp4", "duration_ms": None, "fps": None}
+
+    def walk(start, end, state):
+        for box_type, data_offset, size in _iter_boxes(reader, start, end):
+            if box_type == b'mvhd':
+                data = reader.read(data_offset, 32)
+                if data[:1] == b'\x01':
+                    timescale, duration = struct.unpack('>IQ', data[20:32])
+                else:
+                    timescale, duration = struct.unpack('>II', data[12:20])
+                if timescale:
+                    info["duration_ms"] = duration * 1000 // timescale
+            elif box_type == b'mdhd':
+                data = reader.read(data_offset, 24)
+                offset = 20 if data[:1] == b'\x01' else 12
+                state["timescale"] = struct.unpack('>I', data[offset:offset + 4])[0]
+            elif box_type == b'hdlr':
+                state["handler"] = reader.read(data_offset + 8, 4)
+            elif box_type == b'stts' and state.get("handler") == b'vide' and info["fps"] is None:
+                data = reader.read(data_offset, 16)
+                if len(data) == 16 and struct.unpack('>I', data[4:8])[0]:
+                    delta = struct.unpack('>I', data[12:16])[0]
+                    if delta and state.get("timescale"):
+                        info["fps"] = round(state["timescale"] / delta, 3)
+            elif box_type in MP4_CONTAINERS:
+                # Each track gets its own handler/timescale state
+                walk(data_offset, data_offset + size, {} if box_type == b'trak' else state)
+
+    for box_type, data_offset, size in _iter_boxes(reader, 0, reader.size):
+        if box_type == b'moov':
+            walk(data_offset, data_offset + size, {})
+            return info
+    raise ValueError("No moov box found")
+
+def sniff_container(head):
+    """Identifies the container from the first bytes of a file
+
+    MPEG transport streams only have a one-byte sync marker, so they are
+    confirmed separately by sniff_reader.
+    """
+    if head[:4] == b'\x1a\x45\xdf\xa3':
+        return 'mkv'
+    if head[4:8] in (b'ftyp', b'moov', b'mdat', b'free', b'wide', b'skip'):
+        return 'mp4'
+    if head[:4] == b'RIFF' and head[8:12] in (b'AVI ', b'AVIX'):
+        return 'avi'
+    if head[:4] in (b'\x00\x00\x01\xba', b'\x00\x00\x01\xb3'):
+        return 'mpegps'
+    return None
+
+def _is_transport_stream(reader, head):
+    """Checks for MPEG-TS sync bytes at the start of two consecutive packets"""
+    for start in (0, 4):
+        if head[start:start + 1] != b'\x47':
+            continue
+        for packet_size in TS_PACKET_SIZES:
+            if reader.read(start + packet_size, 1) == b'\x47':
+                return True
+    return False
+
+def sniff_reader(reader):
+    """Identifies a container with one read of the first SNIFF_SIZE bytes"""
+    head = reader.read(0, SNIFF_SIZE)
+    container = sniff_container(head)
+    if container is None and _is_transport_stream(reader, head):
+        container = 'mpegts'
+    return container
+
+def sniff_video(file_path):
+    """Identifies a video container by its magic bytes; returns None if unknown"""
+    try:
+        fd = os.open(file_path, OPEN_FLAGS)
+    except OSError:
+        return None
+    try:
+        if not stat.S_ISREG(os.fstat(fd).st_mode):
+            return None
+        return sniff_reader(_FileReader(fd))
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+
+def _read_headers(file_path, cache, readers):
+    """Runs the reader matching a file's container, caching by file key"""
+    try:
+        key = file_key(file_path)
+    except OSError:
+        return None
+
+    if key in cache:
+        return cache.get(key)
+
+    result = None
+    try:
+        fd = os.open(file_path, OPEN_FLAGS)
+        try:
+            if not stat.S_ISREG(os.fstat(fd).st_mode):
+                raise ValueError("Not a regular file")
+            reader = _FileReader(fd)
+            read_headers = readers.get(sniff_container(reader.read(0, SNIFF_SIZE)))
+            if read_headers:
+                result = read_headers(reader)
+        finally:
+            os.close(fd)
+    except (OSError, ValueError, struct.error):
+        result = None
+
+    cache.put(key, result)
+    return result
+
+def probe_video(file_path):
+    """Reads duration (ms) and frame rate from container headers
+
+    Only a handful of bounded positional reads are made; nothing is decoded
+    and no external tool is run. Returns a dict with container, duration_ms
+    and fps, or None if the file is not a supported container.
+    """
+    return _read_headers(file_path, _probe_cache, {'mkv': probe_mkv, 'mp4': probe_mp4})
+
+def embedded_subtitle_languages(file_path):
+    """Returns the languages of subtitle tracks embedded in an MKV file
+
+    Only the Tracks element is read. Returns an empty list for other
+    containers or unreadable files.
+    """
+    return _read_headers(file_path, _tracks_cache, {'mkv': mkv_subtitle_languages}) or []
+
+def has_embedded_subtitle(file_path, language):
+    """Checks if a video already carries a subtitle track in a language
+
+    A track without a region (e.g. 'pt') covers regional requests such as
+    'pt-br', but a track for another region does not.
+    """
+    language = language.lower()
+    base = language.split('-')[0]
+    for track_language in embedded_subtitle_languages(file_path):
+        if track_language == language or track_language == base:
+            return True
+        if '-' not in language and track_language.split('-')[0] == base:
+            return True
+    return False
+
+def duration_mismatch(last_cue_ms, duration_ms, tolerance=0.05, min_coverage=0.5):
+    """Checks if a subtitle obviously belongs to a different cut of a video
+
+    Subtitles that run past the end of the video (beyond a small tolerance)
+    or stop before min_coverage of it are considered mismatched.
+    """
+    if not duration_ms or not last_cue_ms:
+        return False
+    if last_cue_ms > duration_ms * (1 + tolerance) + 30000:
+        return True
+    return last_cue_ms < duration_ms * min_coverage
@@ -0,0 +1,149 @@
+"""
+Progress events published by the engine and coalesced for front ends
+"""
+
+import threading
+from collections import deque
+
+HASHING = "hashing"
+SEARCHING = "searching"
+DOWNLOADING = "downloading"
+WRITING = "writing"
+
+# Share of the overall progress bar covered by each phase
+PHASE_RANGES = {
+    HASHING: (0, 10),
+    SEARCHING: (10, 30),
+    DOWNLOADING: (30, 90),
+    WRITING: (90, 100)
+}
+
+# Log lines kept between two redraws; older ones are dropped
+LOG_BUFFER_LINES = 500
+
+# Failed files listed in a summary before it is cut short
+SUMMARY_MAX_FAILURES = 10
+
+class ProgressEvent:
+    """One progress update for a file: phase, message and a current/total count"""
+
+    __slots__ = ('file_path', 'phase', 'message', 'current', 'total')
+
+    def __init__(self, file_path, phase, message, current=0, total=0):
+        self.file_path = file_path
+        self.phase = phase
+        self.message = message
+        self.current = current
+        self.total = total
+
+    @property
+    def percent(self):
+        """Returns the overall progress for the file from 0 to 100"""
+        start, end = PHASE_RANGES.get(self.phase, (0, 100))
+        if self.total:
+            return start + (end - start) * min(self.current, self.total) / self.total
+        return start
+
+class ProgressReporter:
+    """Publishes progress events for one file to an optional callback
+
+    Every report is also a cancellation point when a CancelToken is given.
+    Without a callback or token each call is a no-op, so the engine can
+    report unconditionally.
+    """
+
+    def __init__(self, file_path, callback=None, cancel=None):
+        self.file_path = file_path
+        self.callback = callback
+        self.cancel = cancel
+
+    def emit(self, phase, message, current=0, total=0):
+        if self.cancel is not None:
+            self.cancel.check()
+        if self.callback is not None:
+            self.callback(ProgressEvent(self.file_path, phase, message, current, total))
+
+    def bytes_callback(self, message):
+        """Returns a (received, total) callback reporting download progress"""
+        if self.callback is None and self.cancel is None:
+            return None
+        return lambda received, total: self.emit(DOWNLOADING, message, received, total)
+
+class CoalescingQueue:
+    """Thread-safe hand-off of progress updates from workers to a UI thread
+
+    Only the latest update per key is kept, so a burst of byte counts costs
+    the UI one redraw. Log lines go to a bounded ring buffer.
+    """
+
+    def __init__(self, log_lines=LOG_BUFFER_LINES):
+        self._lock = threading.Lock()
+        self._latest = {}
+        self._log = deque(maxlen=log_lines)
+
+    def put(self, key, value):
+        """Replaces any pending update for key"""
+        with self._lock:
+            self._latest[key] = value
+
+    def log(self, line):
+        """Appends a log line, dropping the oldest one when full"""
+        with self._lock:
+            self._log.append(line)
+
+    def drain(self):
+        """Takes all pending updates and log lines; returns (updates, lines)"""
+        with self._lock:
+            latest, self._latest = self._latest, {}
+            lines = list(self._log)
+            self._log.clear()
+        return latest, lines
+
+class ResultCounter:
+    """Counts results of a multi-file run without keeping them
+
+    Only the first max_failures failure messages are stored, so a summary
+    of a million files costs the same memory as one of a hundred.
+    """
+
+    def __init__(self, max_failures=SUMMARY_MAX_FAILURES):
+        self.max_failures = max_failures
+        self.downloaded = 0
+        self.skipped = 0
+        self.failed = 0
+        self.failures = []
+
+    @property
+    def total(self):
+        return self.downloaded + self.skipped + self.failed
+
+    def add(self, name, success, message, skipped=False):
+        """Counts one finished file"""
+        if skipped:
+            self.skipped += 1
+        elif success:
+            self.downloaded += 1
+        else:
+            self.failed += 1
+            if len(self.failures) < self.max_failures:
+                self.failures.append(f"{name}: {message}")
+
+    def summary(self):
+        """Returns (downloaded, title, details) where details lists the failures"""
+        downloaded = self.downloaded + self.skipped
+        title = f"{downloaded} of {self.total} subtitles downloaded"
+
+        details = list(self.failures)
+        if self.failed > len(self.failures):
+            details.append(f"... and {self.failed - len(self.failures)} more")
+        return downloaded, title, details
+
+def summarize_results(results, max_failures=SUMMARY_MAX_FAILURES):
+    """Summarizes (name, success, message) results of a multi-file run
+
+    Returns (downloaded, title, details) where details lists the failures.
+    """
+    counter = ResultCounter(max_failures)
+    for name, success, message in results:
+        counter.add(name, success, message)
+    return counter.summary()
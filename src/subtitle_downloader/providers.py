@@ -0,0 +1,134 @@
+"""
+In-process access to subliminal providers
+"""
+
+from .download import CHUNK_SIZE, iter_chunks, stream_to_file
+from .hashing import opensubtitles_hash
+from .utils import get_unique_subtitle_path
+
+# Providers that match subtitles by the OpenSubtitles video hash
+OPENSUBTITLES_HASH_PROVIDERS = ("opensubtitles", "opensubtitlesvip", "opensubtitlescom", "opensubtitlescomvip")
+
+_cache_configured = False
+
+def configure_cache():
+    """Configures subliminal's cache region once per process"""
+    global _cache_configured
+    if _cache_configured:
+        return
+
+    from subliminal import region
+    from dogpile.cache.exception import RegionAlreadyConfigured
+
+    try:
+        region.configure('dogpile.cache.memory')
+    except RegionAlreadyConfigured:
+        pass
+    _cache_configured = True
+
+def to_language(code):
+    """Converts a language code such as 'pt-br' to a babelfish Language"""
+    from babelfish import Language
+    return Language.fromietf(code)
+
+def get_provider_configs(config):
+    """Builds subliminal provider configuration from the user config"""
+    provider_configs = {}
+    username, password = config.get_opensubtitles_credentials()
+    if username and password:
+        provider_configs["opensubtitles"] = {
+            "username": username,
+            "password": password
+        }
+    return provider_configs
+
+def open_pool(config):
+    """Opens a subliminal ProviderPool for the configured providers"""
+    configure_cache()
+
+    from subliminal import ProviderPool
+    return ProviderPool(
+        providers=config.get("providers", ["opensubtitles"]),
+        provider_configs=get_provider_configs(config)
+    )
+
+def provider_errors():
+    """Returns the exception types a provider query or login fails with"""
+    from requests import RequestException
+    from subliminal.exceptions import Error
+    return (Error, RequestException, OSError, ValueError)
+
+def close_sessions(pool):
+    """Closes the HTTP sessions of a pool's providers to abort their requests"""
+    for provider in list(pool.initialized_providers.values()):
+        session = getattr(provider, 'session', None)
+        if session is not None:
+            try:
+                session.close()
+            except Exception:
+                pass
+
+def scan_video(file_path):
+    """Builds a subliminal Video (name guess and hashes) for a local file"""
+    from subliminal import scan_video as subliminal_scan_video
+    video = subliminal_scan_video(str(file_path))
+
+    video_hash = opensubtitles_hash(file_path)
+    if video_hash:
+        video.hashes.update({name: video_hash for name in OPENSUBTITLES_HASH_PROVIDERS})
+    return video
+
+def rank_subtitles(subtitles, video):
+    """Sorts candidate subtitles from best to worst match for the video"""
+    from subliminal import compute_score
+    return sorted(subtitles, key=lambda subtitle: compute_score(subtitle, video), reverse=True)
+
+def _podnapisi_request(provider, subtitle):
+    subtitle_id = getattr(subtitle, 'subtitle_id', None) or getattr(subtitle, 'pid', None)
+    return f"{provider.server_url.rstrip('/')}/{subtitle_id}/download", {'container': 'zip'}
+
+# Providers whose raw download can be fetched as a plain HTTP stream; the
+# others hand over fully decoded content through download_subtitle()
+STREAM_REQUESTS = {
+    "podnapisi": _podnapisi_request
+}
+
+def _counted(chunks, on_progress, total=0):
+    """Passes chunks through while reporting the running byte count"""
+    received = 0
+    for chunk in chunks:
+        received += len(chunk)
+        on_progress(received, total)
+        yield chunk
+
+def download_to_file(pool, subtitle, video_path, language, select=None, on_progress=None):
+    """Downloads a subtitle straight to its final path next to the video
+
+    Streamable providers are read in fixed-size chunks and decompressed on
+    the fly; either way the content goes through a temp file beside the
+    target. on_progress(received, total) is called as bytes arrive; total
+    is 0 when unknown. Returns the subtitle path or None if nothing was
+    downloaded.
+    """
+    target = get_unique_subtitle_path(video_path, language)
+    provider_name = getattr(subtitle, 'provider_name', None)
+    build_request = STREAM_REQUESTS.get(provider_name)
+
+    if build_request is not None:
+        provider = pool[provider_name]
+        session = getattr(provider, 'session', None)
+        if session is not None:
+            url, params = build_request(provider, subtitle)
+            with session.get(url, params=params, stream=True, timeout=getattr(provider, 'timeout', 30)) as response:
+                response.raise_for_status()
+                chunks = response.iter_content(CHUNK_SIZE)
+                if on_progress is not None:
+                    total = int(response.headers.get('Content-Length') or 0)
+                    chunks = _counted(chunks, on_progress, total)
+                return stream_to_file(chunks, target, select=select)
+
+    if not pool.download_subtitle(subtitle) or not subtitle.content:
+        return None
+    if on_progress is not None:
+        on_progress(len(subtitle.content), len(subtitle.content))
+    return stream_to_file(iter_chunks(subtitle.content), target, select=select)
@@ -0,0 +1,174 @@
+"""
+Bulk subtitle retiming and frame-rate conversion
+"""
+
+import codecs
+import io
+from array import array
+from concurrent.futures import FIRST_COMPLETED, wait
+from pathlib import Path
+
+from .cpu import CPUPool
+from .download import atomic_write, iter_chunks
+from .encoding import detect_encoding
+from .scanner import scan_folder
+from .subtitles import PARSERS, detect_format, rewrite_timings
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+SUBTITLE_SUFFIXES = {'.srt', '.vtt', '.ass', '.ssa'}
+
+# Output is encoded in batches of lines to keep writes large but memory flat
+WRITE_BATCH_LINES = 1024
+
+def is_subtitle_file(file_path):
+    """Checks if a file is a subtitle format that can be retimed"""
+    return Path(file_path).suffix.lower() in SUBTITLE_SUFFIXES
+
+def fps_scale(source_fps, target_fps):
+    """Returns the time scale converting cues timed for source_fps to target_fps
+
+    A subtitle made for a 25 fps (PAL) release has to be stretched by
+    25 / 23.976 to stay in sync with a 23.976 fps video.
+    """
+    if source_fps <= 0 or target_fps <= 0:
+        raise ValueError("Frame rates must be positive")
+    return source_fps / target_fps
+
+def two_point_transform(first, second):
+    """Solves scale and offset from two (subtitle_ms, video_ms) sync points"""
+    (sub_a, video_a), (sub_b, video_b) = first, second
+    if sub_a == sub_b:
+        raise ValueError("Sync points must be at different subtitle times")
+    scale = (video_b - video_a) / (sub_b - sub_a)
+    return scale, video_a - sub_a * scale
+
+def retime_times(times, scale=1.0, offset_ms=0):
+    """Applies t * scale + offset to an array of millisecond times
+
+    With NumPy installed the whole column is transformed in one vectorized
+    operation over the array's buffer; otherwise it falls back to a loop.
+    Times are rounded to whole milliseconds and clamped at zero.
+    """
+    if numpy is not None:
+        values = numpy.frombuffer(times, dtype=numpy.int64)
+        result = numpy.rint(values * scale + offset_ms)
+        numpy.maximum(result, 0, out=result)
+        return array('q', result.astype(numpy.int64).tobytes())
+
+    return array('q', (max(int(round(t * scale + offset_ms)), 0) for t in times))
+
+def _source_encoding(data):
+    """Returns the encoding to read a subtitle in and write it back with
+
+    Retiming only rewrites digits, so files keep their encoding (and BOM);
+    ASCII files are read and written as UTF-8.
+    """
+    encoding = detect_encoding(data)
+    return 'utf-8' if encoding == 'ascii' else encoding
+
+def _encoded_batches(lines, encoding='utf-8'):
+    # Incremental, so a BOM is only written once at the start
+    encoder = codecs.getincrementalencoder(encoding)(errors='replace')
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= WRITE_BATCH_LINES:
+            yield encoder.encode(''.join(batch))
+            batch = []
+    yield encoder.encode(''.join(batch), final=True)
+
+def retime_file(subtitle_path, scale=1.0, offset_ms=0, output_path=None):
+    """Retimes one subtitle file; returns the number of cues changed
+
+    The output is written in the source file's encoding.
+    """
+    subtitle_path = Path(subtitle_path)
+    output_path = Path(output_path or subtitle_path)
+
+    encoding = _source_encoding(subtitle_path.read_bytes())
+    with open(subtitle_path, 'r', encoding=encoding, errors='replace', newline='') as f:
+        subtitle_format = detect_format(subtitle_path, f.readline())
+        f.seek(0)
+        cues = PARSERS[subtitle_format](f)
+
+    if not len(cues):
+        return 0
+
+    starts = retime_times(cues.starts, scale, offset_ms)
+    ends = retime_times(cues.ends, scale, offset_ms)
+
+    with open(subtitle_path, 'r', encoding=encoding, errors='replace', newline='') as f:
+        atomic_write(output_path, _encoded_batches(rewrite_timings(f, subtitle_format, starts, ends), encoding))
+
+    return len(cues)
+
+def retime_data(data, name, scale=1.0, offset_ms=0):
+    """Retimes subtitle bytes held in memory; returns (bytes, cues changed)
+
+    The bytes are in the source encoding, or None when there are no cues
+    to change. This is the form retime_directory sends to worker processes.
+    """
+    encoding = _source_encoding(data)
+    lines = io.StringIO(data.decode(encoding, errors='replace'), newline='')
+    subtitle_format = detect_format(name, lines.readline())
+    lines.seek(0)
+    cues = PARSERS[subtitle_format](lines)
+
+    if not len(cues):
+        return None, 0
+
+    starts = retime_times(cues.starts, scale, offset_ms)
+    ends = retime_times(cues.ends, scale, offset_ms)
+    lines.seek(0)
+    return b''.join(_encoded_batches(rewrite_timings(lines, subtitle_format, starts, ends), encoding)), len(cues)
+
+def retime_directory(folder_path, scale=1.0, offset_ms=0, recursive=False, workers=0):
+    """Retimes every subtitle file in a folder
+
+    Returns a dict mapping each file to its result, like batch_download.
+    With workers, files are read and written here while the retiming runs
+    on that many worker processes, at most twice workers files at a time.
+    """
+    results = {}
+    if not workers:
+        for subtitle_path in scan_folder(folder_path, is_subtitle_file, recursive):
+            try:
+                count = retime_file(subtitle_path, scale, offset_ms)
+                results[subtitle_path] = {"success": True, "message": f"{count} cues retimed"}
+            except (OSError, ValueError) as e:
+                results[subtitle_path] = {"success": False, "message": str(e)}
+        return results
+
+    pool = CPUPool(workers)
+    pending = {}
+
+    def collect(limit):
+        while len(pending) > limit:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                subtitle_path = pending.pop(future)
+                try:
+                    data, count = future.result()
+                    if data is not None:
+                        atomic_write(subtitle_path, iter_chunks(data))
+                    results[subtitle_path] = {"success": True, "message": f"{count} cues retimed"}
+                except (OSError, ValueError) as e:
+                    results[subtitle_path] = {"success": False, "message": str(e)}
+
+    try:
+        for subtitle_path in scan_folder(folder_path, is_subtitle_file, recursive):
+            try:
+                data = Path(subtitle_path).read_bytes()
+            except OSError as e:
+                results[subtitle_path] = {"success": False, "message": str(e)}
+                continue
+            collect(workers * 2 - 1)
+            pending[pool.submit(retime_data, data, Path(subtitle_path).name, scale, offset_ms)] = subtitle_path
+        collect(0)
+    finally:
+        pool.shutdown()
+    return results
@@ -0,0 +1,140 @@
+"""
+Folder scanning for batch operations
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+
+from .cache import get_cache_dir
+
+SCAN_TREE_FILE = "scan-tree.json"
+# Every tree is listed in full again at least this often
+FULL_RESCAN_INTERVAL = 7 * 24 * 3600
+# Directories modified this close to the scan may change again within the
+# same mtime tick, so they are listed again next time
+RACY_WINDOW_NS = 2 * 10**9
+
+class ScanTree:
+    """Persisted (path, mtime_ns, children) entries for scanned directories
+
+    A directory's mtime changes whenever an entry is added, removed or
+    renamed in it, so a directory whose mtime matches the stored one can
+    be reused without listing it. Subdirectories are still stat'ed,
+    because a change deep in the tree does not touch its ancestors.
+    Only the files the predicate accepted are stored, so entries are
+    reused only by scans of the same root with the same predicate.
+    Each scanned root also records when it was last listed in full; after
+    full_rescan_interval seconds the stored entries are ignored once.
+    """
+
+    def __init__(self, cache_file=None, full_rescan_interval=FULL_RESCAN_INTERVAL):
+        self.cache_file = Path(cache_file) if cache_file else get_cache_dir() / SCAN_TREE_FILE
+        self.full_rescan_interval = full_rescan_interval
+        self.roots = {}
+        self.listed = 0
+
+    def load(self):
+        """Loads the persisted tree; returns False if missing or unreadable"""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                roots = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if not isinstance(roots, dict):
+            return False
+        self.roots = roots
+        return True
+
+    def save(self):
+        """Persists the tree, replacing the file atomically
+
+        Roots that no longer exist are dropped first.
+        """
+        self.roots = {root: stored for root, stored in self.roots.items() if os.path.isdir(root)}
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_name(self.cache_file.name + ".tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.roots, f, ensure_ascii=False)
+            os.replace(tmp_file, self.cache_file)
+            return True
+        except OSError:
+            return False
+
+    def begin(self, root, recursive, predicate):
+        """Starts a scan of root; returns the stored entries to reuse"""
+        stored = self.roots.get(root)
+        if not stored or stored.get("recursive") != recursive or stored.get("predicate") != predicate:
+            return {}
+        if time.time() - stored.get("full_scan_at", 0) > self.full_rescan_interval:
+            return {}
+        return stored.get("dirs", {})
+
+    def finish(self, root, recursive, predicate, dirs, full_scan):
+        """Replaces root's entries with the directories visited by a completed scan"""
+        stored = self.roots.get(root) or {}
+        self.roots[root] = {
+            "recursive": recursive,
+            "predicate": predicate,
+            "full_scan_at": time.time() if full_scan else stored.get("full_scan_at", 0),
+            "dirs": dirs
+        }
+
+def list_directory(path, predicate):
+    """Returns sorted (subdirectory names, accepted file names), skipping hidden entries"""
+    dirs, files = [], []
+    with os.scandir(path) as entries:
+        for entry in sorted(entries, key=lambda entry: entry.name):
+            if entry.name.startswith('.'):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                dirs.append(entry.name)
+            elif entry.is_file() and predicate(entry.path):
+                files.append(entry.name)
+    return dirs, files
+
+def scan_folder(folder_path, predicate, recursive=False, tree=None):
+    """Yields paths of files in a folder accepted by predicate
+
+    Entries are read with os.scandir so directory listings don't need an
+    extra stat call per file. Hidden files and folders are skipped.
+
+    With a ScanTree, directories whose mtime is unchanged since the last
+    scan are not listed again; their stored children are used instead.
+    The tree is updated once the scan runs to completion.
+    """
+    root = os.path.abspath(folder_path)
+    predicate_name = f"{predicate.__module__}.{predicate.__qualname__}"
+    stored = tree.begin(root, recursive, predicate_name) if tree is not None else {}
+    visited = {}
+    racy_before = time.time_ns() - RACY_WINDOW_NS
+    pending = [str(folder_path)]
+
+    while pending:
+        current = pending.pop()
+        try:
+            if tree is None:
+                dirs, files = list_directory(current, predicate)
+            else:
+                key = os.path.abspath(current)
+                mtime_ns = os.stat(current).st_mtime_ns
+                entry = stored.get(key)
+                if entry is not None and entry[0] == mtime_ns:
+                    dirs, files = entry[1], entry[2]
+                else:
+                    dirs, files = list_directory(current, predicate)
+                    tree.listed += 1
+                visited[key] = [mtime_ns if mtime_ns < racy_before else -1, dirs, files]
+        except OSError:
+            continue
+
+        for name in files:
+            yield os.path.join(current, name)
+        if recursive:
+            pending.extend(os.path.join(current, name) for name in dirs)
+
+    if tree is not None:
+        tree.finish(root, recursive, predicate_name, visited, full_scan=not stored)
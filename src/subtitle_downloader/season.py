@@ -0,0 +1,272 @@
+"""
+Season-level batched subtitle search for episodic folders
+"""
+
+import inspect
+import re
+from pathlib import Path
+
+from .cache import MemoCache, get_cache_dir
+from .download import SOLE_SUBTITLE, is_subtitle_name
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+SUFFIX_PATTERN = re.compile(r'\([^)]*\)')
+EPISODE_PATTERN = re.compile(r's(\d{1,2})[ ._-]*e(\d{1,3})', re.IGNORECASE)
+
+# Episode numbering in archive member names: S01E02, 1x02, then E02 / Ep 2 / Episode 2
+MEMBER_EPISODE_PATTERNS = (
+    EPISODE_PATTERN,
+    re.compile(r'(?<!\d)(\d{1,2})x(\d{1,3})(?!\d)', re.IGNORECASE),
+    re.compile(r'(?<![a-z\d])e(?:p|pisode)?[ ._-]*(\d{1,3})(?!\d)', re.IGNORECASE),
+)
+
+# Tokens that appear in almost every release name and say nothing about the release
+IGNORED_TOKENS = {'srt', 'sub', 'subs', 'mkv', 'mp4', 'avi'}
+
+PARSE_CACHE_FILE = "parse-cache.json"
+PARSE_CACHE_SIZE = 50000
+
+_parse_cache = MemoCache(PARSE_CACHE_SIZE)
+_parse_cache_warmed = False
+
+def _plain(value):
+    """Converts guessit values (Language, Country, ...) to JSON-safe types"""
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    return str(value)
+
+def get_parse_cache_file():
+    """Returns the location of the persisted parse cache"""
+    return get_cache_dir() / PARSE_CACHE_FILE
+
+def warm_parse_cache(persist=True):
+    """Loads persisted parse results and compiles guessit once per process"""
+    global _parse_cache_warmed
+    if _parse_cache_warmed:
+        return
+    _parse_cache_warmed = True
+
+    if persist:
+        _parse_cache.load(get_parse_cache_file())
+
+    # guessit builds its regex rules on first use
+    try:
+        from guessit import guessit
+        guessit("Warmup.S01E01.720p.mkv")
+    except Exception:
+        pass
+
+def save_parse_cache():
+    """Persists the parse cache next to the other caches"""
+    return _parse_cache.save(get_parse_cache_file())
+
+def parse_video_name(file_path):
+    """Parses title, season and episode information from a video filename
+
+    Results are memoized by basename, so repeated lookups in the same batch
+    (or across runs once the cache is persisted) skip guessit entirely.
+    """
+    name = Path(file_path).name
+    info = _parse_cache.get(name)
+    if info is None:
+        from guessit import guessit
+        info = {key: _plain(value) for key, value in guessit(name).items()}
+        _parse_cache.put(name, info)
+    return dict(info)
+
+def title_key(title):
+    """Normalizes a series title for comparison, ignoring a '(2019)' or '(US)' suffix"""
+    return ' '.join(TOKEN_PATTERN.findall(SUFFIX_PATTERN.sub(' ', str(title or '')).lower()))
+
+def series_key(info):
+    """Builds a grouping key for the series a parsed video belongs to"""
+    title = title_key(info.get('title', ''))
+    country = str(info.get('country', '')).lower()
+    year = str(info.get('year', ''))
+    return (title, country, year)
+
+def group_by_season(file_paths, min_episodes=2):
+    """Groups episode files by series and season
+
+    Returns a tuple (groups, others) where groups maps (series_key, season)
+    to a list of (file_path, info) tuples and others lists files that must be
+    searched individually.
+    """
+    groups = {}
+    others = []
+
+    for file_path in file_paths:
+        try:
+            info = parse_video_name(file_path)
+        except Exception:
+            others.append(file_path)
+            continue
+
+        season = info.get('season')
+        episode = info.get('episode')
+        if (info.get('type') != 'episode' or not info.get('title')
+                or not isinstance(season, int) or not isinstance(episode, int)):
+            others.append(file_path)
+            continue
+
+        key = (series_key(info), season)
+        groups.setdefault(key, []).append((file_path, info))
+
+    # A season query only pays off when it replaces several episode queries
+    for key in list(groups):
+        if len(groups[key]) < min_episodes:
+            others.extend(file_path for file_path, _ in groups.pop(key))
+
+    return groups, others
+
+def sibling_episodes(file_path, file_paths):
+    """Returns the other episodes of file_path's series and season among file_paths
+
+    Later episodes come first, in order, then the earlier ones.
+    """
+    groups, _ = group_by_season([file_path] + [path for path in file_paths if path != file_path], 1)
+    for episodes in groups.values():
+        if episodes[0][0] == file_path:
+            current = episodes[0][1]['episode']
+            siblings = sorted(episodes[1:], key=lambda episode: (episode[1]['episode'] <= current, episode[1]['episode']))
+            return [path for path, _ in siblings]
+    return []
+
+def release_tokens(name):
+    """Splits a release name into lowercase tokens"""
+    return set(TOKEN_PATTERN.findall(str(name or '').lower())) - IGNORED_TOKENS
+
+def subtitle_episode(subtitle):
+    """Returns the episode number a subtitle was released for, if known"""
+    for attr in ('series_episode', 'episode'):
+        value = getattr(subtitle, attr, None)
+        if isinstance(value, int):
+            return value
+
+    match = EPISODE_PATTERN.search(subtitle_release_name(subtitle))
+    if match:
+        return int(match.group(2))
+    return None
+
+def subtitle_season(subtitle):
+    """Returns the season number a subtitle was released for, if known"""
+    for attr in ('series_season', 'season'):
+        value = getattr(subtitle, attr, None)
+        if isinstance(value, int):
+            return value
+
+    match = EPISODE_PATTERN.search(subtitle_release_name(subtitle))
+    if match:
+        return int(match.group(1))
+    return None
+
+def subtitle_series(subtitle):
+    """Returns the series title a subtitle was released for, or ''"""
+    for attr in ('series', 'series_name', 'title'):
+        value = getattr(subtitle, attr, None)
+        if value:
+            return str(value)
+    return ''
+
+def subtitle_release_name(subtitle):
+    """Returns the most descriptive release name a subtitle carries"""
+    for attr in ('movie_release_name', 'release_info', 'filename', 'release'):
+        value = getattr(subtitle, attr, None)
+        if value:
+            return str(value)
+    return ''
+
+def match_episodes(subtitles, episodes):
+    """Matches season search results to local episodes
+
+    Subtitles are matched by episode number first and then ranked by how many
+    release tokens they share with the video filename. A subtitle known to be
+    from another season than the video is never matched. Returns a dict
+    mapping each matched file path to its ordered list of candidate subtitles.
+    """
+    by_episode = {}
+    for subtitle in subtitles:
+        number = subtitle_episode(subtitle)
+        if number is not None:
+            by_episode.setdefault(number, []).append(subtitle)
+
+    matches = {}
+    for file_path, info in episodes:
+        season = info.get('season')
+        candidates = [
+            subtitle for subtitle in by_episode.get(info.get('episode'), [])
+            if season is None or subtitle_season(subtitle) in (None, season)
+        ]
+        if not candidates:
+            continue
+
+        video_tokens = release_tokens(Path(file_path).stem)
+        matches[file_path] = sorted(
+            candidates,
+            key=lambda subtitle: len(video_tokens & release_tokens(subtitle_release_name(subtitle))),
+            reverse=True
+        )
+
+    return matches
+
+def member_episode(name):
+    """Returns the episode number in an archive member's file name, or None"""
+    base_name = name.replace('\\', '/').rsplit('/', 1)[-1]
+    for pattern in MEMBER_EPISODE_PATTERNS:
+        match = pattern.search(base_name)
+        if match:
+            return int(match.group(match.lastindex))
+    return None
+
+def episode_selector(episode):
+    """Builds an archive member filter that picks one episode of a season pack
+
+    A subtitle without an episode number is only taken when it is the
+    archive's only subtitle.
+    """
+    def select(name):
+        if not is_subtitle_name(name):
+            return False
+        number = member_episode(name)
+        if number is None:
+            return SOLE_SUBTITLE
+        return number == episode
+    return select
+
+def supports_season_query(provider):
+    """Checks if a provider can search a whole season in one query
+
+    Only series-and-season queries like Addic7ed's qualify. OpenSubtitles
+    and Podnapisi drop the season unless an episode is given too, which
+    turns the search into a title-only one across every season.
+    """
+    query = getattr(provider, 'query', None)
+    if query is None or not hasattr(provider, 'get_show_id'):
+        return False
+    try:
+        parameters = inspect.signature(query).parameters
+    except (TypeError, ValueError):
+        return False
+    return 'series' in parameters and 'season' in parameters
+
+def search_season(provider, title, season, languages):
+    """Issues one season-scoped query; returns None if unsupported
+
+    Only results for that season of that series, in one of the languages,
+    are returned.
+    """
+    if not supports_season_query(provider):
+        return None
+    show_id = provider.get_show_id(title)
+    if show_id is None:
+        return []
+
+    wanted = title_key(title)
+    return [
+        subtitle for subtitle in provider.query(show_id, series=title, season=season)
+        if subtitle.language in languages
+        and subtitle_season(subtitle) == season
+        and title_key(subtitle_series(subtitle)) == wanted
+    ]
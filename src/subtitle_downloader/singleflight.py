@@ -0,0 +1,216 @@
+"""
+Coalescing of concurrent downloads for the same video
+
+Double-clicking the context-menu entry, or a watcher and a batch picking
+up the same file, would otherwise each search and write another numbered
+subtitle. Callers in one process share a single run through SingleFlight.
+Separate processes take turns on an advisory LockFile, and a process that
+had to wait reuses the result the holder recorded in it. Lock files
+nobody has touched for a day are swept away.
+"""
+
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    # No advisory locks (Windows); processes are not coordinated
+    fcntl = None
+
+LOCK_POLL_SECONDS = 0.1
+
+# Lock files unused this long are removed; a prefetch record must outlive
+# the gap until the user asks for the next episode
+LOCK_MAX_AGE = 24 * 3600
+LOCK_SWEEP_INTERVAL = 3600
+SWEEP_MARKER = ".swept"
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Runs one call per key at a time; concurrent callers with that key share it"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def run(self, key, fn, cancel=None):
+        """Returns (fn's result, shared)
+
+        The first caller for a key runs fn; callers arriving before it ends
+        wait and get the same result, or exception, with shared set. A
+        waiting caller raises Cancelled if its own CancelToken is cancelled.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            while not call.done.wait(LOCK_POLL_SECONDS):
+                if cancel is not None:
+                    cancel.check()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+class LockFile:
+    """Exclusive advisory lock shared across processes, holding the last holder's result
+
+    waited is True when another process held the lock on entry; its
+    result, if it recorded one, is then available from read_result().
+    previous holds whatever the last holder recorded, waited or not.
+    Where the file can't be created or locked the block runs unlocked.
+    """
+
+    def __init__(self, path, cancel=None):
+        self.path = path
+        self.cancel = cancel
+        self.waited = False
+        self.previous = None
+        self._file = None
+
+    def __enter__(self):
+        if fcntl is None:
+            return self
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, 'a+', encoding='utf-8')
+        except OSError:
+            return self
+
+        try:
+            while True:
+                try:
+                    fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    self.waited = True
+                    if self.cancel is not None:
+                        self.cancel.check()
+                        self.cancel.wait(LOCK_POLL_SECONDS)
+                    else:
+                        time.sleep(LOCK_POLL_SECONDS)
+                    continue
+                if self._is_current():
+                    break
+                # A sweep removed the file before we locked it; lock the new one
+                self._file.close()
+                self._file = open(self.path, 'a+', encoding='utf-8')
+        except OSError:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            return self
+        except BaseException:
+            self._file.close()
+            self._file = None
+            raise
+
+        self.previous = self._read()
+        # A holder that dies before recording leaves no stale result behind
+        self._write(None)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+    def _is_current(self):
+        try:
+            return os.stat(self.path).st_ino == os.fstat(self._file.fileno()).st_ino
+        except OSError:
+            return False
+
+    def _read(self):
+        self._file.seek(0)
+        try:
+            return json.loads(self._file.read() or 'null')
+        except ValueError:
+            return None
+
+    def _write(self, result):
+        self._file.seek(0)
+        self._file.truncate()
+        if result is not None:
+            json.dump(result, self._file)
+        self._file.flush()
+
+    def read_result(self):
+        """Returns the result the previous holder recorded if this process waited for it"""
+        if self._file is None or not self.waited:
+            return None
+        return self.previous
+
+    def write_result(self, result):
+        """Records a JSON-serializable result for processes waiting on the lock"""
+        if self._file is not None:
+            self._write(result)
+
+def sweep_locks(directory, max_age=LOCK_MAX_AGE, interval=LOCK_SWEEP_INTERVAL):
+    """Removes lock files in directory that nobody has used for max_age seconds
+
+    Runs at most once per interval, remembered through a marker file, and
+    skips locks that are held. Returns the number of files removed.
+    """
+    if fcntl is None:
+        return 0
+
+    now = time.time()
+    marker = os.path.join(directory, SWEEP_MARKER)
+    try:
+        if now - os.stat(marker).st_mtime < interval:
+            return 0
+    except OSError:
+        pass
+
+    try:
+        open(marker, 'a').close()
+        os.utime(marker)
+        names = os.listdir(directory)
+    except OSError:
+        return 0
+
+    removed = 0
+    for name in names:
+        if not name.endswith('.lock'):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            if now - os.fstat(fd).st_mtime < max_age:
+                continue
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            # LockFile re-checks the path after locking, so unlinking here
+            # can't leave two processes holding different files
+            if os.stat(path).st_ino == os.fstat(fd).st_ino:
+                os.unlink(path)
+                removed += 1
+        except OSError:
+            continue
+        finally:
+            os.close(fd)
+    return removed
@@ -0,0 +1,342 @@
+"""
+Streaming SRT, WebVTT and ASS parser with a compact cue model
+"""
+
+import io
+import re
+from array import array
+from pathlib import Path
+
+SRT_TIMING = re.compile(
+    r'\s*(\d+):(\d{1,2}):(\d{1,2})[,.](\d{1,3})\s*-->\s*(\d+):(\d{1,2}):(\d{1,2})[,.](\d{1,3})'
+)
+VTT_TIMING = re.compile(
+    r'\s*(?:(\d+):)?(\d{1,2}):(\d{1,2})\.(\d{1,3})\s*-->\s*(?:(\d+):)?(\d{1,2}):(\d{1,2})\.(\d{1,3})'
+)
+ASS_TIME = re.compile(r'(\d+):(\d{1,2}):(\d{1,2})[.:](\d{1,3})')
+ASS_OVERRIDE = re.compile(r'\{[^}]*\}')
+
+class Cue:
+    """A single cue; start and end are integer milliseconds"""
+
+    __slots__ = ('start', 'end', 'text')
+
+    def __init__(self, start, end, text):
+        self.start = start
+        self.end = end
+        self.text = text
+
+    def __repr__(self):
+        return f"Cue({self.start}, {self.end}, {self.text!r})"
+
+class CueList:
+    """Column-oriented cue storage
+
+    Start and end times live in integer arrays and all cue texts share one
+    string buffer, so thousands of cues cost a few bytes each instead of one
+    Python object per cue.
+    """
+
+    __slots__ = ('format', 'starts', 'ends', 'text', 'text_offsets', 'errors')
+
+    def __init__(self, format='srt'):
+        self.format = format
+        self.starts = array('q')
+        self.ends = array('q')
+        self.text = ''
+        self.text_offsets = array('q', [0])
+        # Blocks that looked like cues but could not be parsed
+        self.errors = 0
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        return Cue(self.starts[index], self.ends[index], self.cue_text(index))
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def cue_text(self, index):
+        """Returns the text of one cue as a slice of the shared buffer"""
+        return self.text[self.text_offsets[index]:self.text_offsets[index + 1]]
+
+    @property
+    def last_end(self):
+        """Returns the latest end time of any cue, in milliseconds"""
+        return max(self.ends) if self.ends else 0
+
+class _CueBuilder:
+    """Accumulates parsed cues and packs their texts into one buffer"""
+
+    def __init__(self, format):
+        self.cues = CueList(format)
+        self._texts = []
+        self._length = 0
+
+    def add(self, start, end, text):
+        self.cues.starts.append(start)
+        self.cues.ends.append(end)
+        self._texts.append(text)
+        self._length += len(text)
+        self.cues.text_offsets.append(self._length)
+
+    def finish(self):
+        self.cues.text = ''.join(self._texts)
+        self._texts = []
+        return self.cues
+
+def _to_ms(hours, minutes, seconds, fraction):
+    # '5' means 500ms in '00:00:01,5', so pad fractions to milliseconds
+    return ((int(hours or 0) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(fraction.ljust(3, '0'))
+
+def _parse_blocks(lines, timing, format):
+    """Parses SRT-like blocks: optional identifier, timing line, text lines"""
+    builder = _CueBuilder(format)
+    start = end = None
+    text_lines = []
+    block_lines = 0
+
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if not line.strip():
+            if start is not None:
+                builder.add(start, end, '\n'.join(text_lines))
+            elif block_lines:
+                builder.cues.errors += 1
+            start = end = None
+            text_lines = []
+            block_lines = 0
+            continue
+
+        if start is None:
+            match = timing.match(line)
+            if match:
+                groups = match.groups()
+                start = _to_ms(*groups[:4])
+                end = _to_ms(*groups[4:])
+            block_lines += 1
+        else:
+            text_lines.append(line)
+
+    if start is not None:
+        builder.add(start, end, '\n'.join(text_lines))
+    elif block_lines:
+        builder.cues.errors += 1
+
+    return builder.finish()
+
+def parse_srt(lines):
+    """Parses SubRip cues from an iterable of lines"""
+    return _parse_blocks(lines, SRT_TIMING, 'srt')
+
+def parse_vtt(lines):
+    """Parses WebVTT cues from an iterable of lines"""
+    lines = iter(lines)
+    for line in lines:
+        # Skip the header block
+        if not line.strip():
+            break
+    cues = _parse_blocks(lines, VTT_TIMING, 'vtt')
+    # NOTE, STYLE and REGION blocks have no timing line but are not errors
+    cues.errors = 0
+    return cues
+
+def _parse_ass_time(value):
+    match = ASS_TIME.match(value.strip())
+    if match is None:
+        raise ValueError(f"Invalid ASS time: {value}")
+    hours, minutes, seconds, centiseconds = match.groups()
+    return ((int(hours) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(centiseconds.ljust(2, '0')[:2]) * 10
+
+def ass_plain_text(text):
+    """Strips ASS override tags and converts line breaks"""
+    return ASS_OVERRIDE.sub('', text).replace('\\N', '\n').replace('\\n', '\n').replace('\\h', ' ')
+
+def parse_ass(lines):
+    """Parses dialogue events of an ASS/SSA script from an iterable of lines"""
+    builder = _CueBuilder('ass')
+    fields = None
+    in_events = False
+
+    for line in lines:
+        line = line.strip()
+        if line.startswith('['):
+            in_events = line.lower() == '[events]'
+            continue
+        if not in_events:
+            continue
+
+        key, _, value = line.partition(':')
+        key = key.strip().lower()
+        if key == 'format':
+            fields = [field.strip().lower() for field in value.split(',')]
+        elif key == 'dialogue' and fields:
+            values = value.split(',', len(fields) - 1)
+            if len(values) != len(fields):
+                builder.cues.errors += 1
+                continue
+            event = dict(zip(fields, values))
+            try:
+                start = _parse_ass_time(event['start'])
+                end = _parse_ass_time(event['end'])
+            except (KeyError, ValueError):
+                builder.cues.errors += 1
+                continue
+            builder.add(start, end, ass_plain_text(event.get('text', '')))
+
+    return builder.finish()
+
+PARSERS = {
+    'srt': parse_srt,
+    'vtt': parse_vtt,
+    'ass': parse_ass,
+    'ssa': parse_ass,
+}
+
+def detect_format(subtitle_path, first_line=''):
+    """Detects the subtitle format from content, then the file extension"""
+    first_line = first_line.lstrip('\ufeff').strip()
+    if first_line.startswith('WEBVTT'):
+        return 'vtt'
+    if first_line.lower() == '[script info]':
+        return 'ass'
+    suffix = Path(subtitle_path).suffix.lower().lstrip('.')
+    return suffix if suffix in PARSERS else 'srt'
+
+def parse_subtitle(subtitle_path):
+    """Parses a subtitle file into a CueList, streaming it line by line"""
+    with open(subtitle_path, 'r', encoding='utf-8', errors='replace', newline='') as f:
+        first_line = f.readline()
+        subtitle_format = detect_format(subtitle_path, first_line)
+        f.seek(0)
+        return PARSERS[subtitle_format](f)
+
+def parse_subtitle_data(data, name=''):
+    """Parses subtitle bytes already in memory into a CueList
+
+    name is only used to guess the format when the content doesn't say.
+    """
+    lines = io.StringIO(data.decode('utf-8', errors='replace'), newline='')
+    subtitle_format = detect_format(name, lines.readline())
+    lines.seek(0)
+    return PARSERS[subtitle_format](lines)
+
+def format_srt_time(ms):
+    """Formats milliseconds as an SRT timestamp"""
+    hours, ms = divmod(max(int(ms), 0), 3600000)
+    minutes, ms = divmod(ms, 60000)
+    seconds, ms = divmod(ms, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{ms:03d}"
+
+def format_vtt_time(ms):
+    """Formats milliseconds as a WebVTT timestamp"""
+    return format_srt_time(ms).replace(',', '.')
+
+def format_ass_time(ms):
+    """Formats milliseconds as an ASS timestamp (centisecond precision)"""
+    centiseconds = (max(int(ms), 0) + 5) // 10
+    hours, centiseconds = divmod(centiseconds, 360000)
+    minutes, centiseconds = divmod(centiseconds, 6000)
+    seconds, centiseconds = divmod(centiseconds, 100)
+    return f"{hours}:{minutes:02d}:{seconds:02d}.{centiseconds:02d}"
+
+def _rewrite_blocks(lines, timing, format_time, starts, ends):
+    """Replaces timing lines of SRT-like blocks, in the parser's cue order"""
+    index = 0
+    in_cue = False
+
+    for line in lines:
+        content = line.rstrip('\r\n')
+        if not content.strip():
+            in_cue = False
+        elif not in_cue:
+            match = timing.match(content)
+            if match:
+                indent = content[:len(content) - len(content.lstrip())]
+                new_timing = f"{format_time(starts[index])} --> {format_time(ends[index])}"
+                line = indent + new_timing + line[match.end():]
+                index += 1
+                in_cue = True
+        yield line
+
+def _rewrite_vtt(lines, starts, ends):
+    lines = iter(lines)
+    for line in lines:
+        yield line
+        if not line.strip():
+            break
+    yield from _rewrite_blocks(lines, VTT_TIMING, format_vtt_time, starts, ends)
+
+def _rewrite_ass(lines, starts, ends):
+    index = 0
+    fields = None
+    in_events = False
+
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith('['):
+            in_events = stripped.lower() == '[events]'
+        elif in_events:
+            key, colon, value = line.partition(':')
+            key = key.strip().lower()
+            if key == 'format':
+                fields = [field.strip().lower() for field in value.split(',')]
+            elif key == 'dialogue' and fields:
+                values = value.split(',', len(fields) - 1)
+                event = dict(zip(fields, values))
+                try:
+                    if len(values) != len(fields):
+                        raise ValueError
+                    _parse_ass_time(event['start'])
+                    _parse_ass_time(event['end'])
+                except (KeyError, ValueError):
+                    # The parser skipped this event as well
+                    yield line
+                    continue
+                values[fields.index('start')] = format_ass_time(starts[index])
+                values[fields.index('end')] = format_ass_time(ends[index])
+                # Keep the text field's line ending untouched
+                line = line[:len(line) - len(value)] + ','.join(values)
+                index += 1
+        yield line
+
+def rewrite_timings(lines, subtitle_format, starts, ends):
+    """Streams subtitle lines back out with new cue times
+
+    Everything except the timestamps (styling, cue settings, identifiers,
+    line endings) is passed through unchanged.
+    """
+    if subtitle_format == 'vtt':
+        return _rewrite_vtt(lines, starts, ends)
+    if subtitle_format in ('ass', 'ssa'):
+        return _rewrite_ass(lines, starts, ends)
+    return _rewrite_blocks(lines, SRT_TIMING, format_srt_time, starts, ends)
+
+def validate_cues(cues):
+    """Checks parsed cues for emptiness and corrupted timings"""
+    if not len(cues):
+        return False, "No subtitle cues found"
+
+    if cues.errors > len(cues):
+        return False, f"Corrupted subtitle: {cues.errors} unreadable blocks"
+
+    invalid = sum(1 for start, end in zip(cues.starts, cues.ends) if end < start)
+    if invalid * 2 > len(cues):
+        return False, f"Corrupted subtitle: {invalid} cues end before they start"
+
+    if not cues.text.strip():
+        return False, "Subtitle has no text"
+
+    return True, f"{len(cues)} cues"
+
+def validate_subtitle(subtitle_path):
+    """Parses and validates a subtitle file; returns (valid, message)"""
+    try:
+        cues = parse_subtitle(subtitle_path)
+    except (OSError, ValueError) as e:
+        return False, f"Unreadable subtitle: {e}"
+    return validate_cues(cues)
@@ -1,6 +1,8 @@
 import os
+import stat
 import subprocess
 from pathlib import Path
+from .probe import sniff_video
 
 # Supported video extensions
 VIDEO_EXTENSIONS = {
@@ -9,10 +11,35 @@ VIDEO_EXTENSIONS = {
     '.m4v', '.mpg', '.mpe', '.mpv', '.qt', '.asf', '.ogm', '.dv'
 }
 
-def is_video_file(file_path):
-    """Checks if file is a common video file"""
-    path = Path(file_path)
-    return path.is_file() and path.suffix.lower() in VIDEO_EXTENSIONS
+# Extensions that are known not to be videos and are never sniffed
+OTHER_EXTENSIONS = {
+    '.srt', '.sub', '.idx', '.ass', '.ssa', '.vtt', '.smi', '.txt', '.nfo',
+    '.sfv', '.md5', '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.mp3',
+    '.flac', '.ogg', '.opus', '.m4a', '.aac', '.wav', '.pdf', '.json', '.xml',
+    '.py', '.sh', '.zip', '.rar', '.7z', '.gz', '.torrent', '.part', '.db'
+}
+
+def is_video_file(file_path, sniff=True):
+    """Checks if file is a common video file
+    
+    Known extensions are decided by a set lookup. Files with a missing or
+    unfamiliar extension are identified by their first bytes instead.
+    Directories, FIFOs and other non-regular files are never videos.
+    """
+    try:
+        if not stat.S_ISREG(os.stat(file_path).st_mode):
+            return False
+    except OSError:
+        # Paths that don't exist yet are judged by their extension
+        pass
+    
+    # os.path rather than pathlib, which interns every path part it parses
+    suffix = os.path.splitext(os.fspath(file_path))[1].lower()
+    if suffix in VIDEO_EXTENSIONS:
+        return True
+    if not sniff or suffix in OTHER_EXTENSIONS:
+        return False
+    return sniff_video(file_path) is not None
 
 def get_unique_subtitle_path(video_path, language):
     """Generates a unique filename for the subtitle"""
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Tests for the asyncio download API
+"""
+
+import unittest
+import tempfile
+import asyncio
+import os
+import sys
+import threading
+import time
+from unittest.mock import patch
+
+# Add the package to Python path
+package_dir = os.path.join(os.path.dirname(__file__), '..', 'src')
+sys.path.insert(0, os.path.abspath(package_dir))
+
+from subtitle_downloader.cancel import CancelToken
+from subtitle_downloader.core import SubtitleDownloader
+
+class TestAsyncDownloads(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.downloader = SubtitleDownloader(os.path.join(self.test_dir, 'config.json'))
+        self.downloader.config.override('download_workers', 4)
+        self.downloader.config.override('skip_embedded', False)
+
+    def tearDown(self):
+        import shutil
+        if self.downloader._executor is not None:
+            self.downloader._executor.shutdown()
+        shutil.rmtree(self.test_dir)
+
+    def test_many_pending_calls_share_a_bounded_pool(self):
+        """Test a thousand awaited downloads never use more than download_workers threads"""
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0, "threads": set()}
+
+        def download(file_path, progress=None, cancel=None):
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+                state["threads"].add(threading.get_ident())
+            time.sleep(0.001)
+            with lock:
+                state["active"] -= 1
+            return True, file_path
+
+        async def run():
+            calls = [self.downloader.download_for_file_async(f'{n}.mkv') for n in range(1000)]
+            return await asyncio.gather(*calls)
+
+        with patch.object(self.downloader, 'download_for_file', side_effect=download):
+            results = asyncio.run(run())
+
+        self.assertEqual(results, [(True, f'{n}.mkv') for n in range(1000)])
+        self.assertLessEqual(state["peak"], 4)
+        self.assertLessEqual(len(state["threads"]), 4)
+
+    def test_task_cancellation_cancels_the_download(self):
+        """Test cancelling the awaiting task cancels the token seen by the worker"""
+        started = threading.Event()
+        seen = {}
+
+        def download(file_path, progress=None, cancel=None):
+            seen["token"] = cancel
+            started.set()
+            cancel.wait(5)
+            return False, "Cancelled"
+
+        async def run():
+            task = asyncio.ensure_future(self.downloader.download_for_file_async('movie.mkv'))
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        with patch.object(self.downloader, 'download_for_file', side_effect=download):
+            asyncio.run(run())
+
+        self.assertTrue(seen["token"].cancelled)
+
+    def test_caller_token_and_progress(self):
+        """Test the caller's token reaches the worker and progress arrives on the loop thread"""
+        caller = CancelToken()
+        events = []
+
+        def download(file_path, progress=None, cancel=None):
+            progress('hashing')
+            caller.cancel()
+            return cancel.cancelled, "Cancelled"
+
+        async def run():
+            loop_thread = threading.get_ident()
+            result = await self.downloader.download_for_file_async(
+                'movie.mkv', progress=lambda event: events.append((event, threading.get_ident() == loop_thread)),
+                cancel=caller
+            )
+            await asyncio.sleep(0)
+            return result
+
+        with patch.object(self.downloader, 'download_for_file', side_effect=download):
+            self.assertEqual(asyncio.run(run()), (True, "Cancelled"))
+        self.assertEqual(events, [('hashing', True)])
+
+    def test_download_many_async_is_lazy(self):
+        """Test every file is yielded while at most jobs files are read ahead"""
+        consumed = []
+
+        def paths():
+            for n in range(50):
+                consumed.append(n)
+                yield os.path.join(self.test_dir, f'{n}.mkv')
+
+        async def run():
+            results = []
+            async for file_path, result in self.downloader.download_many_async(paths(), jobs=3):
+                # Input is pulled only as slots free up
+                self.assertLessEqual(len(consumed), len(results) + 4)
+                results.append((file_path, result))
+            return results
+
+        results = asyncio.run(run())
+
+        self.assertEqual(len(results), 50)
+        self.assertTrue(all(result == {"success": False, "message": "File not found"} for _, result in results))
+        self.assertEqual(sorted(file_path for file_path, _ in results),
+                         sorted(os.path.join(self.test_dir, f'{n}.mkv') for n in range(50)))
+
+    def test_closing_download_many_async_cancels_in_flight(self):
+        """Test leaving the async for early cancels the files still running"""
+        tokens = []
+
+        def download(file_path, progress=None, cancel=None):
+            tokens.append(cancel)
+            if file_path != 'fast.mkv':
+                cancel.wait(5)
+            return True, "done"
+
+        async def run():
+            stream = self.downloader.download_many_async(['slow.mkv', 'fast.mkv'], jobs=2)
+            async for file_path, _ in stream:
+                self.assertEqual(file_path, 'fast.mkv')
+                break
+            await stream.aclose()
+
+        with patch.object(self.downloader, 'download_for_file', side_effect=download):
+            asyncio.run(run())
+
+        self.assertTrue(all(token.cancelled for token in tokens))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests for bounded caches and filename parse memoization
+"""
+
+import unittest
+import tempfile
+import os
+import sys
+from types import ModuleType
+from unittest.mock import patch, MagicMock
+
+# Add the package to Python path
+package_dir = os.path.join(os.path.dirname(__file__), '..', 'src')
+sys.path.insert(0, os.path.abspath(package_dir))
+
+from subtitle_downloader.cache import MemoCache
+from subtitle_downloader import season
+
+class TestMemoCache(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.test_dir)
+
+    def test_cache_is_bounded(self):
+        """Test least recently used entries are evicted"""
+        cache = MemoCache(maxsize=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertEqual(cache.get('b', 'missing'), 'missing')
+
+    def test_cache_persistence(self):
+        """Test entries survive a save/load round trip"""
+        cache_file = os.path.join(self.test_dir, 'nested', 'cache.json')
+        cache = MemoCache()
+        cache.put('Show.S01E01.mkv', {'title': 'Show', 'season': 1})
+
+        self.assertTrue(cache.save(cache_file))
+
+        loaded = MemoCache()
+        self.assertTrue(loaded.load(cache_file))
+        self.assertEqual(loaded.get('Show.S01E01.mkv'), {'title': 'Show', 'season': 1})
+
+    def test_load_invalid_file(self):
+        """Test unreadable cache files are ignored"""
+        cache_file = os.path.join(self.test_dir, 'cache.json')
+        with open(cache_file, 'w') as f:
+            f.write('not json')
+
+        cache = MemoCache()
+        self.assertFalse(cache.load(cache_file))
+        self.assertFalse(cache.load(os.path.join(self.test_dir, 'missing.json')))
+        self.assertEqual(len(cache), 0)
+
+class TestParseMemoization(unittest.TestCase):
+
+    def setUp(self):
+        season._parse_cache.clear()
+
+    def tearDown(self):
+        season._parse_cache.clear()
+
+    def test_parse_is_memoized_by_basename(self):
+        """Test guessit runs once per basename"""
+        fake_guessit = ModuleType('guessit')
+        fake_guessit.guessit = MagicMock(return_value={'title': 'Show', 'season': 1, 'country': object()})
+
+        with patch.dict(sys.modules, {'guessit': fake_guessit}):
+            first = season.parse_video_name('/a/Show.S01E01.mkv')
+            second = season.parse_video_name('/b/Show.S01E01.mkv')
+
+        self.assertEqual(fake_guessit.guessit.call_count, 1)
+        self.assertEqual(first, second)
+
+        # Values are stored in a JSON-safe form so the cache can be persisted
+        self.assertIsInstance(first['country'], str)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Tests for cooperative cancellation
+"""
+
+import unittest
+import tempfile
+import os
+import signal
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+# Add the package to Python path
+package_dir = os.path.join(os.path.dirname(__file__), '..', 'src')
+sys.path.insert(0, os.path.abspath(package_dir))
+
+from subtitle_downloader.cancel import CancelToken, Cancelled, cancel_on_interrupt
+from subtitle_downloader.core import SubtitleDownloader
+from subtitle_downloader.download import stream_to_file
+from subtitle_downloader.progress import ProgressReporter
+from subtitle_downloader.providers import _counted
+
+class TestCancelToken(unittest.TestCase):
+
+    def test_cancel_runs_callbacks_once(self):
+        """Test registered callbacks run once and only while registered"""
+        token = CancelToken()
+        active, finished = MagicMock(), MagicMock()
+
+        with token.on_cancel(finished):
+            pass
+        with token.on_cancel(active):
+            token.cancel()
+            token.cancel()
+
+        active.assert_called_once_with()
+        finished.assert_not_called()
+        self.assertTrue(token.cancelled)
+        with self.assertRaises(Cancelled):
+            token.check()
+
+    def test_callback_after_cancel_runs_immediately(self):
+        """Test registering on a cancelled token releases the resource at once"""
+        token = CancelToken()
+        token.cancel()
+        callback = MagicMock()
+
+        with token.on_cancel(callback):
+            callback.assert_called_once_with()
+
+    def test_first_interrupt_cancels(self):
+        """Test Ctrl-C cancels the token and a second one interrupts"""
+        token = CancelToken()
+        with cancel_on_interrupt(token):
+            os.kill(os.getpid(), signal.SIGINT)
+            self.assertTrue(token.wait(1))
+            with self.assertRaises(KeyboardInterrupt):
+                os.kill(os.getpid(), signal.SIGINT)
+                token.wait(1)
+
+class TestEngineCancellation(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.video_path = os.path.join(self.test_dir, 'movie.mkv')
+        Path(self.video_path).touch()
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.test_dir)
+
+    def test_cancelled_stream_leaves_no_temp_file(self):
+        """Test aborting between chunks removes the partial download"""
+        token = CancelToken()
+        reporter = ProgressReporter(self.video_path, cancel=token)
+        on_progress = reporter.bytes_callback('Downloading')
+
+        def chunks():
+            yield b'1\n00:00:01,000 --> 00:00:02,000\n'
+            token.cancel()
+            yield b'Hello\n'
+
+        with self.assertRaises(Cancelled):
+            stream_to_file(_counted(chunks(), on_progress), Path(self.test_dir) / 'movie.en.srt')
+
+        self.assertEqual(os.listdir(self.test_dir), ['movie.mkv'])
+
+    @patch('subtitle_downloader.core.download_to_file')
+    @patch('subtitle_downloader.core.rank_subtitles', side_effect=lambda subtitles, video: subtitles)
+    @patch('subtitle_downloader.core.scan_video')
+    @patch('subtitle_downloader.core.open_pool')
+    def test_cancel_during_download(self, mock_pool, mock_scan, mock_rank, mock_download):
+        """Test cancelling mid-download closes sessions and stops every candidate"""
+        token = CancelToken()
+        pool = mock_pool.return_value.__enter__.return_value
+        provider = MagicMock()
+        pool.initialized_providers = {'podnapisi': provider}
+        pool.list_subtitles.return_value = [MagicMock(), MagicMock()]
+
+        def download(pool, subtitle, file_path, language, select, on_progress):
+            token.cancel()
+            on_progress(10, 100)
+        mock_download.side_effect = download
+
+        downloader = SubtitleDownloader(os.path.join(self.test_dir, 'config.json'))
+        success, message = downloader.download_for_file(self.video_path, cancel=token)
+
+        self.assertFalse(success)
+        self.assertEqual(message, 'Cancelled')
+        self.assertEqual(mock_download.call_count, 1)
+        provider.session.close.assert_called_once_with()
+
+    @patch('subtitle_downloader.core.open_pool')
+    def test_cancelled_before_start(self, mock_pool):
+        """Test queued files end immediately once the run is cancelled"""
+        token = CancelToken()
+        token.cancel()
+
+        downloader = SubtitleDownloader(os.path.join(self.test_dir, 'config.json'))
+
+        self.assertEqual(downloader.download_for_file(self.video_path, cancel=token), (False, 'Cancelled'))
+        mock_pool.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for the coordinator/worker batch mode
+"""
+
+import unittest
+import multiprocessing
+import os
+import sys
+import time
+
+# Add the package to Python path
+package_dir = os.path.join(os.path.dirname(__file__), '..', 'src')
+sys.path.insert(0, os.path.abspath(package_dir))
+
+from subtitle_downloader.coordinator import Coordinator, JobQueue, post_json, run_worker
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class FakeDownloader:
+    """Stands in for SubtitleDownloader inside worker processes"""
+
+    def download_result(self, file_path, cancel=None):
+        time.sleep(0.05)
+        return {"success": not file_path.endswith('bad.mkv'), "message": f"worker {os.getpid()}"}
+
+def worker_process(url, name):
+    run_worker(url, FakeDownloader(), worker=name)
+
+class TestJobQueue(unittest.TestCase):
+
+    def test_expired_lease_is_reassigned(self):
+        """Test a job whose worker stopped sending heartbeats goes to the next worker"""
+        clock = FakeClock()
+        jobs = JobQueue(['/v/a.mkv', '/v/b.mkv'], lease_seconds=10, clock=clock)
+
+        self.assertEqual(jobs.lease('w1'), (0, '/v/a.mkv'))
+        clock.now = 5
+        self.assertTrue(jobs.heartbeat(0, 'w1'))
+        clock.now = 14
+        self.assertEqual(jobs.lease('w2'), (1, '/v/b.mkv'))
+        self.assertIsNone(jobs.lease('w2'))
+
+        clock.now = 16
+        self.assertEqual(jobs.lease('w2'), (0, '/v/a.mkv'))
+        self.assertFalse(jobs.heartbeat(0, 'w1'))
+
+    def test_first_result_wins(self):
+        """Test a late result for a reassigned job is accepted once and duplicates are ignored"""
+        clock = FakeClock()
+        reported = []
+        jobs = JobQueue(['/v/a.mkv'], lease_seconds=10, on_result=lambda *args: reported.append(args), clock=clock)
+
+        jobs.lease('w1')
+        clock.now = 11
+        jobs.lease('w2')
+
+        self.assertTrue(jobs.complete(0, 'w1', {"success": True, "message": "late"}))
+        self.assertFalse(jobs.complete(0, 'w2', {"success": True, "message": "second"}))
+        self.assertTrue(jobs.finished.is_set())
+        self.assertEqual(reported, [('/v/a.mkv', {"success": True, "message": "late"})])
+        self.assertEqual(jobs.status(), {"total": 1, "queued": 0, "leased": 0, "finished": 1})
+
+    def test_empty_batch_is_finished(self):
+        """Test a directory without videos needs no workers"""
+        self.assertTrue(JobQueue([]).finished.is_set())
+
+class TestLocalWorkers(unittest.TestCase):
+
+    def test_several_worker_processes(self):
+        """Test local worker processes finish a batch, including an abandoned job"""
+        paths = [f'/library/episode{n:02d}.mkv' for n in range(12)] + ['/library/bad.mkv']
+        jobs = JobQueue(paths, lease_seconds=1)
+        coordinator = Coordinator(jobs)
+
+        # A worker that leased a job and died without reporting
+        abandoned = jobs.lease('crashed')
+
+        # Spawned workers don't inherit the coordinator's listening socket
+        coordinator.start()
+        context = multiprocessing.get_context('spawn')
+        workers = [context.Process(target=worker_process, args=(coordinator.url, f'w{n}')) for n in range(3)]
+        for worker in workers:
+            worker.start()
+
+        try:
+            self.assertTrue(jobs.finished.wait(30))
+            self.assertEqual(post_json(coordinator.url, '/lease', {"worker": "late"})["done"], True)
+        finally:
+            coordinator.stop()
+            for worker in workers:
+                worker.join(10)
+                if worker.is_alive():
+                    worker.terminate()
+
+        pids = {worker.pid for worker in workers}
+        self.assertEqual(len(jobs.results), len(paths))
+        self.assertTrue(all(int(result["message"].split()[1]) in pids for result in jobs.results.values()))
+        self.assertIn(abandoned[0], jobs.results)
+        self.assertFalse(jobs.results[len(paths) - 1]["success"])
+        self.assertTrue(all(worker.exitcode == 0 for worker in workers))
+
+if __name__ == '__main__':
+    unittest.main()
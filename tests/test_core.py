@@ -8,6 +8,7 @@ import tempfile
 import os
 from pathlib import Path
 import sys
+from unittest.mock import patch
 
 # Add the package to Python path
 package_dir = os.path.join(os.path.dirname(__file__), '..', 'src')
@@ -95,6 +96,78 @@ class TestCore(unittest.TestCase):
         self.assertEqual(username, 'test_user')
         self.assertEqual(password, 'test_pass')
 
+    @patch('subtitle_downloader.core.validate_cues', return_value=(True, '1 cues'))
+    @patch('subtitle_downloader.core.parse_subtitle')
+    @patch('subtitle_downloader.core.normalize_to_utf8')
+    @patch('subtitle_downloader.core.download_to_file')
+    @patch('subtitle_downloader.core.rank_subtitles', side_effect=lambda subtitles, video: subtitles)
+    @patch('subtitle_downloader.core.scan_video')
+    @patch('subtitle_downloader.core.open_pool')
+    def test_download_for_file_falls_back(self, mock_pool, mock_scan, mock_rank, mock_download, mock_normalize, mock_parse, mock_validate):
+        """Test the fallback language is tried when the preferred one has no subtitles"""
+        video_path = os.path.join(self.test_dir, 'movie.mkv')
+        Path(video_path).touch()
+        
+        pool = mock_pool.return_value.__enter__.return_value
+        pool.list_subtitles.side_effect = lambda video, languages: [] if str(next(iter(languages))) == 'pt-BR' else ['en-subtitle']
+        mock_download.return_value = Path(self.test_dir) / 'movie.en.srt'
+        
+        downloader = SubtitleDownloader(self.config_file)
+        success, message = downloader.download_for_file(video_path)
+        
+        self.assertTrue(success)
+        self.assertEqual(message, 'English subtitle downloaded: movie.en.srt')
+        mock_download.assert_called_once_with(pool, 'en-subtitle', video_path, 'en', None, on_progress=None)
+        mock_normalize.assert_called_once_with(mock_download.return_value, 'en')
+    
+    @patch('subtitle_downloader.core.validate_cues', return_value=(True, '1 cues'))
+    @patch('subtitle_downloader.core.parse_subtitle')
+    @patch('subtitle_downloader.core.normalize_to_utf8')
+    @patch('subtitle_downloader.core.download_to_file')
+    @patch('subtitle_downloader.core.rank_subtitles', side_effect=lambda subtitles, video: subtitles)
+    @patch('subtitle_downloader.core.scan_video')
+    @patch('subtitle_downloader.core.open_pool')
+    def test_broken_candidate_tries_next(self, mock_pool, mock_scan, mock_rank, mock_download, mock_normalize, mock_parse, mock_validate):
+        """Test a candidate failing to download or unpack moves on to the next one"""
+        video_path = os.path.join(self.test_dir, 'movie.mkv')
+        Path(video_path).touch()
+        
+        pool = mock_pool.return_value.__enter__.return_value
+        pool.list_subtitles.return_value = ['bad', 'good']
+        subtitle_path = Path(self.test_dir) / 'movie.pt-br.srt'
+        
+        def download(pool, subtitle, *args, **kwargs):
+            if subtitle == 'bad':
+                raise ValueError("No subtitle file found in archive")
+            return subtitle_path
+        mock_download.side_effect = download
+        
+        downloader = SubtitleDownloader(self.config_file)
+        success, message = downloader.download_for_file(video_path)
+        
+        self.assertTrue(success)
+        self.assertEqual(message, 'Portuguese subtitle downloaded: movie.pt-br.srt')
+        self.assertEqual(mock_download.call_count, 2)
+    
+    @patch('subtitle_downloader.core.search_season')
+    @patch('subtitle_downloader.core.open_pool')
+    def test_season_search_errors(self, mock_pool, mock_search):
+        """Test a failing season search is logged and skipped, but code errors surface"""
+        pool = mock_pool.return_value.__enter__.return_value
+        pool.providers = ['addic7ed', 'other']
+        mock_search.side_effect = [ValueError("bad response"), None, None, None]
+        episodes = [('/tv/Show.S01E01.mkv', {'season': 1, 'episode': 1})]
+        downloader = SubtitleDownloader(self.config_file)
+        
+        with self.assertLogs('subtitle_downloader.core', 'WARNING') as logs:
+            self.assertEqual(downloader.download_season('Show', 1, episodes), {})
+        self.assertIn('bad response', logs.output[0])
+        self.assertEqual(mock_search.call_count, 4)
+        
+        mock_search.side_effect = KeyError('series')
+        with self.assertRaises(KeyError):
+            downloader.download_season('Show', 1, episodes)
+
 class TestBatchOperations(unittest.TestCase):
     
     def setUp(self):
@@ -137,5 +210,74 @@ class TestBatchOperations(unittest.TestCase):
             import shutil
             shutil.rmtree(empty_dir)
 
+    @patch('subtitle_downloader.core.SubtitleDownloader.download_for_file')
+    def test_batch_stream_in_parallel(self, mock_download):
+        """Test batch jobs run concurrently and each file is yielded as it finishes"""
+        import threading
+        names = [Path(video_file).name for video_file in self.video_files]
+        
+        # Every worker must be inside download_for_file at the same time
+        barrier = threading.Barrier(len(names), timeout=5)
+        def download(file_path, cancel=None):
+            barrier.wait()
+            return not file_path.endswith('test3.avi'), 'done'
+        mock_download.side_effect = download
+        
+        downloader = SubtitleDownloader(self.config_file)
+        streamed = list(downloader.batch_stream(self.test_dir, jobs=len(names)))
+        results = dict(streamed)
+        
+        self.assertEqual(len(streamed), len(names))
+        self.assertFalse(results[self.video_files[2]]['success'])
+        self.assertEqual(sorted(Path(file_path).name for file_path, _ in streamed), sorted(names))
+    
+    def test_batch_stream_memory_is_flat(self):
+        """Test peak memory doesn't grow with the number of files in the batch"""
+        import subprocess
+        
+        def peak_memory(folders):
+            # A clean interpreter, so coverage tracing doesn't add to the peak
+            env = {key: value for key, value in os.environ.items() if not key.startswith('COV_CORE')}
+            code = f"import sys; sys.path.insert(0, {os.path.dirname(__file__)!r}); " \
+                   f"from test_core import measure_batch_peak; print(measure_batch_peak({folders}))"
+            output = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True)
+            return int(output.stdout.split()[-1])
+        
+        small, large = peak_memory(30), peak_memory(240)
+        self.assertLess(large, small * 1.5)
+
+def measure_batch_peak(folders):
+    """Returns the peak traced memory of streaming a batch over folders x 10 videos"""
+    import tracemalloc
+    from subtitle_downloader import hashing, probe
+    from subtitle_downloader.season import warm_parse_cache
+    
+    with tempfile.TemporaryDirectory() as library:
+        for folder in range(folders):
+            os.mkdir(os.path.join(library, f'{folder:04d}'))
+            for episode in range(10):
+                Path(library, f'{folder:04d}', f'clip{episode}.mkv').touch()
+        
+        # Shrink the bounded per-file caches so they are full in every run
+        for cache in (hashing._hash_cache, probe._probe_cache, probe._tracks_cache):
+            cache.maxsize = 64
+        
+        downloader = SubtitleDownloader(os.path.join(library, '.config.json'))
+        downloader.config.override("incremental_scan", False)
+        downloader.config.override("persist_parse_cache", False)
+        
+        # Plain functions rather than mocks, which would record every call
+        with patch('subtitle_downloader.core.group_by_season', new=lambda files, minimum: ({}, list(files))), \
+             patch.object(SubtitleDownloader, 'download_for_file', new=lambda self, file_path, progress=None, cancel=None: (True, 'done')):
+            # guessit compiles its rules on first use; keep that out of the peak
+            warm_parse_cache(False)
+            tracemalloc.start()
+            count = sum(1 for _ in downloader.batch_stream(library, jobs=4, recursive=True))
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    
+    assert count == folders * 10
+    return peak
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for running CPU-bound subtitle stages in worker processes
+"""
+
+import unittest
+import tempfile
+import os
+import sys
+from pathlib import Path
+
+# Add the package to Python path
+package_dir = os.path.join(os.path.dirname(__file__), '..', 'src')
+sys.path.insert(0, os.path.abspath(package_dir))
+
+from subtitle_downloader.core import SubtitleDownloader
+from subtitle_downloader.cpu import CPUPool, check_subtitle
+from subtitle_downloader.retime import retime_data, retime_directory
+
+TEXT = "1\r\n00:00:01,000 --> 00:00:02,000\r\nAção é coração\r\n\r\n2\r\n00:01:00,000 --> 00:01:01,500\r\nNão\r\n"
+
+class TestCheckSubtitle(unittest.TestCase):
+
+    def test_legacy_encoding_is_converted(self):
+        """Test non-UTF-8 bytes come back converted, parsed and validated"""
+        converted, valid, message, last_end = check_subtitle(TEXT.encode('cp1252'), 'movie.pt-br.srt', 'pt-br')
+        self.assertEqual(converted, TEXT.encode('utf-8'))
+        self.assertEqual((valid, message, last_end), (True, "2 cues", 61500))
+
+    def test_utf8_needs_no_rewrite(self):
+        """Test UTF-8 input isn't sent back and corrupted input is reported"""
+        self.assertIsNone(check_subtitle(TEXT.encode('utf-8'), 'movie.srt', 'pt-br')[0])
+        self.assertEqual(check_subtitle(b'not a subtitle\n', 'movie.srt')[1:3], (False, "No subtitle cues found"))
+        self.assertEqual(check_subtitle(b'junk', 'movie.srt', parse=False), (None, True, "", 0))
+
+class TestCPUPool(unittest.TestCase):
+
+    def test_stages_run_in_worker_processes(self):
+        """Test a pool with workers runs stages in other processes, and 0 workers runs inline"""
+        pool = CPUPool(2)
+        try:
+            self.assertNotEqual(pool.run(os.getpid), os.getpid())
+            converted = pool.run(check_subtitle, TEXT.encode('cp1252'), 'movie.srt', 'pt-br')[0]
+            self.assertEqual(converted, TEXT.encode('utf-8'))
+        finally:
+            pool.shutdown()
+
+        self.assertEqual(CPUPool(0).run(os.getpid), os.getpid())
+        with self.assertRaises(ZeroDivisionError):
+            CPUPool(0).submit(divmod, 1, 0).result()
+
+class TestProcessPostprocessing(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.downloader = SubtitleDownloader(os.path.join(self.test_dir, 'config.json'))
+        self.downloader.cpu = CPUPool(2)
+
+    def tearDown(self):
+        import shutil
+        self.downloader.cpu.shutdown()
+        shutil.rmtree(self.test_dir)
+
+    def test_postprocess_in_worker_process(self):
+        """Test process-pool post-processing rewrites and rejects like the inline path"""
+        subtitle = Path(self.test_dir) / 'movie.pt-br.srt'
+        subtitle.write_bytes(TEXT.encode('cp1252'))
+        self.assertTrue(self.downloader.postprocess_subtitle(subtitle, 'pt-br'))
+        self.assertEqual(subtitle.read_bytes(), TEXT.encode('utf-8'))
+
+        broken = Path(self.test_dir) / 'broken.pt-br.srt'
+        broken.write_bytes(b'<html>Too many requests</html>')
+        self.assertFalse(self.downloader.postprocess_subtitle(broken, 'pt-br'))
+        self.assertFalse(self.downloader.postprocess_subtitle(Path(self.test_dir) / 'missing.srt', 'pt-br'))
+
+    def test_retime_directory_in_worker_processes(self):
+        """Test process-pool retiming gives the same files as retiming inline"""
+        for folder in ('inline', 'pool'):
+            os.mkdir(os.path.join(self.test_dir, folder))
+            for n in range(5):
+                Path(self.test_dir, folder, f'e{n}.srt').write_text(TEXT, encoding='utf-8', newline='')
+            Path(self.test_dir, folder, 'empty.srt').write_bytes(b'')
+
+        inline = retime_directory(os.path.join(self.test_dir, 'inline'), 2.0, 500)
+        pooled = retime_directory(os.path.join(self.test_dir, 'pool'), 2.0, 500, workers=2)
+
+        self.assertEqual({Path(path).name: result for path, result in inline.items()},
+                         {Path(path).name: result for path, result in pooled.items()})
+        for n in range(5):
+            self.assertEqual(Path(self.test_dir, 'pool', f'e{n}.srt').read_bytes(),
+                             Path(self.test_dir, 'inline', f'e{n}.srt').read_bytes())
+        self.assertEqual(retime_data(b'', 'empty.srt'), (None, 0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming download and decompression
+"""
+
+import unittest
+import tempfile
+import os
+import sys
+import gzip
+import io
+import zipfile
+import zlib
+from pathlib import Path
+
+# Add the package to Python path
+package_dir = os.path.join(os.path.dirname(__file__), '..', 'src')
+sys.path.insert(0, os.path.abspath(package_dir))
+
+from subtitle_downloader.download import SOLE_SUBTITLE, StreamDecoder, iter_chunks, stream_to_file
+
+SRT = ("1\n00:00:01,000 --> 00:00:02,000\nOlá mundo\n\n" * 2000).encode('utf-8')
+
+class UnseekableBuffer(io.RawIOBase):
+    """Write-only stream that forces zipfile to use data descriptors"""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.data += b
+        return len(b)
+
+def make_zip(members, compression=zipfile.ZIP_DEFLATED, seekable=True):
+    buffer = io.BytesIO() if seekable else UnseekableBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression) as zf:
+        for name, data in members:
+            zf.writestr(name, data)
+    return buffer.getvalue() if seekable else bytes(buffer.data)
+
+class TestStreamDecoder(unittest.TestCase):
+
+    def decode(self, payload, chunk_size=1000, select=None):
+        decoder = StreamDecoder(chunk_size=256, select=select)
+        pieces = []
+        for chunk in iter_chunks(payload, chunk_size):
+            pieces.extend(decoder.feed(chunk))
+        pieces.extend(decoder.finish())
+
+        # Output is always produced in bounded pieces
+        self.assertTrue(all(len(piece) <= 256 for piece in pieces))
+        return b''.join(pieces)
+
+    def test_plain(self):
+        """Test uncompressed payloads pass through"""
+        self.assertEqual(self.decode(SRT), SRT)
+        self.assertEqual(self.decode(b'1\n'), b'1\n')
+
+    def test_gzip_and_zlib(self):
+        """Test gzip and zlib payloads are inflated incrementally"""
+        self.assertEqual(self.decode(gzip.compress(SRT)), SRT)
+        self.assertEqual(self.decode(zlib.compress(SRT), chunk_size=7), SRT)
+
+    def test_zip_selects_subtitle_member(self):
+        """Test the first subtitle member of an archive is extracted"""
+        payload = make_zip([('readme.txt', b'ignore me'), ('show.srt', SRT), ('other.srt', b'x')])
+        self.assertEqual(self.decode(payload, chunk_size=100), SRT)
+
+    def test_zip_stored_and_data_descriptor(self):
+        """Test stored members and streamed archives with data descriptors"""
+        stored = make_zip([('show.srt', SRT)], compression=zipfile.ZIP_STORED)
+        self.assertEqual(self.decode(stored), SRT)
+
+        streamed = make_zip([('E01.nfo', b'info'), ('Show.S01E02.srt', SRT)], seekable=False)
+        self.assertEqual(self.decode(streamed, chunk_size=64), SRT)
+
+    def test_zip_member_filter(self):
+        """Test a custom filter picks a member from a season pack"""
+        payload = make_zip([('Show.S01E01.srt', b'one'), ('Show.S01E02.srt', b'two')], seekable=False)
+        self.assertEqual(self.decode(payload, select=lambda name: 'E02' in name), b'two')
+
+    def test_zip_sole_subtitle(self):
+        """Test a member taken only as the sole subtitle is rejected in a pack"""
+        select = lambda name: name.endswith('.srt') and ('E02' in name or SOLE_SUBTITLE)
+        single = make_zip([('readme.txt', b'info'), ('show.srt', SRT)], seekable=False)
+        self.assertEqual(self.decode(single, chunk_size=64, select=select), SRT)
+
+        pack = make_zip([('show - part 1.srt', b'one'), ('show - part 2.srt', b'two')])
+        with self.assertRaises(ValueError):
+            self.decode(pack, select=select)
+
+        numbered = make_zip([('show.srt', b'one'), ('Show.E02.srt', b'two')], compression=zipfile.ZIP_STORED)
+        self.assertEqual(self.decode(numbered, select=select), b'two')
+
+    def test_invalid_streams(self):
+        """Test truncated, empty or subtitle-less streams are rejected"""
+        compressed = gzip.compress(SRT)
+        with self.assertRaises(ValueError):
+            self.decode(compressed[:len(compressed) // 2])
+        with self.assertRaises(ValueError):
+            self.decode(make_zip([('readme.txt', b'nothing here')]))
+        with self.assertRaises(ValueError):
+            self.decode(b'')
+
+class TestStreamToFile(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.target = Path(self.test_dir) / 'video.pt-br.srt'
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.test_dir)
+
+    def test_stream_to_file(self):
+        """Test a compressed stream lands in the target file"""
+        result = stream_to_file(iter_chunks(gzip.compress(SRT), 4096), self.target)
+
+        self.assertEqual(result, self.target)
+        self.assertEqual(self.target.read_bytes(), SRT)
+        self.assertEqual(os.listdir(self.test_dir), ['video.pt-br.srt'])
+
+    def test_failed_stream_leaves_no_files(self):
+        """Test the temp file is removed when the stream fails"""
+        def broken_stream():
+            yield gzip.compress(SRT)[:100]
+            raise ConnectionError("connection reset")
+
+        with self.assertRaises(ConnectionError):
+            stream_to_file(broken_stream(), self.target)
+
+        self.assertEqual(os.listdir(self.test_dir), [])
+
+if __name__ == '__main__':
+    unittest.main()
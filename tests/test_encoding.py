@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for encoding detection and UTF-8 normalization
+"""
+
+import unittest
+import tempfile
+import os
+import sys
+import codecs
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the package to Python path
+package_dir = os.path.join(os.path.dirname(__file__), '..', 'src')
+sys.path.insert(0, os.path.abspath(package_dir))
+
+from subtitle_downloader import encoding
+from subtitle_downloader.encoding import detect_encoding, normalize_to_utf8
+
+TEXT = "1\n00:00:01,000 --> 00:00:02,000\nAção é coração – “não”\n\n"
+
+class TestDetectEncoding(unittest.TestCase):
+
+    def test_bom(self):
+        """Test byte order marks win over everything else"""
+        self.assertEqual(detect_encoding(codecs.BOM_UTF8 + TEXT.encode('utf-8')), 'utf-8-sig')
+        self.assertEqual(detect_encoding(TEXT.encode('utf-16')), 'utf-16')
+
+    def test_ascii_and_utf8(self):
+        """Test ASCII and valid UTF-8 are recognized without guessing"""
+        self.assertEqual(detect_encoding(b'1\n00:00:01,000 --> 00:00:02,000\nHello\n'), 'ascii')
+        self.assertEqual(detect_encoding(TEXT.encode('utf-8'), 'pt-br'), 'utf-8')
+
+    def test_language_candidates(self):
+        """Test legacy encodings are picked from the subtitle language"""
+        self.assertEqual(detect_encoding(TEXT.encode('cp1252'), 'pt-br'), 'cp1252')
+
+        with patch('subtitle_downloader.encoding._statistical_guess', return_value=None):
+            self.assertEqual(detect_encoding("Ação".encode('iso-8859-1'), 'pt'), 'cp1252')
+            self.assertEqual(detect_encoding("Привет мир".encode('cp1251'), 'ru'), 'cp1251')
+
+    def test_statistical_fallback(self):
+        """Test unknown languages fall back to statistical detection"""
+        with patch('subtitle_downloader.encoding._statistical_guess', return_value='koi8-r') as mock_guess:
+            self.assertEqual(detect_encoding("Привет".encode('koi8-r'), 'xx'), 'koi8-r')
+            mock_guess.assert_called_once()
+
+    def test_only_sample_is_decoded(self):
+        """Test detection is bounded to a prefix sample"""
+        data = TEXT.encode('cp1252') * 10000
+        with patch('subtitle_downloader.encoding._decodes_cleanly', wraps=encoding._decodes_cleanly) as mock_decode:
+            detect_encoding(data, 'pt-br')
+        for call in mock_decode.call_args_list:
+            self.assertLessEqual(len(call[0][0]), encoding.SAMPLE_SIZE)
+
+class TestNormalizeToUtf8(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.subtitle_path = Path(self.test_dir) / 'video.pt-br.srt'
+        encoding._encoding_cache.clear()
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.test_dir)
+
+    def test_normalize_legacy_encoding(self):
+        """Test Windows-1252 subtitles are rewritten as UTF-8"""
+        self.subtitle_path.write_bytes(TEXT.encode('cp1252'))
+
+        self.assertEqual(normalize_to_utf8(self.subtitle_path, 'pt-br'), 'cp1252')
+        self.assertEqual(self.subtitle_path.read_text(encoding='utf-8'), TEXT)
+
+    def test_normalize_strips_bom(self):
+        """Test UTF-8 output has no byte order mark"""
+        self.subtitle_path.write_bytes(codecs.BOM_UTF8 + TEXT.encode('utf-8'))
+
+        normalize_to_utf8(self.subtitle_path)
+        self.assertEqual(self.subtitle_path.read_bytes(), TEXT.encode('utf-8'))
+
+    def test_detection_is_memoized(self):
+        """Test identical content is only detected once"""
+        data = TEXT.encode('cp1252')
+        with patch('subtitle_downloader.encoding.detect_encoding', wraps=detect_encoding) as mock_detect:
+            for _ in range(3):
+                self.subtitle_path.write_bytes(data)
+                normalize_to_utf8(self.subtitle_path, 'pt-br')
+        self.assertEqual(mock_detect.call_count, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Tests for OpenSubtitles video hashing
+"""
+
+import unittest
+import tempfile
+import os
+import sys
+from unittest.mock import patch
+
+# Add the package to Python path
+package_dir = os.path.join(os.path.dirname(__file__), '..', 'src')
+sys.path.insert(0, os.path.abspath(package_dir))
+
+from subtitle_downloader import hashing
+from subtitle_downloader.hashing import hash_files, opensubtitles_hash
+from subtitle_downloader.iosched import IOScheduler
+
+def reference_hash(file_path):
+    """subliminal's implementation, without its process-wide cache"""
+    from subliminal.refiners.hash import hash_opensubtitles
+    return hash_opensubtitles.__wrapped__(file_path)
+
+class TestOpenSubtitlesHash(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        hashing._hash_cache.clear()
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.test_dir)
+
+    def make_video(self, name, size):
+        path = os.path.join(self.test_dir, name)
+        with open(path, 'wb') as f:
+            f.write(os.urandom(size))
+        return path
+
+    def test_matches_subliminal(self):
+        """Test the hash equals subliminal's for files of several sizes"""
+        for size in (2 * 65536, 300000, 1048583):
+            path = self.make_video(f'{size}.mkv', size)
+            self.assertEqual(opensubtitles_hash(path), reference_hash(path))
+
+    def test_matches_without_numpy(self):
+        """Test the memoryview fold gives the same hash as NumPy"""
+        path = self.make_video('movie.mkv', 500000)
+        with patch.object(hashing, 'numpy', None):
+            self.assertEqual(opensubtitles_hash(path), reference_hash(path))
+
+    def test_small_file_has_no_hash(self):
+        """Test files shorter than both blocks are not hashed"""
+        self.assertIsNone(opensubtitles_hash(self.make_video('sample.mkv', 65536)))
+
+    def test_hash_is_cached_until_file_changes(self):
+        """Test a second lookup doesn't read the file unless it was modified"""
+        path = self.make_video('movie.mkv', 200000)
+        first = opensubtitles_hash(path)
+
+        with patch('subtitle_downloader.hashing.os.open') as mock_open:
+            self.assertEqual(opensubtitles_hash(path), first)
+            mock_open.assert_not_called()
+
+        with open(path, 'ab') as f:
+            f.write(b'\1' * 8)
+        self.assertEqual(opensubtitles_hash(path), reference_hash(path))
+
+    def test_hash_files_in_parallel(self):
+        """Test batch hashing returns every file's hash and None for unreadable ones"""
+        paths = [self.make_video(f'e{n:02d}.mkv', 150000 + n * 8) for n in range(10)]
+        missing = os.path.join(self.test_dir, 'missing.mkv')
+
+        hashes = hash_files(paths + [missing], workers=4, io=IOScheduler())
+
+        self.assertEqual(hashes, {**{path: reference_hash(path) for path in paths}, missing: None})
+
+    def test_scan_video_attaches_hash(self):
+        """Test scanned videos carry the hash for hash-matching providers"""
+        from subtitle_downloader.providers import scan_video
+        path = self.make_video('Show.S01E01.mkv', 200000)
+
+        video = scan_video(path)
+
+        self.assertEqual(video.hashes['opensubtitles'], reference_hash(path))
+        self.assertEqual(video.hashes['opensubtitlescom'], reference_hash(path))
+
+if __name__ == '__main__':
+    unittest.main()
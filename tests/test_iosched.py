@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tests for per-device read scheduling
+"""
+
+import unittest
+import tempfile
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the package to Python path
+package_dir = os.path.join(os.path.dirname(__file__), '..', 'src')
+sys.path.insert(0, os.path.abspath(package_dir))
+
+from subtitle_downloader import iosched
+from subtitle_downloader.iosched import ROTATIONAL, SOLID_STATE, UNKNOWN, IOScheduler, detect_device_kind
+
+class TestIOScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.video_path = os.path.join(self.test_dir, 'movie.mkv')
+        Path(self.video_path).touch()
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.test_dir)
+
+    def peak_concurrency(self, scheduler, paths):
+        """Runs one short read per path on its own thread; returns the most at once"""
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0}
+
+        def read(path):
+            with scheduler.slot(path):
+                with lock:
+                    state["active"] += 1
+                    state["peak"] = max(state["peak"], state["active"])
+                time.sleep(0.02)
+                with lock:
+                    state["active"] -= 1
+
+        threads = [threading.Thread(target=read, args=(path,)) for path in paths]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return state["peak"]
+
+    @patch('subtitle_downloader.iosched.detect_device_kind', return_value=ROTATIONAL)
+    def test_rotational_device_is_serialized(self, mock_kind):
+        """Test reads on a spinning disk run one at a time"""
+        scheduler = IOScheduler({ROTATIONAL: 1})
+        self.assertEqual(self.peak_concurrency(scheduler, [self.video_path] * 6), 1)
+
+    @patch('subtitle_downloader.iosched.detect_device_kind', return_value=SOLID_STATE)
+    def test_solid_state_device_runs_in_parallel(self, mock_kind):
+        """Test an SSD allows up to its configured limit"""
+        scheduler = IOScheduler({SOLID_STATE: 3})
+        self.assertEqual(self.peak_concurrency(scheduler, [self.video_path] * 6), 3)
+
+    @patch('subtitle_downloader.iosched.detect_device_kind', return_value=ROTATIONAL)
+    def test_devices_are_limited_separately(self, mock_kind):
+        """Test two spinning disks are each read by one worker at the same time"""
+        scheduler = IOScheduler()
+        devices = {'/disk1/a.mkv': 1, '/disk1/b.mkv': 1, '/disk2/a.mkv': 2, '/disk2/b.mkv': 2}
+
+        with patch('subtitle_downloader.iosched.os.stat', side_effect=lambda path: os.stat_result((0,) * 2 + (devices[path],) + (0,) * 7)):
+            self.assertEqual(self.peak_concurrency(scheduler, list(devices)), 2)
+
+    def test_missing_file_is_not_limited(self):
+        """Test an unreadable path doesn't block or raise in the scheduler"""
+        with IOScheduler().slot(os.path.join(self.test_dir, 'missing.mkv')):
+            pass
+
+    def test_detect_device_kind(self):
+        """Test the rotational flag is read from sysfs and cached per device"""
+        device = os.makedev(8, 1)
+        opened = []
+
+        def fake_open(path, mode='r'):
+            opened.append(path)
+            if path.endswith(os.path.join('8:1', '..', 'queue', 'rotational')):
+                from io import StringIO
+                return StringIO('1\n')
+            raise FileNotFoundError(path)
+
+        with patch.dict(iosched._device_kinds, clear=True), patch('builtins.open', side_effect=fake_open):
+            self.assertEqual(detect_device_kind(device), ROTATIONAL)
+            self.assertEqual(detect_device_kind(device), ROTATIONAL)
+            self.assertEqual(detect_device_kind(os.makedev(0, 52)), UNKNOWN)
+
+        self.assertEqual(len(opened), 4)
+
+if __name__ == '__main__':
+    unittest.main()
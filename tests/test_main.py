@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests for the package entry point
+"""
+
+import unittest
+import tempfile
+import os
+import sys
+import types
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+# Add the package to Python path
+package_dir = os.path.join(os.path.dirname(__file__), '..', 'src')
+sys.path.insert(0, os.path.abspath(package_dir))
+
+from subtitle_downloader.__main__ import load_gui, main
+
+class TestMain(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.test_dir)
+
+    def run_main(self, argv):
+        gui = types.ModuleType('subtitle_downloader.gui_gtk')
+        gui.main_gtk = MagicMock(return_value=0)
+        with patch.dict(sys.modules, {'subtitle_downloader.gui_gtk': gui}), \
+             patch('subtitle_downloader.__main__.detect_gui_preference', return_value='gtk'), \
+             patch('sys.argv', ['download-subtitle'] + argv), \
+             patch('builtins.print'):
+            with self.assertRaises(SystemExit) as context:
+                main()
+        return context.exception.code, gui.main_gtk
+
+    def test_multiple_files_open_one_window(self):
+        """Test every valid selected file is passed to a single GUI call"""
+        videos = [os.path.join(self.test_dir, name) for name in ('e01.mkv', 'e02.mkv')]
+        for video in videos:
+            Path(video).touch()
+        notes = os.path.join(self.test_dir, 'notes.txt')
+        Path(notes).touch()
+
+        code, main_gtk = self.run_main(videos + [notes, os.path.join(self.test_dir, 'missing.mkv')])
+
+        self.assertEqual(code, 0)
+        main_gtk.assert_called_once_with(videos)
+
+    def test_no_valid_files(self):
+        """Test the entry point fails when nothing selected is a video"""
+        notes = os.path.join(self.test_dir, 'notes.txt')
+        Path(notes).touch()
+
+        code, main_gtk = self.run_main([notes])
+
+        self.assertEqual(code, 1)
+        main_gtk.assert_not_called()
+
+    def test_gui_falls_back_to_other_toolkit(self):
+        """Test a missing preferred toolkit falls back to the available one"""
+        gui = types.ModuleType('subtitle_downloader.gui_gtk')
+        gui.main_gtk = MagicMock()
+        with patch.dict(sys.modules, {'subtitle_downloader.gui_qt': None, 'subtitle_downloader.gui_gtk': gui}):
+            self.assertIs(load_gui('qt'), gui.main_gtk)
+
+        with patch.dict(sys.modules, {'subtitle_downloader.gui_qt': None, 'subtitle_downloader.gui_gtk': None}):
+            with self.assertRaises(ImportError):
+                load_gui('gtk')
+
+if __name__ == '__main__':
+    unittest.main()
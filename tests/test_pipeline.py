@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for the stdin/NDJSON pipeline mode
+"""
+
+import unittest
+import tempfile
+import io
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the package to Python path
+package_dir = os.path.join(os.path.dirname(__file__), '..', 'src')
+sys.path.insert(0, os.path.abspath(package_dir))
+
+from subtitle_downloader.core import SubtitleDownloader
+from subtitle_downloader.pipeline import iter_paths, load_finished, result_record
+
+class TestPipelineInput(unittest.TestCase):
+
+    @patch('subtitle_downloader.pipeline.READ_CHUNK_SIZE', 3)
+    def test_paths_split_across_chunks(self):
+        """Test paths are reassembled when they straddle read boundaries"""
+        stream = io.BytesIO(b'/videos/one.mkv\n\n/videos/two.mkv')
+        self.assertEqual(list(iter_paths(stream)), ['/videos/one.mkv', '/videos/two.mkv'])
+
+    def test_null_separated_paths(self):
+        """Test -0 input keeps newlines and undecodable bytes in file names"""
+        stream = io.BytesIO(b'/videos/line\nbreak.mkv\0/videos/caf\xe9.mkv\0')
+        paths = list(iter_paths(stream, null=True))
+
+        self.assertEqual(paths[0], '/videos/line\nbreak.mkv')
+        self.assertEqual(os.fsencode(paths[1]), b'/videos/caf\xe9.mkv')
+
+    def test_resume_from_previous_output(self):
+        """Test only downloaded and skipped files are treated as done"""
+        lines = [
+            result_record('/v/a.mkv', {"success": True, "message": "ok"}),
+            result_record('/v/b.mkv', {"success": False, "message": "No subtitles found in any language"}),
+            result_record('/v/c.mkv', {"success": True, "skipped": True, "message": "embedded"}),
+            result_record('/v/d.mkv', {"success": False, "message": "Cancelled"}),
+            '{"path": "/v/e.mkv", "sta'
+        ]
+
+        self.assertEqual(json.loads(lines[3])['status'], 'cancelled')
+        self.assertEqual(load_finished(lines), {'/v/a.mkv', '/v/c.mkv'})
+
+class TestDownloadStream(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.config_file = os.path.join(self.test_dir, 'config.json')
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.test_dir)
+
+    @patch('subtitle_downloader.core.SubtitleDownloader.download_for_file', return_value=(True, 'done'))
+    def test_input_is_read_lazily(self, mock_download):
+        """Test no more than twice the job count is read ahead of the results"""
+        read = []
+        def paths():
+            for n in range(1000):
+                read.append(n)
+                yield os.path.join(self.test_dir, f'{n}.mkv')
+
+        stream = SubtitleDownloader(self.config_file).download_stream(paths(), jobs=2)
+        file_path, result = next(stream)
+        stream.close()
+
+        self.assertTrue(result['success'])
+        self.assertLessEqual(len(read), 5)
+
+    @patch('subtitle_downloader.core.SubtitleDownloader.download_for_file')
+    def test_results_in_completion_order(self, mock_download):
+        """Test a slow file does not hold back the ones that finish after it"""
+        slow = os.path.join(self.test_dir, 'slow.mkv')
+        fast = os.path.join(self.test_dir, 'fast.mkv')
+        for video in (slow, fast):
+            Path(video).touch()
+
+        release = threading.Event()
+        def download(file_path, cancel=None):
+            if file_path == slow:
+                release.wait(5)
+            return True, Path(file_path).name
+        mock_download.side_effect = download
+
+        results = []
+        for file_path, result in SubtitleDownloader(self.config_file).download_stream([slow, fast], jobs=2):
+            results.append(file_path)
+            release.set()
+
+        self.assertEqual(results, [fast, slow])
+
+if __name__ == '__main__':
+    unittest.main()
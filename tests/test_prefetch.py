@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for prefetching sibling episodes
+"""
+
+import unittest
+import tempfile
+import os
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the package to Python path
+package_dir = os.path.join(os.path.dirname(__file__), '..', 'src')
+sys.path.insert(0, os.path.abspath(package_dir))
+
+from subtitle_downloader.core import SubtitleDownloader
+from subtitle_downloader.prefetch import start_prefetch
+from subtitle_downloader.priority import BULK, current_priority
+from subtitle_downloader.season import sibling_episodes
+
+class TestPrefetch(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.env = patch.dict(os.environ, {'XDG_CACHE_HOME': os.path.join(self.test_dir, 'cache')})
+        self.env.start()
+        self.folder = os.path.join(self.test_dir, 'Show')
+        os.mkdir(self.folder)
+        names = [f'Show.Name.S02E0{episode}.720p.mkv' for episode in range(1, 7)]
+        names += ['Show.Name.S01E01.720p.mkv', 'Other.Show.S02E02.mkv', 'notes.txt']
+        for name in names:
+            Path(self.folder, name).touch()
+        self.episode = lambda number: os.path.join(self.folder, f'Show.Name.S02E0{number}.720p.mkv')
+
+        self.downloader = SubtitleDownloader(os.path.join(self.test_dir, 'config.json'))
+        self.downloader.config.override('default_language', 'en')
+        self.downloader.config.override('fallback_language', None)
+
+    def tearDown(self):
+        import shutil
+        self.env.stop()
+        shutil.rmtree(self.test_dir)
+
+    def write_subtitle(self, file_path, progress=None, cancel=None):
+        subtitle_path = Path(os.path.splitext(file_path)[0] + '.en.srt')
+        subtitle_path.write_text('1\n00:00:01,000 --> 00:00:02,000\nHi\n')
+        return True, f"English subtitle downloaded: {subtitle_path.name}"
+
+    def test_sibling_episodes_next_first(self):
+        """Test siblings are the same series and season, later episodes first"""
+        paths = [os.path.join(self.folder, name) for name in sorted(os.listdir(self.folder))]
+        siblings = sibling_episodes(self.episode(3), paths)
+        self.assertEqual(siblings, [self.episode(n) for n in (4, 5, 6, 1, 2)])
+
+    def test_candidates_skip_subtitled_and_respect_limit(self):
+        """Test episodes that already have a subtitle aren't prefetched"""
+        Path(self.folder, 'Show.Name.S02E03.720p.en.srt').touch()
+        self.downloader.config.override('prefetch_limit', 3)
+
+        self.assertEqual(self.downloader.prefetch_candidates(self.episode(1)),
+                         [self.episode(2), self.episode(4), self.episode(5)])
+
+    def test_prefetch_runs_as_bulk_and_is_reused(self):
+        """Test prefetched episodes download in the background and the next request reuses them"""
+        self.downloader.config.override('prefetch_limit', 2)
+        priorities = []
+
+        def fetch(file_path, progress=None, cancel=None):
+            priorities.append(current_priority())
+            return self.write_subtitle(file_path)
+
+        with patch.object(self.downloader, 'fetch_for_file', side_effect=fetch) as mock_fetch:
+            results = [future.result(5) for future in self.downloader.prefetch_siblings(self.episode(1))]
+            self.assertEqual([success for success, _ in results], [True, True])
+            self.assertEqual(priorities, [BULK, BULK])
+
+            # The user then asks for episode 2 from the menu
+            success, message = self.downloader.download_for_file(self.episode(2))
+            self.assertEqual(mock_fetch.call_count, 2)
+            self.assertEqual((success, message), results[0])
+
+            # Asking again is a new request
+            self.downloader.download_for_file(self.episode(2))
+            self.assertEqual(mock_fetch.call_count, 3)
+
+    def test_prefetch_skips_videos_that_got_a_subtitle(self):
+        """Test a prefetch reached after the user already downloaded the episode does nothing"""
+        self.write_subtitle(self.episode(2))
+        with patch.object(self.downloader, 'fetch_for_file') as mock_fetch:
+            result = self.downloader.download_for_file(self.episode(2), prefetch=True)
+        self.assertEqual(result, (True, "Subtitle already present"))
+        mock_fetch.assert_not_called()
+
+    @patch('subtitle_downloader.prefetch.subprocess.Popen')
+    def test_start_prefetch_is_optional(self, mock_popen):
+        """Test the detached prefetch only starts when enabled, with the session's languages"""
+        self.assertIsNone(start_prefetch(self.downloader, self.episode(1)))
+        mock_popen.assert_not_called()
+
+        self.downloader.config.override('prefetch_siblings', True)
+        self.assertIs(start_prefetch(self.downloader, self.episode(1)), mock_popen.return_value)
+
+        command = mock_popen.call_args[0][0]
+        self.assertEqual(command[1:], ['-m', 'subtitle_downloader.prefetch', self.episode(1), 'en'])
+        self.assertTrue(mock_popen.call_args[1]['start_new_session'])
+
+if __name__ == '__main__':
+    unittest.main()
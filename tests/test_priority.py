@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Tests for priority classes, the priority executor and the rate limiter
+"""
+
+import unittest
+import os
+import sys
+import threading
+import time
+
+# Add the package to Python path
+package_dir = os.path.join(os.path.dirname(__file__), '..', 'src')
+sys.path.insert(0, os.path.abspath(package_dir))
+
+from subtitle_downloader.cancel import Cancelled, CancelToken
+from subtitle_downloader.priority import (
+    BULK, INTERACTIVE, WATCH, PriorityExecutor, RateLimiter, WaitQueue, current_priority
+)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestWaitQueue(unittest.TestCase):
+
+    def test_serves_by_class_then_age(self):
+        """Test more urgent classes go first and each class is FIFO"""
+        queue = WaitQueue(aging_seconds=30, clock=FakeClock())
+        for priority, item in [(BULK, 'b1'), (WATCH, 'w1'), (BULK, 'b2'), (INTERACTIVE, 'i1'), (WATCH, 'w2')]:
+            queue.push(priority, item)
+
+        self.assertEqual([queue.pop()[2] for _ in range(5)], ['i1', 'w1', 'w2', 'b1', 'b2'])
+        self.assertIsNone(queue.pop())
+
+    def test_waiting_bulk_work_ages_past_new_interactive_work(self):
+        """Test a bulk job that waited long enough is served before fresh urgent jobs"""
+        clock = FakeClock()
+        queue = WaitQueue(aging_seconds=30, clock=clock)
+        queue.push(BULK, 'bulk')
+        clock.now = 45
+        queue.push(INTERACTIVE, 'interactive')
+        self.assertEqual(queue.peek()[2], 'interactive')
+
+        clock.now = 61
+        queue.push(INTERACTIVE, 'later')
+        self.assertEqual([queue.pop()[2] for _ in range(3)], ['bulk', 'interactive', 'later'])
+
+    def test_unknown_priority_is_rejected(self):
+        """Test only the known classes can be queued"""
+        with self.assertRaises(ValueError):
+            WaitQueue().push(7, 'job')
+
+class TestPriorityExecutor(unittest.TestCase):
+
+    def test_interactive_job_claims_the_next_worker(self):
+        """Test a job submitted behind queued bulk work runs as soon as a worker frees up"""
+        executor = PriorityExecutor(1)
+        release = threading.Event()
+        order = []
+
+        executor.submit_as(BULK, release.wait, 5)
+        bulk = [executor.submit_as(BULK, order.append, f'bulk{n}') for n in range(5)]
+        interactive = executor.submit_as(INTERACTIVE, lambda: order.append(('interactive', current_priority())))
+        release.set()
+
+        interactive.result(5)
+        for future in bulk:
+            future.result(5)
+        executor.shutdown()
+
+        self.assertEqual(order[0], ('interactive', INTERACTIVE))
+        self.assertEqual(order[1:], [f'bulk{n}' for n in range(5)])
+
+    def test_submit_inherits_the_callers_class(self):
+        """Test work submitted from inside a job keeps that job's class"""
+        executor = PriorityExecutor(2)
+        nested = executor.submit_as(WATCH, lambda: executor.submit(current_priority).result(5))
+        self.assertEqual(nested.result(5), WATCH)
+        executor.shutdown()
+
+    def test_cancelled_job_does_not_run(self):
+        """Test cancelling a queued future skips the job and shutdown joins the workers"""
+        executor = PriorityExecutor(1)
+        release = threading.Event()
+        ran = []
+
+        executor.submit_as(BULK, release.wait, 5)
+        queued = executor.submit_as(BULK, ran.append, 'job')
+        self.assertTrue(queued.cancel())
+        release.set()
+        executor.shutdown()
+
+        self.assertEqual(ran, [])
+        with self.assertRaises(RuntimeError):
+            executor.submit(ran.append, 'late')
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_urgent_waiter_gets_the_next_token(self):
+        """Test an interactive waiter is served before bulk waiters that queued earlier"""
+        limiter = RateLimiter(rate=20, burst=1)
+        limiter.acquire(BULK)
+        order = []
+
+        def take(priority, name):
+            limiter.acquire(priority)
+            order.append(name)
+
+        threads = [threading.Thread(target=take, args=(BULK, f'bulk{n}')) for n in range(3)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.01)
+        urgent = threading.Thread(target=take, args=(INTERACTIVE, 'interactive'))
+        urgent.start()
+        for thread in threads + [urgent]:
+            thread.join(5)
+
+        self.assertEqual(order[0], 'interactive')
+        self.assertEqual(sorted(order[1:]), ['bulk0', 'bulk1', 'bulk2'])
+
+    def test_cancel_stops_waiting(self):
+        """Test a cancelled token wakes a waiter with Cancelled"""
+        limiter = RateLimiter(rate=0.01, burst=1)
+        limiter.acquire()
+        cancel = CancelToken()
+        threading.Timer(0.05, cancel.cancel).start()
+
+        start = time.monotonic()
+        with self.assertRaises(Cancelled):
+            limiter.acquire(BULK, cancel)
+        self.assertLess(time.monotonic() - start, 2)
+
+    def test_zero_rate_is_unlimited(self):
+        """Test a disabled limiter never waits"""
+        limiter = RateLimiter(rate=0)
+        start = time.monotonic()
+        for _ in range(1000):
+            limiter.acquire()
+        self.assertLess(time.monotonic() - start, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Tests for header-only container probing
+"""
+
+import unittest
+import tempfile
+import os
+import sys
+import struct
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the package to Python path
+package_dir = os.path.join(os.path.dirname(__file__), '..', 'src')
+sys.path.insert(0, os.path.abspath(package_dir))
+
+from subtitle_downloader.core import SubtitleDownloader
+from subtitle_downloader.probe import (
+    duration_mismatch,
+    embedded_subtitle_languages,
+    has_embedded_subtitle,
+    probe_video
+)
+
+def ebml_size(size):
+    return (0x0100000000000000 | size).to_bytes(8, 'big')
+
+def ebml(element_id, payload):
+    id_length = (element_id.bit_length() + 7) // 8
+    return element_id.to_bytes(id_length, 'big') + ebml_size(len(payload)) + payload
+
+def ebml_uint(element_id, value):
+    return ebml(element_id, value.to_bytes(4, 'big'))
+
+def subtitle_track(language=None, bcp47=None, forced=False):
+    entry = ebml_uint(0x83, 17)
+    if language:
+        entry += ebml(0x22B59C, language.encode('ascii'))
+    if bcp47:
+        entry += ebml(0x22B59D, bcp47.encode('ascii'))
+    if forced:
+        entry += ebml_uint(0x55AA, 1)
+    return ebml(0xAE, entry)
+
+def make_mkv(duration_ms, fps=None, tracks_after_cluster=False, subtitle_tracks=()):
+    """Builds a minimal Matroska file with Info, Tracks and one Cluster"""
+    info = ebml(0x1549A966, ebml_uint(0x2AD7B1, 1000000) + ebml(0x4489, struct.pack('>d', duration_ms)))
+    entry = ebml_uint(0x83, 1)
+    if fps:
+        entry += ebml_uint(0x23E383, int(round(1e9 / fps)))
+    tracks = ebml(0x1654AE6B, ebml(0xAE, entry) + b''.join(subtitle_tracks))
+    cluster = ebml(0x1F43B675, b'\x00' * 4096)
+
+    if not tracks_after_cluster:
+        body = info + tracks + cluster
+    else:
+        # Tracks only reachable through the SeekHead
+        placeholder = ebml(0x114D9B74, ebml(0x4DBB, ebml_uint(0x53AB, 0x1654AE6B) + ebml_uint(0x53AC, 0)))
+        tracks_position = len(placeholder) + len(info) + len(cluster)
+        seek_head = ebml(0x114D9B74, ebml(0x4DBB, ebml_uint(0x53AB, 0x1654AE6B) + ebml_uint(0x53AC, tracks_position)))
+        body = seek_head + info + cluster + tracks
+
+    header = ebml(0x1A45DFA3, ebml(0x4282, b'matroska'))
+    return header + ebml(0x18538067, body)
+
+def box(box_type, payload):
+    return struct.pack('>I4s', len(payload) + 8, box_type) + payload
+
+def make_mp4(duration_ms, fps, version=0, moov_last=True):
+    """Builds a minimal MP4 with mvhd and one video track"""
+    if version == 1:
+        mvhd = box(b'mvhd', b'\x01\x00\x00\x00' + struct.pack('>QQIQ', 0, 0, 1000, duration_ms) + b'\x00' * 80)
+    else:
+        mvhd = box(b'mvhd', b'\x00' * 4 + struct.pack('>IIII', 0, 0, 1000, duration_ms) + b'\x00' * 80)
+    mdhd = box(b'mdhd', b'\x00' * 4 + struct.pack('>IIII', 0, 0, 24000, 0) + b'\x00' * 4)
+    hdlr = box(b'hdlr', b'\x00' * 8 + b'vide' + b'\x00' * 13)
+    stts = box(b'stts', b'\x00' * 4 + struct.pack('>III', 1, 1000, int(round(24000 / fps))))
+    trak = box(b'trak', box(b'mdia', mdhd + hdlr + box(b'minf', box(b'stbl', stts))))
+    moov = box(b'moov', mvhd + trak)
+    ftyp = box(b'ftyp', b'isom\x00\x00\x02\x00')
+    mdat = box(b'mdat', b'\x00' * 4096)
+    return ftyp + (mdat + moov if moov_last else moov + mdat)
+
+class TestProbe(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.test_dir)
+
+    def write(self, name, data):
+        path = Path(self.test_dir) / name
+        path.write_bytes(data)
+        return path
+
+    def test_probe_mkv(self):
+        """Test Matroska duration and frame rate come from Info and Tracks"""
+        info = probe_video(self.write('movie.mkv', make_mkv(5400000, fps=23.976)))
+
+        self.assertEqual(info["container"], 'mkv')
+        self.assertEqual(info["duration_ms"], 5400000)
+        self.assertAlmostEqual(info["fps"], 23.976, places=2)
+
+    def test_probe_mkv_seek_head(self):
+        """Test sections stored after the clusters are found via the SeekHead"""
+        info = probe_video(self.write('movie.mkv', make_mkv(60000, fps=25, tracks_after_cluster=True)))
+
+        self.assertEqual(info["duration_ms"], 60000)
+        self.assertEqual(info["fps"], 25)
+
+    def test_probe_mp4(self):
+        """Test MP4 duration from mvhd and frame rate from the video track"""
+        for version in (0, 1):
+            for moov_last in (True, False):
+                info = probe_video(self.write(f'movie{version}{moov_last}.mp4', make_mp4(1200000, 24, version, moov_last)))
+                self.assertEqual(info, {"container": "mp4", "duration_ms": 1200000, "fps": 24.0})
+
+    def test_probe_unknown(self):
+        """Test unsupported or missing files are not probed"""
+        self.assertIsNone(probe_video(self.write('movie.avi', b'RIFF\x00\x00\x00\x00AVI ')))
+        self.assertIsNone(probe_video(os.path.join(self.test_dir, 'missing.mkv')))
+
+    def test_duration_mismatch(self):
+        """Test subtitles far longer or shorter than the video are rejected"""
+        self.assertFalse(duration_mismatch(5300000, 5400000))
+        self.assertTrue(duration_mismatch(7000000, 5400000))
+        self.assertTrue(duration_mismatch(1500000, 5400000))
+        self.assertFalse(duration_mismatch(1500000, None))
+
+    def test_embedded_subtitle_languages(self):
+        """Test subtitle track languages are listed and forced tracks ignored"""
+        tracks = [subtitle_track('por', 'pt-BR'), subtitle_track(), subtitle_track('spa', forced=True)]
+        video = self.write('movie.mkv', make_mkv(60000, subtitle_tracks=tracks, tracks_after_cluster=True))
+
+        self.assertEqual(embedded_subtitle_languages(video), ['pt-br', 'en'])
+        self.assertTrue(has_embedded_subtitle(video, 'pt-br'))
+        self.assertTrue(has_embedded_subtitle(video, 'pt'))
+        self.assertTrue(has_embedded_subtitle(video, 'en'))
+        self.assertFalse(has_embedded_subtitle(video, 'es'))
+        self.assertEqual(embedded_subtitle_languages(self.write('movie.mp4', make_mp4(1000, 24))), [])
+
+    def test_region_must_match(self):
+        """Test a track for another region does not cover the request"""
+        video = self.write('movie.mkv', make_mkv(60000, subtitle_tracks=[subtitle_track('por', 'pt-PT')]))
+        self.assertFalse(has_embedded_subtitle(video, 'pt-br'))
+
+        video = self.write('other.mkv', make_mkv(60000, subtitle_tracks=[subtitle_track('por')]))
+        self.assertTrue(has_embedded_subtitle(video, 'pt-br'))
+
+    def test_undetermined_track_language(self):
+        """Test tracks tagged und, mul or zxx keep their code instead of failing the probe"""
+        tracks = [subtitle_track('und'), subtitle_track('mul'), subtitle_track('zxx'), subtitle_track('por')]
+        video = self.write('movie.mkv', make_mkv(60000, subtitle_tracks=tracks))
+
+        self.assertEqual(embedded_subtitle_languages(video), ['und', 'mul', 'zxx', 'pt'])
+        self.assertTrue(has_embedded_subtitle(video, 'pt-br'))
+        self.assertFalse(has_embedded_subtitle(video, 'en'))
+
+    @patch('subtitle_downloader.core.has_embedded_subtitle', side_effect=AttributeError('probe failed'))
+    @patch('subtitle_downloader.core.SubtitleDownloader.download_for_file', return_value=(True, 'English subtitle downloaded'))
+    def test_probe_failure_is_not_embedded(self, mock_download, mock_embedded):
+        """Test a video that can't be probed is downloaded for instead of aborting the batch"""
+        video = self.write('movie.mkv', make_mkv(60000, subtitle_tracks=[subtitle_track('und')]))
+        downloader = SubtitleDownloader(os.path.join(self.test_dir, 'config.json'))
+
+        self.assertIsNone(downloader.embedded_result(str(video)))
+        with patch('subtitle_downloader.core.warm_parse_cache'), patch('subtitle_downloader.core.save_parse_cache'):
+            results = downloader.batch_download(self.test_dir)
+        self.assertTrue(results[str(video)]["success"])
+
+    @patch('subtitle_downloader.core.SubtitleDownloader.download_for_file', return_value=(False, 'No subtitles found in any language'))
+    def test_batch_skips_embedded(self, mock_download):
+        """Test batch mode skips videos that already carry the wanted language"""
+        covered = self.write('covered.mkv', make_mkv(60000, subtitle_tracks=[subtitle_track('por')]))
+        other = self.write('other.mkv', make_mkv(60000))
+        downloader = SubtitleDownloader(os.path.join(self.test_dir, 'config.json'))
+
+        with patch('subtitle_downloader.core.warm_parse_cache'), patch('subtitle_downloader.core.save_parse_cache'):
+            results = downloader.batch_download(self.test_dir)
+
+        self.assertTrue(results[str(covered)]["skipped"])
+        mock_download.assert_called_once_with(str(other), cancel=None)
+
+    @patch('subtitle_downloader.core.normalize_to_utf8')
+    def test_postprocess_rejects_mismatched_subtitle(self, mock_normalize):
+        """Test a subtitle for another cut is discarded"""
+        video = self.write('movie.mkv', make_mkv(120000))
+        subtitle = self.write('movie.srt', b"1\n00:00:10,000 --> 00:00:11,000\nHi\n\n2\n00:59:00,000 --> 00:59:01,000\nBye\n")
+        downloader = SubtitleDownloader(os.path.join(self.test_dir, 'config.json'))
+
+        self.assertFalse(downloader.postprocess_subtitle(subtitle, 'en', video))
+        self.assertTrue(downloader.postprocess_subtitle(subtitle, 'en'))
+
+if __name__ == '__main__':
+    unittest.main()
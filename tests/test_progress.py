@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Tests for progress events and the coalescing queue
+"""
+
+import unittest
+import tempfile
+import os
+import sys
+import threading
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+# Add the package to Python path
+package_dir = os.path.join(os.path.dirname(__file__), '..', 'src')
+sys.path.insert(0, os.path.abspath(package_dir))
+
+from subtitle_downloader.core import SubtitleDownloader
+from subtitle_downloader.progress import (
+    DOWNLOADING,
+    HASHING,
+    SEARCHING,
+    WRITING,
+    CoalescingQueue,
+    ProgressEvent,
+    ProgressReporter,
+    ResultCounter,
+    summarize_results
+)
+
+class TestProgressEvents(unittest.TestCase):
+
+    def test_percent_follows_phase_and_bytes(self):
+        """Test each phase maps into its slice of the overall progress"""
+        self.assertEqual(ProgressEvent('a.mkv', HASHING, '').percent, 0)
+        self.assertEqual(ProgressEvent('a.mkv', DOWNLOADING, '', 512, 1024).percent, 60)
+        self.assertEqual(ProgressEvent('a.mkv', DOWNLOADING, '', 4096, 0).percent, 30)
+        self.assertEqual(ProgressEvent('a.mkv', WRITING, '').percent, 90)
+
+    def test_reporter_without_callback(self):
+        """Test reporting is a no-op without a listener"""
+        reporter = ProgressReporter('a.mkv')
+        reporter.emit(HASHING, 'Hashing')
+        self.assertIsNone(reporter.bytes_callback('Downloading'))
+
+    def test_summarize_results(self):
+        """Test multi-file summaries count downloads and cap the failure list"""
+        results = [('a.mkv', True, 'ok')] + [(f'{n}.mkv', False, 'none') for n in range(12)]
+
+        downloaded, title, details = summarize_results(results, max_failures=3)
+
+        self.assertEqual(downloaded, 1)
+        self.assertEqual(title, '1 of 13 subtitles downloaded')
+        self.assertEqual(details, ['0.mkv: none', '1.mkv: none', '2.mkv: none', '... and 9 more'])
+
+    def test_result_counter_keeps_only_capped_failures(self):
+        """Test long runs are summarized from counts, storing a few failure messages"""
+        counter = ResultCounter(max_failures=2)
+        counter.add('a.mkv', True, 'ok')
+        counter.add('b.mkv', True, 'embedded', skipped=True)
+        for n in range(1000):
+            counter.add(f'{n}.mkv', False, 'none')
+
+        self.assertEqual((counter.downloaded, counter.skipped, counter.failed, counter.total), (1, 1, 1000, 1002))
+        self.assertEqual(len(counter.failures), 2)
+        self.assertEqual(counter.summary(), (2, '2 of 1002 subtitles downloaded', ['0.mkv: none', '1.mkv: none', '... and 998 more']))
+
+class TestCoalescingQueue(unittest.TestCase):
+
+    def test_latest_update_per_key_wins(self):
+        """Test a burst of updates for one file collapses into one"""
+        queue = CoalescingQueue()
+        for received in range(100):
+            queue.put(0, received)
+        queue.put(1, 'other')
+
+        updates, lines = queue.drain()
+
+        self.assertEqual(updates, {0: 99, 1: 'other'})
+        self.assertEqual(lines, [])
+        self.assertEqual(queue.drain(), ({}, []))
+
+    def test_log_is_a_ring_buffer(self):
+        """Test only the newest log lines are kept between drains"""
+        queue = CoalescingQueue(log_lines=3)
+        for line in range(10):
+            queue.log(line)
+
+        self.assertEqual(queue.drain()[1], [7, 8, 9])
+
+    def test_concurrent_producers(self):
+        """Test workers can publish while the UI drains"""
+        queue = CoalescingQueue()
+        workers = [
+            threading.Thread(target=lambda key=key: [queue.put(key, n) for n in range(1000)])
+            for key in range(8)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(queue.drain()[0], {key: 999 for key in range(8)})
+
+class TestEngineEvents(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.test_dir)
+
+    @patch('subtitle_downloader.core.SubtitleDownloader.postprocess_subtitle', return_value=True)
+    @patch('subtitle_downloader.core.download_to_file')
+    @patch('subtitle_downloader.core.rank_subtitles', side_effect=lambda subtitles, video: subtitles)
+    @patch('subtitle_downloader.core.scan_video')
+    @patch('subtitle_downloader.core.open_pool')
+    def test_phases_are_reported(self, mock_pool, mock_scan, mock_rank, mock_download, mock_postprocess):
+        """Test hashing, searching, downloading and writing are published in order"""
+        video_path = os.path.join(self.test_dir, 'movie.mkv')
+        Path(video_path).touch()
+
+        pool = mock_pool.return_value.__enter__.return_value
+        pool.list_subtitles.return_value = [MagicMock(provider_name='podnapisi'), MagicMock()]
+
+        def download(pool, subtitle, file_path, language, select, on_progress):
+            on_progress(100, 200)
+            on_progress(200, 200)
+            return Path(self.test_dir) / 'movie.pt-br.srt'
+        mock_download.side_effect = download
+
+        events = []
+        success, _ = SubtitleDownloader(os.path.join(self.test_dir, 'config.json')).download_for_file(video_path, events.append)
+
+        self.assertTrue(success)
+        self.assertEqual(
+            [(event.phase, event.current, event.total) for event in events],
+            [(HASHING, 0, 0), (SEARCHING, 0, 0), (SEARCHING, 2, 2),
+             (DOWNLOADING, 0, 0), (DOWNLOADING, 100, 200), (DOWNLOADING, 200, 200), (WRITING, 0, 0)]
+        )
+        self.assertEqual(events[2].message, 'Found 2 Portuguese candidates')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Tests for subtitle retiming
+"""
+
+import unittest
+import tempfile
+import os
+import sys
+from array import array
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the package to Python path
+package_dir = os.path.join(os.path.dirname(__file__), '..', 'src')
+sys.path.insert(0, os.path.abspath(package_dir))
+
+from subtitle_downloader import retime
+from subtitle_downloader.retime import (
+    fps_scale,
+    retime_data,
+    retime_directory,
+    retime_file,
+    retime_times,
+    two_point_transform
+)
+
+SRT = "1\r\n00:00:01,000 --> 00:00:02,000\r\nHello\r\n\r\n2\r\n00:01:00,000 --> 00:01:01,500\r\nBye\r\n"
+
+VTT = """WEBVTT
+
+00:01.000 --> 00:02.000 line:0
+Hello
+"""
+
+ASS = """[Script Info]
+Title: Test
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+Dialogue: 0,0:00:01.00,0:00:02.00,Default,,0,0,0,,{\\b1}Hi, there
+Comment: 0,0:00:05.00,0:00:06.00,Default,,0,0,0,,note
+"""
+
+class TestRetimeMath(unittest.TestCase):
+
+    def test_fps_scale(self):
+        """Test PAL speed-up correction stretches times"""
+        self.assertAlmostEqual(fps_scale(25, 23.976), 1.04271, places=5)
+        with self.assertRaises(ValueError):
+            fps_scale(0, 25)
+
+    def test_two_point_transform(self):
+        """Test scale and offset are solved from two sync points"""
+        scale, offset = two_point_transform((1000, 3000), (11000, 23000))
+        self.assertAlmostEqual(scale, 2.0)
+        self.assertAlmostEqual(offset, 1000)
+        with self.assertRaises(ValueError):
+            two_point_transform((1000, 0), (1000, 5))
+
+    def test_retime_times_with_and_without_numpy(self):
+        """Test vectorized and fallback paths give identical results"""
+        times = array('q', [0, 1000, 2500, 3600000])
+        expected = [0, 1500, 4500, 7199500]
+
+        if retime.numpy is not None:
+            self.assertEqual(list(retime_times(times, 2.0, -500)), expected)
+        with patch('subtitle_downloader.retime.numpy', None):
+            self.assertEqual(list(retime_times(times, 2.0, -500)), expected)
+
+class TestRetimeFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.test_dir)
+
+    def write(self, name, content):
+        path = Path(self.test_dir) / name
+        path.write_bytes(content.encode('utf-8'))
+        return path
+
+    def test_retime_srt_keeps_everything_else(self):
+        """Test only timestamps change in an SRT file"""
+        path = self.write('video.srt', SRT)
+
+        self.assertEqual(retime_file(path, offset_ms=1500), 2)
+        self.assertEqual(
+            path.read_bytes().decode('utf-8'),
+            SRT.replace('00:00:01,000 --> 00:00:02,000', '00:00:02,500 --> 00:00:03,500')
+               .replace('00:01:00,000 --> 00:01:01,500', '00:01:01,500 --> 00:01:03,000')
+        )
+
+    def test_retime_keeps_source_encoding(self):
+        """Test legacy-encoded and BOM-marked files are retimed without losing accents"""
+        text = SRT.replace('Hello', 'Ação é coração')
+        expected = text.replace('00:00:01,000 --> 00:00:02,000', '00:00:02,000 --> 00:00:03,000') \
+                       .replace('00:01:00,000 --> 00:01:01,500', '00:01:01,000 --> 00:01:02,500')
+
+        path = Path(self.test_dir) / 'video.srt'
+        path.write_bytes(text.encode('cp1252'))
+        retime_file(path, offset_ms=1000)
+        self.assertEqual(path.read_bytes(), expected.encode('cp1252'))
+
+        path.write_bytes(text.encode('utf-8-sig'))
+        retime_file(path, offset_ms=1000)
+        self.assertEqual(path.read_bytes(), expected.encode('utf-8-sig'))
+
+        self.assertEqual(retime_data(text.encode('cp1252'), 'video.srt', offset_ms=1000),
+                         (expected.encode('cp1252'), 2))
+
+    def test_retime_vtt_and_ass(self):
+        """Test WebVTT settings and ASS styling survive retiming"""
+        vtt = self.write('video.vtt', VTT)
+        retime_file(vtt, scale=2.0)
+        self.assertIn('00:00:02.000 --> 00:00:04.000 line:0\n', vtt.read_text())
+
+        ass = self.write('video.ass', ASS)
+        retime_file(ass, offset_ms=-1500)
+        content = ass.read_text()
+        self.assertIn('Dialogue: 0,0:00:00.00,0:00:00.50,Default,,0,0,0,,{\\b1}Hi, there\n', content)
+        self.assertIn('Comment: 0,0:00:05.00,0:00:06.00', content)
+
+    def test_retime_to_output_path(self):
+        """Test the source is untouched when an output path is given"""
+        path = self.write('video.srt', SRT)
+        output = Path(self.test_dir) / 'out.srt'
+
+        retime_file(path, offset_ms=1000, output_path=output)
+
+        self.assertEqual(path.read_bytes().decode('utf-8'), SRT)
+        self.assertIn('00:00:02,000 --> 00:00:03,000', output.read_text())
+
+    def test_retime_directory(self):
+        """Test every subtitle in a folder is retimed"""
+        self.write('a.srt', SRT)
+        self.write('b.vtt', VTT)
+        self.write('video.mkv', 'not a subtitle')
+
+        results = retime_directory(self.test_dir, offset_ms=100)
+
+        self.assertEqual(sorted(Path(path).name for path in results), ['a.srt', 'b.vtt'])
+        self.assertTrue(all(result['success'] for result in results.values()))
+
+if __name__ == '__main__':
+    unittest.main()
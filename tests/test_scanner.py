@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Tests for folder scanning and the incremental scan tree
+"""
+
+import unittest
+import tempfile
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add the package to Python path
+package_dir = os.path.join(os.path.dirname(__file__), '..', 'src')
+sys.path.insert(0, os.path.abspath(package_dir))
+
+from subtitle_downloader.scanner import ScanTree, scan_folder
+from subtitle_downloader.utils import is_video_file
+
+class TestScanTree(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.root = os.path.join(self.test_dir, 'library')
+        self.cache_file = os.path.join(self.test_dir, 'scan-tree.json')
+        for season in ('Show/Season 01', 'Show/Season 02', 'Movie'):
+            os.makedirs(os.path.join(self.root, season))
+        for name in ('Show/Season 01/e01.mkv', 'Show/Season 02/e01.mkv', 'Movie/movie.mp4', 'Movie/notes.txt'):
+            Path(self.root, name).touch()
+        self.age_folders()
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.test_dir)
+
+    def age_folders(self):
+        """Dates every folder in the past, outside the racy window"""
+        past = time.time() - 3600
+        for current, _, _ in os.walk(self.root):
+            os.utime(current, (past, past))
+
+    def scan(self, **options):
+        tree = ScanTree(self.cache_file, **options)
+        tree.load()
+        found = sorted(os.path.relpath(path, self.root) for path in scan_folder(self.root, is_video_file, True, tree))
+        tree.save()
+        return found, tree.listed
+
+    def test_unchanged_tree_is_not_listed(self):
+        """Test a second scan reuses every folder and finds the same videos"""
+        first, listed = self.scan()
+        self.assertEqual(listed, 5)
+
+        second, listed = self.scan()
+        self.assertEqual(second, first)
+        self.assertEqual(listed, 0)
+
+    def test_only_changed_folder_is_listed(self):
+        """Test a new file deep in the tree is found by relisting just its folder"""
+        self.scan()
+        Path(self.root, 'Show/Season 02/e02.mkv').touch()
+        past = time.time() - 60
+        os.utime(os.path.join(self.root, 'Show/Season 02'), (past, past))
+
+        found, listed = self.scan()
+
+        self.assertIn(os.path.join('Show', 'Season 02', 'e02.mkv'), found)
+        self.assertEqual(listed, 1)
+
+    def test_removed_folder_is_dropped(self):
+        """Test a deleted folder disappears from results and from the tree"""
+        self.scan()
+        import shutil
+        shutil.rmtree(os.path.join(self.root, 'Movie'))
+        self.age_folders()
+
+        found, _ = self.scan()
+        tree = ScanTree(self.cache_file)
+        tree.load()
+
+        self.assertEqual(found, [os.path.join('Show', 'Season 01', 'e01.mkv'), os.path.join('Show', 'Season 02', 'e01.mkv')])
+        self.assertNotIn(os.path.join(self.root, 'Movie'), tree.roots[self.root]["dirs"])
+
+    def test_full_rescan_safety_valve(self):
+        """Test stored entries are ignored once the full rescan interval has passed"""
+        self.scan()
+        _, listed = self.scan(full_rescan_interval=-1)
+        self.assertEqual(listed, 5)
+
+    def test_recently_modified_folder_is_relisted(self):
+        """Test folders changed within the mtime granularity are not trusted next time"""
+        os.utime(os.path.join(self.root, 'Movie'))
+        self.scan()
+
+        _, listed = self.scan()
+        self.assertEqual(listed, 1)
+
+    def test_other_predicate_does_not_reuse_entries(self):
+        """Test stored accepted files are only reused for the same predicate"""
+        self.scan()
+        tree = ScanTree(self.cache_file)
+        tree.load()
+
+        found = list(scan_folder(self.root, os.path.isfile, True, tree))
+
+        self.assertEqual(tree.listed, 5)
+        self.assertEqual(len(found), 4)
+
+if __name__ == '__main__':
+    unittest.main()
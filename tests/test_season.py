@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Tests for season-level batched search
+"""
+
+import unittest
+import os
+import sys
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Add the package to Python path
+package_dir = os.path.join(os.path.dirname(__file__), '..', 'src')
+sys.path.insert(0, os.path.abspath(package_dir))
+
+from subtitle_downloader.download import SOLE_SUBTITLE
+from subtitle_downloader.season import (
+    episode_selector,
+    group_by_season,
+    match_episodes,
+    release_tokens,
+    search_season,
+    subtitle_episode,
+    supports_season_query
+)
+
+def fake_parse(file_path):
+    """Minimal guessit replacement for deterministic tests"""
+    name = os.path.basename(file_path)
+    if name.startswith('Show.S01E0'):
+        return {'type': 'episode', 'title': 'Show', 'season': 1, 'episode': int(name[9])}
+    if name.startswith('Other.S02E01'):
+        return {'type': 'episode', 'title': 'Other', 'season': 2, 'episode': 1}
+    return {'type': 'movie', 'title': 'Movie'}
+
+class TestSeasonGrouping(unittest.TestCase):
+
+    @patch('subtitle_downloader.season.parse_video_name', side_effect=fake_parse)
+    def test_group_by_season(self, mock_parse):
+        """Test episodes of the same season are grouped together"""
+        files = [
+            '/tv/Show.S01E01.720p.mkv',
+            '/tv/Show.S01E02.720p.mkv',
+            '/tv/Show.S01E03.720p.mkv',
+            '/tv/Other.S02E01.mkv',
+            '/movies/Movie.2020.mkv'
+        ]
+
+        groups, others = group_by_season(files)
+
+        self.assertEqual(len(groups), 1)
+        (_, season), episodes = next(iter(groups.items()))
+        self.assertEqual(season, 1)
+        self.assertEqual([file_path for file_path, _ in episodes], files[:3])
+
+        # Lone episodes and movies are searched individually
+        self.assertEqual(sorted(others), sorted(files[3:]))
+
+    @patch('subtitle_downloader.season.parse_video_name', side_effect=ImportError)
+    def test_group_without_parser(self, mock_parse):
+        """Test every file falls back to per-file search if parsing fails"""
+        groups, others = group_by_season(['/tv/Show.S01E01.mkv'])
+
+        self.assertEqual(groups, {})
+        self.assertEqual(others, ['/tv/Show.S01E01.mkv'])
+
+class TestEpisodeMatching(unittest.TestCase):
+
+    def test_subtitle_episode_from_attribute_and_name(self):
+        """Test episode number detection on subtitles"""
+        self.assertEqual(subtitle_episode(SimpleNamespace(series_episode=4)), 4)
+        self.assertEqual(subtitle_episode(SimpleNamespace(movie_release_name='Show.S01E07.WEB')), 7)
+        self.assertIsNone(subtitle_episode(SimpleNamespace(movie_release_name='Show.Complete')))
+
+    def test_match_prefers_release_tokens(self):
+        """Test candidates are matched by episode and ranked by release tokens"""
+        web = SimpleNamespace(series_episode=1, movie_release_name='Show.S01E01.1080p.WEB.x264-GRP')
+        hdtv = SimpleNamespace(series_episode=1, movie_release_name='Show.S01E01.720p.HDTV.x264-CTU')
+        other = SimpleNamespace(series_episode=2, movie_release_name='Show.S01E02.720p.HDTV.x264-CTU')
+        episodes = [
+            ('/tv/Show.S01E01.720p.HDTV.x264-CTU.mkv', {'episode': 1}),
+            ('/tv/Show.S01E03.720p.HDTV.x264-CTU.mkv', {'episode': 3})
+        ]
+
+        matches = match_episodes([web, hdtv, other], episodes)
+
+        self.assertEqual(list(matches), ['/tv/Show.S01E01.720p.HDTV.x264-CTU.mkv'])
+        self.assertEqual(matches['/tv/Show.S01E01.720p.HDTV.x264-CTU.mkv'], [hdtv, web])
+
+    def test_release_tokens(self):
+        """Test release tokens ignore case and extensions"""
+        self.assertEqual(release_tokens('Show.S01E01.HDTV.srt'), {'show', 's01e01', 'hdtv'})
+
+    def test_episode_selector(self):
+        """Test season pack members are picked by SxxEyy, NxNN or Exx numbering"""
+        select = episode_selector(2)
+        self.assertTrue(select('Show.S01E02.srt'))
+        self.assertTrue(select('Show - 1x02.srt'))
+        self.assertTrue(select('Season 1/Show - E02.srt'))
+        self.assertFalse(select('Show - 1x01.srt'))
+        self.assertFalse(select('Show.S01E01.srt'))
+        self.assertFalse(select('Show - 1x02.nfo'))
+        # Unnumbered subtitles only count when they are the archive's only one
+        self.assertEqual(select('Show.720p.srt'), SOLE_SUBTITLE)
+
+class TestSeasonQuery(unittest.TestCase):
+
+    def test_provider_without_season_query(self):
+        """Test providers without a real season query are skipped"""
+        provider = SimpleNamespace(query=lambda languages, hash=None: [])
+
+        self.assertFalse(supports_season_query(provider))
+        self.assertIsNone(search_season(provider, 'Show', 1, ['en']))
+
+        # OpenSubtitles ignores the season without an episode
+        opensubtitles = SimpleNamespace(query=lambda languages, query=None, season=None, episode=None: [])
+        self.assertFalse(supports_season_query(opensubtitles))
+
+    def test_provider_with_season_query(self):
+        """Test one season-scoped query is issued and other seasons and shows are dropped"""
+        calls = []
+        wanted = SimpleNamespace(language='en', series='Show (2019)', season=2, episode=1)
+        results = [
+            wanted,
+            SimpleNamespace(language='pt', series='Show', season=2, episode=1),
+            SimpleNamespace(language='en', series='Show', season=3, episode=1),
+            SimpleNamespace(language='en', series='Show Extra', season=2, episode=1)
+        ]
+
+        def query(show_id, series, season, year=None):
+            calls.append((show_id, series, season))
+            return results
+
+        provider = SimpleNamespace(query=query, get_show_id=lambda series: 42)
+
+        self.assertEqual(search_season(provider, 'Show', 2, ['en']), [wanted])
+        self.assertEqual(calls, [(42, 'Show', 2)])
+
+    def test_other_seasons_are_not_matched(self):
+        """Test results from several seasons only match the video's own season"""
+        first = SimpleNamespace(series_season=1, series_episode=2, movie_release_name='Show.S01E02.HDTV')
+        third = SimpleNamespace(series_season=3, series_episode=2, movie_release_name='Show.S03E02.HDTV')
+        by_name = SimpleNamespace(movie_release_name='Show.S03E01.HDTV')
+        episodes = [
+            ('/tv/Show.S01E01.mkv', {'season': 1, 'episode': 1}),
+            ('/tv/Show.S01E02.mkv', {'season': 1, 'episode': 2})
+        ]
+
+        matches = match_episodes([third, by_name, first], episodes)
+
+        self.assertEqual(matches, {'/tv/Show.S01E02.mkv': [first]})
+        self.assertEqual(match_episodes([third], episodes[1:]), {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Tests for coalescing concurrent downloads of the same video
+"""
+
+import unittest
+import tempfile
+import os
+import subprocess
+import sys
+import threading
+import time
+from unittest.mock import patch
+
+# Add the package to Python path
+package_dir = os.path.join(os.path.dirname(__file__), '..', 'src')
+sys.path.insert(0, os.path.abspath(package_dir))
+
+from subtitle_downloader.cancel import Cancelled, CancelToken
+from subtitle_downloader.core import SubtitleDownloader
+from subtitle_downloader.singleflight import LOCK_MAX_AGE, LockFile, SingleFlight, sweep_locks
+
+def run_together(count, target):
+    """Calls target(index) on count threads at once; returns the results by index"""
+    results = [None] * count
+    barrier = threading.Barrier(count, timeout=5)
+
+    def call(index):
+        barrier.wait()
+        results[index] = target(index)
+
+    threads = [threading.Thread(target=call, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    return results
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_concurrent_callers_share_one_run(self):
+        """Test callers arriving while a run is in flight get its result"""
+        flights = SingleFlight()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.2)
+            return True, "done"
+
+        results = run_together(5, lambda index: flights.run('movie', fetch))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual({result for result, _ in results}, {(True, "done")})
+        self.assertEqual(sorted(shared for _, shared in results), [False, True, True, True, True])
+        self.assertEqual(flights.run('movie', fetch), ((True, "done"), False))
+        self.assertEqual(len(calls), 2)
+
+    def test_error_reaches_every_caller(self):
+        """Test an exception in the shared run is raised in the callers that joined it"""
+        flights = SingleFlight()
+
+        def fetch():
+            time.sleep(0.2)
+            raise OSError("disk gone")
+
+        def call(index):
+            try:
+                flights.run('movie', fetch)
+            except OSError as e:
+                return str(e)
+
+        self.assertEqual(run_together(3, call), ["disk gone"] * 3)
+
+    def test_waiting_caller_can_cancel(self):
+        """Test a caller's own token stops it from waiting for the shared run"""
+        flights = SingleFlight()
+        release = threading.Event()
+        leader = threading.Thread(target=flights.run, args=('movie', lambda: release.wait(5)))
+        leader.start()
+        time.sleep(0.05)
+
+        cancel = CancelToken()
+        threading.Timer(0.05, cancel.cancel).start()
+        with self.assertRaises(Cancelled):
+            flights.run('movie', lambda: None, cancel)
+        release.set()
+        leader.join()
+
+class TestLockFile(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.lock_path = os.path.join(self.test_dir, 'locks', 'movie.lock')
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.test_dir)
+
+    def test_waiting_process_gets_the_holders_result(self):
+        """Test a process that waited for the lock reads what the holder recorded"""
+        code = (
+            f"import sys; sys.path.insert(0, {os.path.abspath(package_dir)!r})\n"
+            "from subtitle_downloader.singleflight import LockFile\n"
+            f"with LockFile({self.lock_path!r}) as lock:\n"
+            "    print('locked', flush=True)\n"
+            "    sys.stdin.read()\n"
+            "    lock.write_result([True, 'English subtitle downloaded: movie.en.srt'])\n"
+        )
+        holder = subprocess.Popen([sys.executable, '-c', code], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        self.assertEqual(holder.stdout.readline().strip(), 'locked')
+        threading.Timer(0.2, holder.stdin.close).start()
+
+        with LockFile(self.lock_path) as lock:
+            self.assertTrue(lock.waited)
+            self.assertEqual(lock.read_result(), [True, 'English subtitle downloaded: movie.en.srt'])
+        holder.wait(5)
+        holder.stdout.close()
+
+        # Nobody held it this time, so the old result isn't reused
+        with LockFile(self.lock_path) as lock:
+            self.assertFalse(lock.waited)
+            self.assertIsNone(lock.read_result())
+
+    def test_unwritable_lock_runs_unlocked(self):
+        """Test a lock file that can't be created doesn't stop the download"""
+        blocker = os.path.join(self.test_dir, 'file')
+        open(blocker, 'w').close()
+        with LockFile(os.path.join(blocker, 'movie.lock')) as lock:
+            lock.write_result([True, 'done'])
+            self.assertIsNone(lock.read_result())
+
+    def test_sweep_removes_unused_locks(self):
+        """Test lock files unused for a day are removed, unless held or recent"""
+        lock_dir = os.path.dirname(self.lock_path)
+        paths = {name: os.path.join(lock_dir, f'{name}.lock') for name in ('old', 'held', 'recent')}
+        for name, path in paths.items():
+            with LockFile(path) as lock:
+                lock.write_result([True, name])
+            if name != 'recent':
+                stale = time.time() - LOCK_MAX_AGE - 60
+                os.utime(path, (stale, stale))
+
+        with open(paths['held']) as held:
+            import fcntl
+            fcntl.flock(held, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            self.assertEqual(sweep_locks(lock_dir), 1)
+
+        self.assertEqual(sorted(name for name in paths if os.path.exists(paths[name])), ['held', 'recent'])
+        # Sweeps are spaced out
+        os.utime(paths['held'], (0, 0))
+        self.assertEqual(sweep_locks(lock_dir), 0)
+        self.assertEqual(sweep_locks(os.path.join(self.test_dir, 'missing')), 0)
+
+    def test_lock_follows_a_swept_file(self):
+        """Test a process that opened a lock file removed before it locked it takes the new one"""
+        lock = LockFile(self.lock_path)
+        with LockFile(self.lock_path):
+            entered = threading.Thread(target=lock.__enter__)
+            entered.start()
+            time.sleep(0.2)
+            os.unlink(self.lock_path)
+        entered.join(5)
+        try:
+            self.assertEqual(os.stat(self.lock_path).st_ino, os.fstat(lock._file.fileno()).st_ino)
+        finally:
+            lock.__exit__(None, None, None)
+
+class TestCoalescedDownloads(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.video_path = os.path.join(self.test_dir, 'Show.S01E01.mkv')
+        with open(self.video_path, 'wb') as f:
+            f.write(os.urandom(200000))
+        self.env = patch.dict(os.environ, {'XDG_CACHE_HOME': os.path.join(self.test_dir, 'cache')})
+        self.env.start()
+        self.downloader = SubtitleDownloader(os.path.join(self.test_dir, 'config.json'))
+
+    def tearDown(self):
+        import shutil
+        self.env.stop()
+        shutil.rmtree(self.test_dir)
+
+    def test_double_click_downloads_once(self):
+        """Test simultaneous requests for one video search and write a single subtitle"""
+        calls = []
+
+        def fetch(file_path, progress=None, cancel=None):
+            calls.append(file_path)
+            time.sleep(0.2)
+            return True, "Portuguese (Brazil) subtitle downloaded: Show.S01E01.pt-br.srt"
+
+        with patch.object(self.downloader, 'fetch_for_file', side_effect=fetch):
+            results = run_together(4, lambda index: self.downloader.download_for_file(self.video_path))
+            self.assertEqual(len(calls), 1)
+            self.assertEqual(len(set(results)), 1)
+
+            # Another language chain is a different request
+            self.downloader.config.override('default_language', 'en')
+            self.downloader.download_for_file(self.video_path)
+            self.assertEqual(len(calls), 2)
+
+    def test_three_processes_download_once(self):
+        """Test every process waiting on the lock reuses the first result, not just the next one"""
+        engines = [SubtitleDownloader(os.path.join(self.test_dir, 'config.json')) for _ in range(3)]
+        calls = []
+
+        def fetch(file_path, progress=None, cancel=None):
+            calls.append(file_path)
+            time.sleep(0.3)
+            return True, "Portuguese (Brazil) subtitle downloaded: Show.S01E01.pt-br.srt"
+
+        patches = [patch.object(engine, 'fetch_for_file', side_effect=fetch) for engine in engines]
+        for engine_patch in patches:
+            engine_patch.start()
+        try:
+            results = run_together(3, lambda index: engines[index].download_for_file(self.video_path))
+        finally:
+            for engine_patch in patches:
+                engine_patch.stop()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(set(results)), 1)
+
+    def test_cancelled_request_does_not_cancel_the_others(self):
+        """Test callers that joined a cancelled request run the download themselves"""
+        leader_cancel = CancelToken()
+        started = threading.Event()
+        calls = []
+
+        def fetch(file_path, progress=None, cancel=None):
+            calls.append(cancel)
+            if cancel is leader_cancel:
+                started.set()
+                cancel.wait(5)
+                return False, "Cancelled"
+            return True, "done"
+
+        with patch.object(self.downloader, 'fetch_for_file', side_effect=fetch):
+            leader = threading.Thread(target=self.downloader.download_for_file, args=(self.video_path, None, leader_cancel))
+            leader.start()
+            started.wait(5)
+            threading.Timer(0.1, leader_cancel.cancel).start()
+            result = self.downloader.download_for_file(self.video_path)
+            leader.join()
+
+        self.assertEqual(result, (True, "done"))
+        self.assertEqual(len(calls), 2)
+
+    def test_coalescing_can_be_disabled(self):
+        """Test coalesce_downloads off runs every request"""
+        self.downloader.config.override('coalesce_downloads', False)
+        with patch.object(self.downloader, 'fetch_for_file', return_value=(True, "done")) as fetch:
+            run_together(3, lambda index: self.downloader.download_for_file(self.video_path))
+        self.assertEqual(fetch.call_count, 3)
+
+if __name__ == '__main__':
+    unittest.main()
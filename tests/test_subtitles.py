@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Tests for subtitle parsing and validation
+"""
+
+import unittest
+import tempfile
+import os
+import sys
+from pathlib import Path
+
+# Add the package to Python path
+package_dir = os.path.join(os.path.dirname(__file__), '..', 'src')
+sys.path.insert(0, os.path.abspath(package_dir))
+
+from subtitle_downloader.subtitles import (
+    parse_ass,
+    parse_srt,
+    parse_subtitle,
+    parse_vtt,
+    validate_subtitle
+)
+
+SRT = """1
+00:00:01,000 --> 00:00:02,500
+Hello
+
+2
+00:01:02,05 --> 00:01:04,000
+Two
+lines
+
+"""
+
+VTT = """WEBVTT
+Kind: captions
+
+NOTE a comment
+
+intro
+00:01.000 --> 00:02.000 align:start
+Hello
+
+01:00:00.000 --> 01:00:01.500
+Later
+"""
+
+ASS = """[Script Info]
+Title: Test
+
+[V4+ Styles]
+Format: Name, Fontname
+Style: Default,Arial
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+Dialogue: 0,0:00:01.00,0:00:02.50,Default,,0,0,0,,{\\i1}Hello, world{\\i0}\\NBye
+"""
+
+class TestParsers(unittest.TestCase):
+
+    def test_parse_srt(self):
+        """Test SRT cues become millisecond columns and text slices"""
+        cues = parse_srt(SRT.splitlines(True))
+
+        self.assertEqual(len(cues), 2)
+        self.assertEqual(list(cues.starts), [1000, 62050])
+        self.assertEqual(list(cues.ends), [2500, 64000])
+        self.assertEqual(cues.cue_text(1), 'Two\nlines')
+        self.assertEqual(cues.text, 'HelloTwo\nlines')
+        self.assertEqual(cues[0].text, 'Hello')
+        self.assertEqual(cues.last_end, 64000)
+        self.assertEqual(cues.errors, 0)
+
+    def test_parse_srt_crlf_without_trailing_blank(self):
+        """Test Windows line endings and a missing final blank line"""
+        cues = parse_srt("1\r\n00:00:01,000 --> 00:00:02,000\r\nHi".splitlines(True))
+
+        self.assertEqual(len(cues), 1)
+        self.assertEqual(cues[0].text, 'Hi')
+
+    def test_parse_vtt(self):
+        """Test WebVTT cues with identifiers, settings and short timestamps"""
+        cues = parse_vtt(VTT.splitlines(True))
+
+        self.assertEqual(list(cues.starts), [1000, 3600000])
+        self.assertEqual(list(cues.ends), [2000, 3601500])
+        self.assertEqual(cues.cue_text(0), 'Hello')
+
+    def test_parse_ass(self):
+        """Test ASS dialogue events with commas and override tags"""
+        cues = parse_ass(ASS.splitlines(True))
+
+        self.assertEqual(len(cues), 1)
+        self.assertEqual((cues.starts[0], cues.ends[0]), (1000, 2500))
+        self.assertEqual(cues.cue_text(0), 'Hello, world\nBye')
+
+    def test_large_file_is_compact(self):
+        """Test thousands of cues are stored in columns"""
+        blocks = ''.join(
+            f"{i}\n00:{i // 60 % 60:02d}:{i % 60:02d},000 --> 00:{i // 60 % 60:02d}:{i % 60:02d},500\nLine {i}\n\n"
+            for i in range(5000)
+        )
+        cues = parse_srt(blocks.splitlines(True))
+
+        self.assertEqual(len(cues), 5000)
+        self.assertEqual(cues.starts.itemsize * len(cues.starts), 8 * 5000)
+        self.assertEqual(cues.cue_text(4999), 'Line 4999')
+
+class TestValidation(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.test_dir)
+
+    def write(self, name, content):
+        path = Path(self.test_dir) / name
+        path.write_text(content, encoding='utf-8')
+        return path
+
+    def test_format_detection(self):
+        """Test content is parsed according to its real format"""
+        # Providers may deliver ASS content under an .srt name
+        cues = parse_subtitle(self.write('video.pt-br.srt', ASS))
+        self.assertEqual(cues.format, 'ass')
+
+        cues = parse_subtitle(self.write('video.vtt', '\ufeff' + VTT))
+        self.assertEqual(cues.format, 'vtt')
+
+    def test_valid_subtitle(self):
+        """Test a well-formed subtitle passes validation"""
+        valid, message = validate_subtitle(self.write('good.srt', SRT))
+        self.assertTrue(valid)
+        self.assertEqual(message, '2 cues')
+
+    def test_invalid_subtitles(self):
+        """Test empty, garbage and missing files are rejected"""
+        self.assertFalse(validate_subtitle(self.write('empty.srt', ''))[0])
+        self.assertFalse(validate_subtitle(self.write('html.srt', '<html>\n<body>Error</body>\n</html>\n'))[0])
+        self.assertFalse(validate_subtitle(self.write('notext.srt', '1\n00:00:01,000 --> 00:00:02,000\n\n'))[0])
+        self.assertFalse(validate_subtitle(os.path.join(self.test_dir, 'missing.srt'))[0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -66,6 +66,56 @@ class TestUtils(unittest.TestCase):
             with self.subTest(filename=filename):
                 self.assertEqual(is_video_file(filename), expected)
     
+    def test_video_detection_by_content(self):
+        """Test files without a known extension are identified by magic bytes"""
+        signatures = [
+            ('download', b'\x1a\x45\xdf\xa3' + b'\x00' * 60, True),
+            ('Movie.2010.1080p', b'\x00\x00\x00\x20ftypisom' + b'\x00' * 52, True),
+            ('clip.bin', b'RIFF\x00\x10\x00\x00AVI LIST' + b'\x00' * 48, True),
+            ('dvd.dat', b'\x00\x00\x01\xba' + b'\x00' * 60, True),
+            ('broadcast.mts', (b'\x47' + b'\x00' * 187) * 3, True),
+            ('notes', b'Plain text that is not a video at all' * 4, False),
+            ('starts-with-g', b'G' + b'x' * 400, False),
+            ('fake.srt', b'\x1a\x45\xdf\xa3' + b'\x00' * 60, False),
+        ]
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for filename, content, expected in signatures:
+                with self.subTest(filename=filename):
+                    path = Path(temp_dir) / filename
+                    path.write_bytes(content)
+                    self.assertEqual(is_video_file(path), expected)
+            
+            self.assertFalse(is_video_file(Path(temp_dir) / 'download', sniff=False))
+            self.assertFalse(is_video_file(Path(temp_dir) / 'missing'))
+    
+    @unittest.skipUnless(hasattr(os, 'mkfifo'), "Needs named pipes")
+    def test_special_files_are_not_videos(self):
+        """Test directories and FIFOs are rejected without blocking on open"""
+        import threading
+        from subtitle_downloader.probe import sniff_video
+        from subtitle_downloader.scanner import scan_folder
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            os.mkdir(os.path.join(temp_dir, 'Foo.mkv'))
+            os.mkfifo(os.path.join(temp_dir, 'pipe'))
+            os.mkfifo(os.path.join(temp_dir, 'pipe.mkv'))
+            Path(temp_dir, 'movie.mkv').touch()
+            
+            results = {}
+            def check():
+                results['dir'] = is_video_file(os.path.join(temp_dir, 'Foo.mkv'))
+                results['fifo'] = is_video_file(os.path.join(temp_dir, 'pipe'))
+                results['named fifo'] = is_video_file(os.path.join(temp_dir, 'pipe.mkv'))
+                results['sniff'] = sniff_video(os.path.join(temp_dir, 'pipe'))
+                results['scan'] = [os.path.basename(path) for path in scan_folder(temp_dir, is_video_file, True)]
+            thread = threading.Thread(target=check, daemon=True)
+            thread.start()
+            thread.join(5)
+            
+            self.assertFalse(thread.is_alive())
+            self.assertEqual(results, {'dir': False, 'fifo': False, 'named fifo': False, 'sniff': None, 'scan': ['movie.mkv']})
+    
     def test_get_unique_subtitle_path_sequence(self):
         """Test subtitle path generation with multiple files"""
         with tempfile.TemporaryDirectory() as temp_dir: